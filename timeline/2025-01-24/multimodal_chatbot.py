@@ -1,8 +1,12 @@
 import streamlit as st
-import openai
+import os
 import re
-import requests
+import sys
 from dotenv import load_dotenv
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.image_pipeline import DETAIL_LEVELS, IMAGE_PIPELINE, token_report
+from common.image_validation import IMAGE_VALIDATOR
+from common.registry import get_openai_client
 
 # 환경 변수 로드
 load_dotenv()
@@ -18,6 +22,9 @@ openai_api_key = st.sidebar.text_input("🔑 OpenAI API Key", type="password")
 if not openai_api_key.startswith("sk-"):
     st.sidebar.warning("Please enter your OpenAI API key!", icon="⚠")
 
+# --- 사이드바: 이미지 해상도 (작을수록 vision 토큰이 적음, common/image_pipeline.py) ---
+image_detail = st.sidebar.selectbox("🖼️ 이미지 해상도", list(DETAIL_LEVELS), index=1)
+
 # --- 채팅 기록을 세션 상태에 저장 ---
 if "messages" not in st.session_state:
     st.session_state.messages = [
@@ -33,63 +40,67 @@ for message in st.session_state.messages:
 user_input = st.chat_input("메시지를 입력하세요...")
 
 # --- ✅ 이미지 URL과 텍스트를 자동으로 분류하는 함수 ---
-def extract_url_and_text(input_text):
-    """사용자 입력에서 이미지 URL과 텍스트를 분리"""
+def extract_urls_and_text(input_text):
+    """사용자 입력에서 이미지 URL들과 텍스트를 분리"""
     url_pattern = r"(https?://[^\s]+)"
-    match = re.search(url_pattern, input_text)
+    image_urls = re.findall(url_pattern, input_text)
 
-    if match:
-        image_url = match.group(0)  # 첫 번째 URL 추출
-        text_prompt = input_text.replace(image_url, "").strip()  # URL을 제외한 텍스트
-    else:
-        image_url = None
-        text_prompt = input_text.strip()
+    text_prompt = input_text
+    for image_url in image_urls:
+        text_prompt = text_prompt.replace(image_url, "")  # URL을 제외한 텍스트
 
-    return image_url, text_prompt
+    return image_urls, text_prompt.strip()
 
-# --- ✅ URL이 실제 이미지인지 확인하는 함수 ---
-def is_valid_image_url(url):
-    """URL이 실제 이미지인지 확인 (HTTP 응답 헤더 사용)"""
-    try:
-        response = requests.head(url, allow_redirects=True, timeout=5)
-        content_type = response.headers.get("Content-Type", "")
-        return content_type.startswith("image/")
-    except requests.RequestException:
-        return False
+# --- ✅ URL이 실제 이미지인지 확인 ---
+# 메시지마다 requests.head를 보내던 것을 공유 비동기 검증기로 대체 (common/image_validation.py)
+# submit()은 바로 Future를 반환하고, 결과(이미지가 아닌 URL/실패 포함)는 TTL 캐시에 남아서 같은 URL은 다시 묻지 않음
 
 # --- ✅ OpenAI GPT-4o-turbo 호출 ---
 if user_input and openai_api_key.startswith("sk-"):
     # URL과 텍스트 분류
-    image_url, text_prompt = extract_url_and_text(user_input)
+    image_urls, text_prompt = extract_urls_and_text(user_input)
+    validation = IMAGE_VALIDATOR.submit(image_urls) if image_urls else None  # 검증은 아래 메시지 준비와 겹쳐서 진행
 
     # 사용자 메시지 저장
     st.session_state.messages.append({"role": "user", "content": user_input})
     with st.chat_message("user"):
         st.markdown(user_input)
 
-    # ✅ 이미지 URL이 있는 경우 확인
-    if image_url and not is_valid_image_url(image_url):
-        st.warning("🚨 제공된 URL이 유효한 이미지가 아닐 가능성이 있습니다. 다른 URL을 시도하세요.")
-        image_url = None  # 유효하지 않으면 URL을 제거
-
     # OpenAI GPT-4V 요청 메시지 생성
     messages = [{"role": "system", "content": "You are an AI that analyzes images and answers questions based on the image and text input."}]
 
+    # ✅ 검증 결과를 기다린 뒤 이미지인 URL만 파이프라인으로 받아서 줄임 (이미지가 아닌 URL은 받지 않음)
+    # 같은 이미지는 내용 해시 캐시에서 바로 꺼내고, 이미지지만 줄이지 못한 경우는 원래 URL을 그대로 보냄
+    valid = validation.result() if validation else {}
+    for image_url in image_urls:
+        if not valid[image_url]:
+            st.warning(f"🚨 제공된 URL이 유효한 이미지가 아닐 가능성이 있습니다. 다른 URL을 시도하세요. ({image_url})")
+    image_urls = [image_url for image_url in image_urls if valid[image_url]]
+    images = [image for image in IMAGE_PIPELINE.prepare(image_urls, detail=image_detail) if image.is_image] if image_urls else []
+
     # ✅ 이미지 URL이 없는 경우 → 일반 텍스트 질문 처리
-    if not image_url:
+    if not images:
         messages.append({"role": "user", "content": text_prompt})
     else:
-        # ✅ 이미지 URL이 있는 경우 → 텍스트 + 이미지 URL을 함께 전달
+        # ✅ 이미지 URL이 있는 경우 → 줄인 이미지(base64)를 텍스트와 함께 전달
         messages.append({
             "role": "user",
             "content": [
-                {"type": "text", "text": text_prompt if text_prompt else "이 이미지에서 무엇이 보이나요?"},
-                {"type": "image_url", "image_url": {"url": image_url}}
+                {"type": "text", "text": text_prompt if text_prompt else "이 이미지에서 무엇이 보이나요?"}
+            ] + [
+                image.content_part() if image.ok else {"type": "image_url", "image_url": {"url": image.url}}
+                for image in images
             ]
         })
-
-    # OpenAI API 호출 (GPT-4-turbo 사용)
-    client = openai.OpenAI(api_key=openai_api_key)
+        report = token_report(images)
+        if report["images"]:
+            st.caption(
+                f"🖼️ 이미지 {report['images']}개 (캐시 {report['cached']}개): vision 토큰 약 {report['original_tokens']:,} → {report['tokens']:,} "
+                f"({report['saved_ratio']:.0%} 절약), 전송 {report['payload_bytes'] / 1024:,.0f} KB"
+            )
+
+    # OpenAI API 호출 (GPT-4-turbo 사용, API 키별로 공유하는 클라이언트 → keep-alive 연결/TLS 세션 재사용)
+    client = get_openai_client(openai_api_key)
     response = client.chat.completions.create(
         model="gpt-4-turbo",
         messages=messages,
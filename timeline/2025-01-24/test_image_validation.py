@@ -0,0 +1,143 @@
+'''
+
+multimodal_chatbot의 이미지 URL 검증기(common/image_validation.py) 테스트
+로컬 HTTP 대역 서버에 대해 동시 검증, TTL 캐시(이미지가 아닌 URL/실패 포함), HEAD 거부 서버, 연결 재사용을 확인
+
+실행: python -m pytest timeline/2025-01-24/test_image_validation.py
+
+'''
+
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.image_validation import ImageURLValidator
+
+DELAY = 0.2
+
+# ✅ 로컬 HTTP 대역: 경로 → (상태 코드, Content-Type), 응답마다 DELAY초 지연
+ROUTES = {
+    "/cat.png": (200, "image/png"),
+    "/dog.jpg": (200, "image/jpeg"),
+    "/page.html": (200, "text/html; charset=utf-8"),
+    "/missing.png": (404, "text/plain"),
+    "/nohead.webp": (200, "image/webp"),  # HEAD는 405
+}
+
+
+class StandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def _respond(self, head):
+        self.server.requests.append((self.command, self.path))
+        self.server.connections.add(self.client_address)
+        time.sleep(DELAY)
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/cat.png")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if head and self.path == "/nohead.webp":
+            status, content_type = 405, "text/plain"
+        else:
+            status, content_type = ROUTES.get(self.path, (404, "text/plain"))
+        body = b"x" * 1024
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._respond(head=True)
+
+    def do_GET(self):
+        self._respond(head=False)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    server.requests = []
+    server.connections = set()
+    server.base = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def validator():
+    validator = ImageURLValidator(timeout=2.0)
+    yield validator
+    validator.close()
+
+
+def test_validates_urls_concurrently(server, validator):
+    urls = [server.base + path for path in ("/cat.png", "/dog.jpg", "/page.html", "/missing.png", "/nohead.webp", "/redirect")]
+
+    start = time.perf_counter()
+    future = validator.submit(urls)
+    assert time.perf_counter() - start < DELAY  # 바로 반환
+    results = future.result(timeout=5)
+    elapsed = time.perf_counter() - start
+
+    assert results == {
+        server.base + "/cat.png": True,
+        server.base + "/dog.jpg": True,
+        server.base + "/page.html": False,
+        server.base + "/missing.png": False,
+        server.base + "/nohead.webp": True,
+        server.base + "/redirect": True,
+    }
+    # 순서대로 보내면 7번 왕복 (HEAD 거부 1번 + 리다이렉트 1번 추가), 동시에 보내면 가장 긴 경로의 2번 왕복
+    assert elapsed < DELAY * 4
+
+
+def test_caches_negative_results(server, validator):
+    urls = [server.base + "/cat.png", server.base + "/page.html", server.base + "/missing.png"]
+    validator.validate(urls)
+    sent = len(server.requests)
+
+    assert validator.validate(urls) == {urls[0]: True, urls[1]: False, urls[2]: False}
+    assert len(server.requests) == sent  # 이미지가 아닌 URL, 실패한 URL도 다시 묻지 않음
+    assert validator.stats()["hits"] == 3
+
+
+def test_failed_urls_expire_after_error_ttl(server):
+    validator = ImageURLValidator(ttl=600, error_ttl=0)
+    try:
+        url = server.base + "/missing.png"
+        validator.validate([url])
+        validator.validate([url])
+        assert server.requests == [("HEAD", "/missing.png"), ("HEAD", "/missing.png")]
+    finally:
+        validator.close()
+
+
+def test_head_rejected_falls_back_to_get(server, validator):
+    assert validator.validate([server.base + "/nohead.webp"]) == {server.base + "/nohead.webp": True}
+    assert server.requests == [("HEAD", "/nohead.webp"), ("GET", "/nohead.webp")]
+
+
+def test_shares_inflight_requests_and_connections(server, validator):
+    url = server.base + "/cat.png"
+    futures = [validator.submit([url]) for _ in range(5)]
+    assert all(future.result(timeout=5) == {url: True} for future in futures)
+    assert server.requests == [("HEAD", "/cat.png")]  # 같은 URL을 동시에 물으면 요청 하나를 공유
+
+    for _ in range(3):
+        validator._cache.clear()
+        validator.validate([url])
+    assert len(server.connections) == 1  # keep-alive 연결 재사용
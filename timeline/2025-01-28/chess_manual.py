@@ -2,46 +2,56 @@ import streamlit as st
 import chess
 import chess.svg
 import langgraph
-import cairosvg
-import random
 import json
-from io import BytesIO
 from langchain.chat_models import ChatOpenAI
-from langchain.schema import SystemMessage, HumanMessage
 from langgraph.graph import StateGraph, START, END
 from dotenv import load_dotenv
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.chess_cache import LEGAL_MOVES
+from common.board_render import BOARD_IMAGES
+from common.move_generation import MoveGenerator
+from common.chess_engine import engine_fallback
+from common.opening_book import OPENING_BOOK
+from common.game_store import GAME_STORE
+from common.registry import get_graph, get_llm
 
 # ✅ 환경 변수 로드
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
-# ✅ OpenAI LLM 설정
-llm = ChatOpenAI(
+# ✅ OpenAI LLM 설정 (프로세스당 한 번 생성해서 재실행마다 재사용, common/registry.py)
+llm = get_llm(
+    ChatOpenAI,
     model="gpt-4o-mini",
     max_tokens=100,
     temperature=0.5,
     openai_api_key=openai_api_key
 )
 
-# ✅ 체스 보드 상태 유지
+# ✅ 후보 수 여러 개를 한 번에 받아 합법 수 캐시로 검증하는 수 생성기 (호출 수/지연 시간은 move_log.jsonl에 기록)
+# 초반에는 LLM보다 먼저 오프닝 북을 조회하고, LLM이 합법 수를 못 내면 랜덤 수 대신 로컬 알파-베타 엔진(0.5초 제한)의 수를 둠
+move_generator = MoveGenerator(llm, num_candidates=3, fallback=engine_fallback, book=OPENING_BOOK)
+
+# ✅ 체스 보드 상태 유지 (수순은 common/game_store.py에 저장, URL의 ?game=<id>로 새로고침/재시작 후에도 이어서 둠)
 if "board" not in st.session_state:
-    st.session_state.board = chess.Board()
+    st.session_state.game_id, st.session_state.board = GAME_STORE.resume(st.query_params.get("game"), app="chess_manual")
+    st.query_params["game"] = st.session_state.game_id  # game_id는 오프닝 북 적중률 집계에도 사용
 if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+    st.session_state.chat_history = GAME_STORE.messages(st.session_state.game_id)
 if "next_turn" not in st.session_state:
-    st.session_state.next_turn = "white"  # 기본적으로 사용자가 먼저 시작
+    st.session_state.next_turn = "white" if st.session_state.board.turn == chess.WHITE else "black"  # 새 게임은 사용자가 먼저 시작
 
 # ✅ Streamlit 설정
 st.set_page_config(page_title="♟️ LLM 체스 챗봇", layout="centered")
 st.title("♟️ LLM 체스 챗봇")
 
-# ✅ 체스 보드 렌더링 함수
+# ✅ 체스 보드 렌더링 함수 (같은 포지션은 캐시된 PNG를 재사용, cairosvg는 첫 렌더링 때 로드)
 def render_chessboard(board):
-    svg_data = chess.svg.board(board=board, size=400)
-    png_data = BytesIO()
-    cairosvg.svg2png(bytestring=svg_data.encode('utf-8'), write_to=png_data)
-    return png_data
+    return BOARD_IMAGES.png(board, size=400)
+
+BOARD_IMAGES.warm_openings(size=400)  # 시작 포지션 + 자주 나오는 오프닝을 프로세스당 한 번 미리 렌더링
 
 # ✅ UI 업데이트
 board_placeholder = st.empty()
@@ -50,6 +60,8 @@ board_placeholder.image(render_chessboard(st.session_state.board), caption="현
 # ✅ "Restart" 버튼 추가 (게임 초기화)
 if st.button("🔄 Restart"):
     st.session_state.board = chess.Board()
+    st.session_state.game_id = GAME_STORE.create(app="chess_manual")
+    st.query_params["game"] = st.session_state.game_id
     st.session_state.chat_history = []
     st.session_state.next_turn = "white"
     board_placeholder.image(render_chessboard(st.session_state.board), caption="새 게임 시작")
@@ -60,7 +72,7 @@ def get_state():
     state = {
         "fen": st.session_state.board.fen(),
         "next_turn": "white" if st.session_state.board.turn == chess.WHITE else "black",
-        "legal_moves": [m.uci() for m in st.session_state.board.legal_moves],
+        "legal_moves": list(LEGAL_MOVES.uci(st.session_state.board)),
         "is_check": st.session_state.board.is_check(),
         "is_checkmate": st.session_state.board.is_checkmate(),
         "is_stalemate": st.session_state.board.is_stalemate(),
@@ -70,8 +82,12 @@ def get_state():
     print(json.dumps(state, indent=4))  # 콘솔 출력
     return state
 
-# ✅ LangGraph 워크플로우 설정
-graph = StateGraph(dict)
+# ✅ 둔 수를 채팅 기록과 게임 저장소에 함께 기록
+def record_move(role, move):
+    board = st.session_state.board
+    st.session_state.chat_history.append((role, move))
+    GAME_STORE.append(st.session_state.game_id, board.peek(), board)
+    GAME_STORE.add_message(st.session_state.game_id, role, move)
 
 # 1️⃣ **사용자 입력 노드 (White 기물)**
 def user_move(state):
@@ -82,9 +98,9 @@ def user_move(state):
             get_state()
             return state  # 상태 출력 후 유지
 
-        elif user_msg in [m.uci() for m in st.session_state.board.legal_moves]:
+        elif LEGAL_MOVES.is_legal(st.session_state.board, user_msg):  # ✅ 포지션별 캐시로 O(1) 검증
             st.session_state.board.push_uci(user_msg)
-            st.session_state.chat_history.append(("🧑‍💻 사용자 (White)", user_msg))
+            record_move("🧑‍💻 사용자 (White)", user_msg)
             board_placeholder.image(render_chessboard(st.session_state.board), caption="현재 체스 보드 상태")
             return {"board_state": st.session_state.board, "next_turn": "black"}
         else:
@@ -93,53 +109,31 @@ def user_move(state):
 
     return state  # 입력이 없으면 유지
 
-graph.add_node("user_move", user_move)
-graph.add_edge(START, "user_move")
-
 # 2️⃣ **AI (Black 기물) 자동 생성 노드**
 def ai_move(state):
-    messages = [
-        SystemMessage(content="You are a chess AI playing as Black. Always respond with a valid move."),
-        HumanMessage(content=f"""
-### 체스 현재 상태
-- FEN: {st.session_state.board.fen()}
-- 가능한 수: {', '.join([m.uci() for m in st.session_state.board.legal_moves])}
-
-💡 **다음 수를 UCI 형식으로만 출력하세요! 예: e7e5**
-""")
-    ]
-
-    retry_count = 0
-    while retry_count < 5:
-        response = llm(messages).content.strip()
-        legal_moves = [m.uci() for m in st.session_state.board.legal_moves]
-
-        if response in legal_moves:
-            st.session_state.board.push_uci(response)
-            st.session_state.chat_history.append(("🤖 AI (Black)", response))
-            board_placeholder.image(render_chessboard(st.session_state.board), caption="현재 체스 보드 상태")
-            return {"board_state": st.session_state.board, "next_turn": "white"}  # ✅ 자동 전환 설정
-        
-        retry_count += 1
-        st.warning(f"⚠️ AI가 잘못된 움직임을 생성했습니다. ({response}) 다시 시도 중...")
-
-    # 5번 실패하면 랜덤 선택
-    response = random.choice(legal_moves)
-    st.warning(f"⚠️ AI가 5회 연속 잘못된 움직임을 생성했습니다. 랜덤 선택: {response}")
-    st.session_state.board.push_uci(response)
-    st.session_state.chat_history.append(("🤖 AI (Black)", response))
+    # ✅ 한 번의 호출로 순위가 매겨진 후보 3개를 받고, 모두 틀리면 한 번만 다시 요청 (그래도 없으면 엔진 수)
+    choice = move_generator.choose(st.session_state.board, game_id=st.session_state.game_id)
+    if choice.rejected:
+        st.warning(f"⚠️ AI가 잘못된 움직임을 생성했습니다. ({', '.join(choice.rejected)})")
+    if choice.source == "fallback":
+        st.warning(f"⚠️ AI가 {choice.llm_calls}회 요청에서 합법 수를 찾지 못했습니다. 엔진 선택: {choice.move}")
+
+    st.session_state.board.push_uci(choice.move)
+    record_move("🤖 AI (Black)", choice.move)
+    book = OPENING_BOOK.game_stats(st.session_state.game_id)
+    st.caption(f"📚 오프닝 북 적중: {book['hits']}/{book['probes']} ({book['hit_rate']:.0%})")
     board_placeholder.image(render_chessboard(st.session_state.board), caption="현재 체스 보드 상태")
-    return {"board_state": st.session_state.board, "next_turn": "white"}
-
-graph.add_node("ai_move", ai_move)
+    return {"board_state": st.session_state.board, "next_turn": "white"}  # ✅ 자동 전환 설정
 
 # 3️⃣ **게임 상태 업데이트 노드 (AI가 자동으로 실행되도록 수정)**
 def check_game_status(state):
     if st.session_state.board.is_checkmate():
         st.error("체크메이트! 게임 종료.")
+        GAME_STORE.finish(st.session_state.game_id, st.session_state.board.result())
         return {"game_over": True}
     if st.session_state.board.is_stalemate():
         st.warning("무승부! 게임 종료.")
+        GAME_STORE.finish(st.session_state.game_id, st.session_state.board.result())
         return {"game_over": True}
     
     # ✅ 자동 실행을 위해 상태 전이 설정
@@ -147,23 +141,34 @@ def check_game_status(state):
         return "ai_move"  # AI 차례에서는 자동 실행
     return "user_move"
 
-graph.add_node("check_status", check_game_status)
-graph.add_conditional_edges(
-    "check_status",
-    lambda state: "game_over" if state.get("game_over") else state["next_turn"],
-    {
-        "black": "ai_move",
-        "white": "user_move",
-        "game_over": "game_over"
-    }
-)
-
-# ✅ "game_over" 노드 추가
-graph.add_node("game_over", lambda state: state)
-graph.add_edge("game_over", END)
-
-# ✅ LangGraph 실행
-app = graph.compile()
+# ✅ LangGraph 워크플로우 설정 (프로세스당 한 번만 빌드/compile, 노드는 이번 실행의 함수를 호출)
+def build_graph(node):
+    graph = StateGraph(dict)
+
+    graph.add_node("user_move", node("user_move"))
+    graph.add_edge(START, "user_move")
+    graph.add_node("ai_move", node("ai_move"))
+    graph.add_node("check_status", node("check_status"))
+    graph.add_conditional_edges(
+        "check_status",
+        lambda state: "game_over" if state.get("game_over") else state["next_turn"],
+        {
+            "black": "ai_move",
+            "white": "user_move",
+            "game_over": "game_over"
+        }
+    )
+
+    # ✅ "game_over" 노드 추가
+    graph.add_node("game_over", lambda state: state)
+    graph.add_edge("game_over", END)
+    return graph
+
+app = get_graph("chess_manual", build_graph, nodes={
+    "user_move": user_move,
+    "ai_move": ai_move,
+    "check_status": check_game_status,
+})
 
 # ✅ 체스 게임 실행
 state = {"board_state": st.session_state.board, "next_turn": st.session_state.next_turn}
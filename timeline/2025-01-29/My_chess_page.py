@@ -1,12 +1,19 @@
 import streamlit as st
 import chess
 import chess.svg
-import cairosvg
 import random
-from io import BytesIO
 from langchain.chat_models import ChatOpenAI
 from dotenv import load_dotenv
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.chess_cache import LEGAL_MOVES
+from common.board_render import BOARD_IMAGES
+from common.chess_engine import Engine
+from common.opening_book import OPENING_BOOK
+from common.game_store import GAME_STORE
+from common.registry import get_graph, get_llm
+from common.chess_state import LiveBoard
 from typing import TypedDict
 from langchain.schema import SystemMessage, HumanMessage
 from langgraph.graph import StateGraph, START, END
@@ -15,19 +22,23 @@ from langgraph.graph import StateGraph, START, END
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
-# ✅ OpenAI LLM 설정
-llm = ChatOpenAI(
+# ✅ OpenAI LLM 설정 (프로세스당 한 번 생성해서 재실행마다 재사용, common/registry.py)
+llm = get_llm(
+    ChatOpenAI,
     model="gpt-4o-mini",
     max_tokens=100,
     temperature=0.5,
     openai_api_key=openai_api_key
 )
 
-# ✅ 상태 초기화
+# ✅ 상태 초기화 (수순은 common/game_store.py에 저장, URL의 ?game=<id>로 새로고침/재시작 후에도 이어서 둠)
 if "board" not in st.session_state:
-    st.session_state.board = chess.Board()
+    st.session_state.game_id, st.session_state.board = GAME_STORE.resume(st.query_params.get("game"), app="My_chess_page")
+    st.query_params["game"] = st.session_state.game_id  # game_id는 오프닝 북 적중률 집계에도 사용
+if "engine" not in st.session_state:
+    st.session_state.engine = Engine()  # 치환표는 세션마다 따로 (다른 세션의 탐색을 기다리지 않음)
 if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+    st.session_state.chat_history = GAME_STORE.messages(st.session_state.game_id)
 if "current_turn" not in st.session_state:
     st.session_state.current_turn = "user"  
 if "current_node" not in st.session_state:
@@ -37,12 +48,11 @@ if "current_node" not in st.session_state:
 st.set_page_config(page_title="♟️ LLM 체스 챗봇", layout="centered")
 st.title("♟️ LLM 체스 챗봇")
 
-# ✅ 체스 보드 렌더링 함수
+# ✅ 체스 보드 렌더링 함수 (같은 포지션은 캐시된 PNG를 재사용, cairosvg는 첫 렌더링 때 로드)
 def render_chessboard(board):
-    svg_data = chess.svg.board(board=board, size=400)
-    png_data = BytesIO()
-    cairosvg.svg2png(bytestring=svg_data.encode('utf-8'), write_to=png_data)
-    return png_data
+    return BOARD_IMAGES.png(board, size=400)
+
+BOARD_IMAGES.warm_openings(size=400)  # 시작 포지션 + 자주 나오는 오프닝을 프로세스당 한 번 미리 렌더링
 
 # ✅ UI 업데이트
 board_placeholder = st.empty()
@@ -51,60 +61,69 @@ board_placeholder.image(render_chessboard(st.session_state.board), caption="현
 # ✅ "Restart" 버튼 추가 (게임 초기화)
 if st.button("🔄 Restart"):
     st.session_state.board = chess.Board()
+    st.session_state.game_id = GAME_STORE.create(app="My_chess_page")
+    st.query_params["game"] = st.session_state.game_id
     st.session_state.chat_history = []
     st.session_state.current_turn = "user"  
     board_placeholder.image(render_chessboard(st.session_state.board), caption="새 게임 시작")
     st.rerun()
 
-# ✅ State 클래스 정의
+# ✅ State 클래스 정의 (FEN 대신 살아 있는 보드를 넘기고, 체크/체크메이트/스테일메이트는 push 뒤 한 번만 계산해서 캐시)
 class State(TypedDict): 
-    fen: str
+    game: LiveBoard
     current_turn: str
-    is_check: bool
-    is_checkmate: bool
-    is_stalemate: bool
     current_node: str
 
 # ✅ 체스 상태(State) 반환 함수
 def get_state(board: chess.Board) -> State:
     return {
-        "fen": board.fen(),
+        "game": LiveBoard(board),
         "current_turn": "user" if board.turn == chess.WHITE else "AI",
-        "is_check": board.is_check(),
-        "is_checkmate": board.is_checkmate(),
-        "is_stalemate": board.is_stalemate(),
         "current_node": st.session_state.current_node  # Ensure current_node is included
     }
 
+# ✅ 둔 수를 채팅 기록과 게임 저장소에 함께 기록 (game_board: 수를 둔 뒤의 보드)
+def record_move(role, move, game_board):
+    st.session_state.chat_history.append((role, move))
+    GAME_STORE.append(st.session_state.game_id, game_board.peek(), game_board)
+    GAME_STORE.add_message(st.session_state.game_id, role, move)
+
 # ✅ AI(Black) 턴 함수
 def ai_move(state: dict) -> dict:
     """AI(Black)의 움직임을 수행"""
     st.write("🔹 AI Move - 현재 state:", state)  
 
-    game_board = chess.Board(state["fen"])  # ✅ `board` 대신 `game_board` 사용하여 충돌 방지
-    legal_moves = list(game_board.legal_moves)
-
-    if legal_moves:
-        best_move = legal_moves[0].uci()  
-        game_board.push_uci(best_move)
+    game = state["game"]  # ✅ st.session_state.board를 감싼 LiveBoard (FEN을 다시 파싱하지 않음)
+    # ✅ 오프닝 북에 있는 포지션이면 탐색 없이 바로 두고, 아니면 로컬 알파-베타 엔진으로 1초 동안 탐색한 최선 수
+    book_move = OPENING_BOOK.probe(game.board, game_id=st.session_state.game_id)
+    book = OPENING_BOOK.game_stats(st.session_state.game_id)
+    result = None if book_move else st.session_state.engine.search(game.board, time_limit=1.0)
+
+    if book_move:
+        best_move = book_move.uci()
+        game.push_uci(best_move)
+        st.write(f"📚 오프닝 북: {best_move} (이번 게임 적중 {book['hits']}/{book['probes']}, {book['hit_rate']:.0%})")
+    elif result.move:
+        best_move = result.move.uci()
+        game.push_uci(best_move)
+        st.write(f"🔍 엔진 탐색: 깊이 {result.depth}, 평가(흑 기준) {result.score:+d}, {result.nodes:,} 노드 ({result.nps:,.0f} nps)")
     else:
         best_move = None
 
-    st.session_state.board = game_board  # ✅ Streamlit 상태 업데이트
-    st.session_state.chat_history.append(("🤖 AI (Black)", best_move))
+    if best_move:
+        record_move("🤖 AI (Black)", best_move, game.board)
+    else:
+        st.session_state.chat_history.append(("🤖 AI (Black)", best_move))
 
-    board_placeholder.image(render_chessboard(game_board), caption="현재 체스 보드 상태")
+    board_placeholder.image(render_chessboard(game.board), caption="현재 체스 보드 상태")
 
     new_state = {
-        "fen": game_board.fen(),  # ✅ `board` 대신 `fen`만 저장
+        "game": game,
         "current_turn": "user",
-        "is_check": game_board.is_check(),
-        "is_checkmate": game_board.is_checkmate(),
-        "is_stalemate": game_board.is_stalemate(),
         "current_node": "check_status"
     }
     
-    st.write("✅ AI가 움직인 후 state:", new_state)  
+    st.write("✅ AI가 움직인 후 state:", game.status())  
     return new_state
 
 
@@ -116,25 +135,21 @@ def user_move(state: dict) -> dict:
     user_msg = st.text_input("당신의 움직임을 입력하세요 (예: e2e4)")
 
     if user_msg:
-        game_board = chess.Board(state["fen"])  # ✅ `board` 대신 `game_board` 사용
+        game = state["game"]
         
-        if user_msg in [m.uci() for m in game_board.legal_moves]:  
-            game_board.push_uci(user_msg)
-            st.session_state.board = game_board  
-            st.session_state.chat_history.append(("🧑‍💻 사용자 (White)", user_msg))
+        if LEGAL_MOVES.is_legal(game.board, user_msg):  
+            game.push_uci(user_msg)
+            record_move("🧑‍💻 사용자 (White)", user_msg, game.board)
 
-            board_placeholder.image(render_chessboard(game_board), caption="현재 체스 보드 상태")
+            board_placeholder.image(render_chessboard(game.board), caption="현재 체스 보드 상태")
 
             new_state = {
-                "fen": game_board.fen(),
+                "game": game,
                 "current_turn": "AI",
-                "is_check": game_board.is_check(),
-                "is_checkmate": game_board.is_checkmate(),
-                "is_stalemate": game_board.is_stalemate(),
                 "current_node": "check_status"
             }
 
-            st.write("✅ 사용자가 움직인 후 state:", new_state)  
+            st.write("✅ 사용자가 움직인 후 state:", game.status())  
             return new_state
 
         else:
@@ -146,12 +161,15 @@ def user_move(state: dict) -> dict:
 def check_status(state: dict) -> dict:
     st.write("🔹 check state - 현재 state:", state)
     """게임 상태를 확인하고, 항상 `current_node`를 설정"""
-    if state["is_checkmate"]:
+    game = state["game"]  # ✅ 플래그는 마지막 수 이후 처음 물어볼 때만 계산
+    if game.is_checkmate:
         st.success("체크메이트! 게임 종료")
+        GAME_STORE.finish(st.session_state.game_id, game.board.result())
         return {**state, "current_node": "game_over"}
 
-    if state["is_stalemate"]:
+    if game.is_stalemate:
         st.warning("스테일메이트! 게임 종료")
+        GAME_STORE.finish(st.session_state.game_id, "1/2-1/2")
         return {**state, "current_node": "game_over"}
 
     if state["current_turn"] == "AI":
@@ -164,39 +182,47 @@ def game_over(state: dict) -> dict:
     st.info("게임이 종료되었습니다.")
     return {**state, "current_node": "game_over"}
 
-# ✅ LangGraph 그래프 정의
-graph = StateGraph(State)
-graph.add_node("ai_move", ai_move)
-graph.add_node("user_move", user_move)
-graph.add_node("check_status", check_status)
-graph.add_node("game_over", game_over)
-
-graph.add_edge(START, "user_move")
-graph.add_edge("ai_move", "check_status")
-graph.add_edge("user_move", "check_status")
-
-# ✅ 조건부 엣지 추가 
-# 📌 add_conditional_edges(현재 노드, { "다음 노드": 조건 함수 })
-graph.add_conditional_edges(
-    "check_status",  # ✅ 현재 노드
-    {
-        "game_over": lambda state: state["current_node"] == "game_over",
-        "ai_move": lambda state: state["current_node"] == "ai_move",
-        "user_move": lambda state: state["current_node"] == "user_move",
-    }
-)
-graph.add_edge("game_over", END)
+# ✅ LangGraph 그래프 정의 (프로세스당 한 번만 빌드/compile, 노드는 이번 실행의 함수를 호출)
+def build_graph(node):
+    graph = StateGraph(State)
+    graph.add_node("ai_move", node("ai_move"))
+    graph.add_node("user_move", node("user_move"))
+    graph.add_node("check_status", node("check_status"))
+    graph.add_node("game_over", node("game_over"))
+
+    graph.add_edge(START, "user_move")
+    graph.add_edge("ai_move", "check_status")
+    graph.add_edge("user_move", "check_status")
+
+    # ✅ 조건부 엣지 추가 
+    # 📌 add_conditional_edges(현재 노드, 다음 노드 이름을 반환하는 함수, { 반환값: 다음 노드 })
+    # (조건 함수 dict를 두 번째 인자로 넘기면 분기 결과가 노드 이름이 아니라서 KeyError가 나고 ai_move까지 가지 못했음)
+    # 사용자 차례면 이번 실행을 끝내고 다음 rerun의 입력을 기다림 (START → user_move)
+    graph.add_conditional_edges(
+        "check_status",  # ✅ 현재 노드
+        lambda state: state["current_node"],
+        {
+            "game_over": "game_over",
+            "ai_move": "ai_move",
+            "user_move": END,
+        }
+    )
+    graph.add_edge("game_over", END)
+    return graph
 
 # ✅ LangGraph 실행
-app = graph.compile()
+app = get_graph("My_chess_page", build_graph, nodes={
+    "ai_move": ai_move,
+    "user_move": user_move,
+    "check_status": check_status,
+    "game_over": game_over,
+})
 
 # ✅ 초기 상태 가져오기
 def initialize_state():
     return {
-        "fen": st.session_state.board.fen(),
+        "game": LiveBoard(st.session_state.board),  # ✅ 세션 보드를 그대로 감쌈 (복사/FEN 파싱 없음)
         "current_turn": "user",
-        "is_checkmate": st.session_state.board.is_checkmate(),
-        "is_stalemate": st.session_state.board.is_stalemate(),
         "current_node": "user_move"
     }
 
@@ -204,7 +230,8 @@ def initialize_state():
 state = initialize_state()  # ✅ 초기 상태 설정
 
 # ✅ `stream()`을 사용하여 LangGraph가 상태 변화에 따라 자동 실행
-for updated_state in app.stream(state):
+# (stream_mode="values": 노드마다 {노드 이름: 변경분}이 아니라 전체 state를 받아야 current_node를 확인할 수 있음)
+for updated_state in app.stream(state, stream_mode="values"):
     st.write("🔄 LangGraph 진행 중 - updated_state:", updated_state)  # ✅ 현재 상태 출력
 
     if "current_node" not in updated_state:
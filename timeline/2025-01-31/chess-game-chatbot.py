@@ -4,6 +4,14 @@ import chess.svg
 from langgraph.graph import StateGraph
 from langchain_openai import ChatOpenAI
 import openai
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.chess_cache import LEGAL_MOVES
+from common.chessboard_component import render_board
+from common.opening_book import OPENING_BOOK
+from common.bitboard_eval import summarize_position
+from common.registry import get_graph, get_llm
 
 # 🔥 Streamlit 페이지 설정
 st.set_page_config(layout="wide")
@@ -25,9 +33,8 @@ class ChatState(dict):
     user_input: str
     ai_response: str
     fen: str
-
-# 🔥 LangGraph 초기화
-workflow = StateGraph(state_schema=ChatState)
+    start_fen: str
+    moves: list
 
 def chess_ai_node(state: ChatState):
     """체스 FEN 상태를 기반으로 AI 응답 생성"""
@@ -37,16 +44,27 @@ def chess_ai_node(state: ChatState):
         state["ai_response"] = "🚨 API 키가 필요합니다. 좌측 사이드바에서 입력해주세요!"
         return state
 
-    # ✅ OpenAI 모델 인스턴스 생성 (실행 시 동적으로 API 키 사용)
-    gpt4o_mini = ChatOpenAI(
+    # ✅ OpenAI 모델 인스턴스 (API 키별로 프로세스당 한 번 생성해서 재사용, HTTP 연결 풀도 키별로 공유, common/registry.py)
+    gpt4o_mini = get_llm(
+        ChatOpenAI,
         model_name="gpt-4o",
         max_tokens=200,
         temperature=0.7,
         api_key=st.session_state["api_key"]
     )
 
-    board = chess.Board(state["fen"])
-    valid_moves = [board.san(move) for move in board.legal_moves]
+    # ✅ 시작 포지션 + 지금까지의 수로 보드를 복원 (게임 흐름 요약에 수순이 필요, 없으면 FEN만 사용)
+    if state.get("moves"):
+        board = chess.Board(state["start_fen"])
+        for uci in state["moves"]:
+            board.push_uci(uci)
+    else:
+        board = chess.Board(state["fen"])
+    valid_moves = LEGAL_MOVES.san(board)  # ✅ 포지션별 캐시 (common/chess_cache.py)
+    # ✅ 오프닝 북에 있는 포지션이면 북의 수(가중치 순)를 추천 근거로 함께 전달
+    book_moves = [f"{board.san(move)}({weight})" for move, weight in OPENING_BOOK.moves(board)]
+    # ✅ 현재 포지션 + 게임 전체 포지션을 NumPy 비트보드로 한 번에 평가한 요약, 후보 수는 엔진 정지 탐색 (common/bitboard_eval.py)
+    analysis = summarize_position(board)
 
     # ✅ 자유로운 대화를 할 수 있도록 프롬프트 개선
     prompt = f"""
@@ -56,6 +74,11 @@ def chess_ai_node(state: ChatState):
     가능한 다음 수:
     {', '.join(valid_moves)}
 
+    오프닝 북 수 (괄호 안은 가중치, 없으면 북을 벗어난 포지션):
+    {', '.join(book_moves) or '없음'}
+
+    {analysis}
+
     사용자의 질문: {state["user_input"]}
 
     당신은 체스 전문가이자 코치입니다. 
@@ -63,6 +86,7 @@ def chess_ai_node(state: ChatState):
     - 사용자가 요청하면 추천 수를 제공하세요.
     - 전략적 조언도 가능합니다.
     - 포지션을 분석하고 사용자가 원하는 정보를 제공하세요.
+    - 기물/기동력/킹 안전/폰 구조는 FEN에서 직접 계산하지 말고 위의 포지션 요약을 근거로 설명하세요.
     """
 
     # 🔥 GPT 모델 호출
@@ -70,9 +94,14 @@ def chess_ai_node(state: ChatState):
 
     return {"ai_response": response}
 
-workflow.add_node("chess_ai", chess_ai_node)
-workflow.set_entry_point("chess_ai")
-app = workflow.compile()
+# 🔥 LangGraph 초기화 (프로세스당 한 번만 빌드/compile, 노드는 이번 실행의 함수를 호출)
+def build_workflow(node):
+    workflow = StateGraph(state_schema=ChatState)
+    workflow.add_node("chess_ai", node("chess_ai"))
+    workflow.set_entry_point("chess_ai")
+    return workflow
+
+app = get_graph("chess-game-chatbot", build_workflow, nodes={"chess_ai": chess_ai_node})
 
 # 🔥 UI 레이아웃 설정
 col1, col2 = st.columns([1.5, 1])  # 왼쪽 체스판, 오른쪽 챗봇
@@ -82,13 +111,11 @@ with col1:
     st.markdown("### 체스 보드")
     board_placeholder = st.empty()  # 체스 보드가 표시될 자리
 
-    # 🔥 체스 보드 업데이트 함수
+    # 🔥 체스 보드 업데이트 함수 (FEN + 마지막 수만 보내고 브라우저에서 그림, common/chessboard_component.py)
+    # 입력을 처리한 뒤 실행마다 한 번, 같은 key로만 그려야 iframe이 유지되어 마지막 수가 애니메이션으로 보임
     def update_board():
-        svg = chess.svg.board(board=st.session_state.board, size=350)
-        board_placeholder.markdown(f'<div style="width: 350px; height: 350px;">{svg}</div>', unsafe_allow_html=True)
-
-    # 초기 보드 표시
-    update_board()
+        with board_placeholder:
+            render_board(st.session_state.board, size=350, key="board")
 
     # 사용자 입력 (SAN 또는 UCI 형식 지원)
     move_input = st.text_input("체스 수 입력 (예: e4, Nf3, e2e4):")
@@ -104,15 +131,17 @@ with col1:
                 move = chess.Move.from_uci(move_input)  # 사용자가 UCI 형식을 입력한 경우
 
             # 🔥 변환된 move를 체스 보드에 적용
-            if move in board.legal_moves:
+            if LEGAL_MOVES.is_legal(board, move):
                 board.push(move)
-                update_board()
             else:
                 st.error("🚨 잘못된 수입니다. 다시 입력하세요.")
         
         except Exception as e:
             st.error(f"🚨 오류 발생: {e}")
 
+    # 보드 표시 (이번 입력을 반영한 뒤 한 번만)
+    update_board()
+
 # 🔹 오른쪽: 체스 챗봇 UI
 with col2:
     st.markdown("### 체스 챗봇")
@@ -126,7 +155,9 @@ with col2:
         # LangGraph를 사용하여 AI 응답 생성
         state = {
             "user_input": user_input,
-            "fen": st.session_state.board.fen()  # 현재 체스 보드의 FEN 상태
+            "fen": st.session_state.board.fen(),  # 현재 체스 보드의 FEN 상태
+            "start_fen": st.session_state.board.root().fen(),
+            "moves": [move.uci() for move in st.session_state.board.move_stack],
         }
         result = app.invoke(state)
 
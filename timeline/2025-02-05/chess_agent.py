@@ -2,6 +2,16 @@ import streamlit as st
 import chess
 import chess.svg
 import json
+import os
+import sys
+import uuid
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.chess_cache import LEGAL_MOVES
+from common.chessboard_component import render_board
+from common.game_db import format_stats, get_game_db
+from common.game_store import GAME_STORE
+from common.move_parser import COMMAND_PARSER, command_reply, extract_fen
+from common.registry import get_llm
 from langchain_openai import ChatOpenAI
 import openai
 
@@ -13,15 +23,21 @@ api_key = st.sidebar.text_input("OpenAI API Key를 입력하세요:", type="pass
 if api_key:
     st.session_state["api_key"] = api_key
 
-# 🔥 체스 보드와 채팅 기록 초기화
+# 🔥 체스 보드와 채팅 기록 초기화 (common/game_store.py에 저장, URL의 ?game=<id>로 새로고침/재시작 후에도 이어감)
 if "board" not in st.session_state:
-    st.session_state.board = chess.Board()
+    st.session_state.game_id, st.session_state.board = GAME_STORE.resume(st.query_params.get("game"), app="chess_agent")
+    st.query_params["game"] = st.session_state.game_id
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex  # 파서 통계를 세션별로 집계
 if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+    # 화면에는 최신 대화가 위로 오도록 (사용자 → 에이전트) 쌍 단위로 저장 순서의 역순
+    lines = [f"{role}: {text}" for role, text in GAME_STORE.messages(st.session_state.game_id)]
+    st.session_state.chat_history = [line for start in reversed(range(0, len(lines), 2)) for line in lines[start:start + 2]]
 
-# 🔥 LLM 에이전트 초기화 (API 키 필요)
+# 🔥 LLM 에이전트 초기화 (API 키 필요, 같은 키면 프로세스당 한 번 생성해서 재사용)
 if "api_key" in st.session_state and st.session_state["api_key"]:
-    llm_agent = ChatOpenAI(
+    llm_agent = get_llm(
+        ChatOpenAI,
         model_name="gpt-4o",
         max_tokens=200,
         temperature=0.7,
@@ -40,7 +56,7 @@ def board_state_tool(board: chess.Board):
 
 def legal_moves_tool(board: chess.Board):
     """현재 보드에서 가능한 모든 합법 수(SAN 형식)를 반환합니다."""
-    moves = [board.san(move) for move in board.legal_moves]
+    moves = LEGAL_MOVES.san(board)  # ✅ 같은 포지션이면 캐시된 SAN 목록 재사용
     return f"합법 수: {', '.join(moves)}"
 
 def move_execution_tool(move_str: str, board: chess.Board):
@@ -50,8 +66,9 @@ def move_execution_tool(move_str: str, board: chess.Board):
             move = board.parse_san(move_str)
         except Exception:
             move = chess.Move.from_uci(move_str)
-        if move in board.legal_moves:
+        if LEGAL_MOVES.is_legal(board, move):
             board.push(move)
+            GAME_STORE.append(st.session_state.game_id, move, board)
             return f"수 '{move_str}' 이동을 성공적으로 수행함. 새로운 FEN: {board.fen()}"
         else:
             return f"'{move_str}'은(는) 합법 수가 아님."
@@ -70,18 +87,38 @@ def piece_info_tool(square: str, board: chess.Board):
     except Exception as e:
         return f"기물 정보 확인 중 오류 발생: {e}"
 
-def search_chess_knowledge_tool(query: str):
+def search_chess_knowledge_tool(query: str, board: chess.Board):
     """
-    외부 체스 지식 베이스(예: 게임 데이터베이스, 전략 정보)를 검색합니다.
-    (여기서는 시뮬레이션 결과를 반환합니다.)
+    로컬 PGN 게임 데이터베이스(common/game_db.py)를 검색합니다.
+    질문에 FEN이 있으면 그 포지션, 없으면 현재 보드 포지션에 도달한 게임의 결과와 다음 수 통계를 반환하고,
+    선수/대회 이름과 일치하는 게임도 함께 보여줍니다.
     """
-    return f"'{query}'에 대한 체스 지식 검색 결과: (시뮬레이션 결과)"
+    try:
+        db = get_game_db()
+        fen = extract_fen(query)
+        position = chess.Board(fen) if fen else board
+        lines = [format_stats(db.position_stats(position))]
+        for word in (query.replace(fen, " ") if fen else query).split():
+            if len(word) < 3:
+                continue
+            matches = db.search_players(word)
+            if matches:
+                lines.append(f"'{word}' 관련 게임:")
+                for _, white, black, event, date, result in matches:
+                    score = {1: "1-0", 0: "1/2-1/2", -1: "0-1"}.get(result, "*")
+                    lines.append(f"- {white} vs {black} ({event}, {date}) {score}")
+        return "\n".join(lines)
+    except Exception as e:
+        return f"체스 지식 검색 중 오류 발생: {e}"
 
 def set_board_state_tool(fen_str: str, board: chess.Board):
     """주어진 FEN 정보를 사용하여 보드 상태를 업데이트합니다."""
     try:
         new_board = chess.Board(fen_str)
         st.session_state.board = new_board
+        # 새 포지션에서 시작하는 게임으로 저장
+        st.session_state.game_id = GAME_STORE.create(start_fen=new_board.fen(), app="chess_agent")
+        st.query_params["game"] = st.session_state.game_id
         return f"보드 상태를 업데이트함. 새로운 FEN: {new_board.fen()}"
     except Exception as e:
         return f"보드 상태 업데이트 중 오류 발생: {e}"
@@ -110,7 +147,8 @@ def agent_decision(user_query: str, board: chess.Board):
     만약 도구 호출이 필요 없으면, {"tool": "None", "args": {}}라고 응답해.
     
     추가사항:
-    - 사용자가 FEN 정보를 포함한 입력이면 SetBoardStateTool을 사용.
+    - 사용자가 FEN만 입력하거나 그 FEN으로 보드를 바꿔 달라고 하면 SetBoardStateTool을 사용.
+      FEN 포지션에 대해 묻는 질문이면 보드를 바꾸지 않고 SearchChessKnowledgeTool을 사용.
     - "수행해줘","이동해줘" 등의 문구가 포함되어 있으면 반드시 이동 실행(MoveExecutionTool)을 호출하고,
       그 결과를 반영하도록 해.
     - 자연어 이동 지시가 들어오면 이를 유효한 체스 이동 형식으로 변환해서 MoveExecutionTool을 호출해.
@@ -120,7 +158,7 @@ BoardStateTool: 현재 보드의 FEN 상태를 반환.
 LegalMovesTool: 현재 보드에서 가능한 합법 수(SAN 형식)를 반환.
 MoveExecutionTool: SAN 또는 UCI 형식의 이동 명령을 실행하여 보드를 업데이트.
 PieceInfoTool: 특정 칸(예: 'e4')에 있는 기물 정보를 반환.
-SearchChessKnowledgeTool: 외부 체스 지식 베이스를 검색하여 전략이나 역사적 게임 정보를 제공.
+SearchChessKnowledgeTool: 로컬 게임 데이터베이스에서 현재(또는 질문의 FEN) 포지션의 실전 결과/다음 수 통계와 선수/대회별 게임을 검색.
 SetBoardStateTool: 주어진 FEN 정보를 사용하여 보드 상태를 업데이트.
     """
     prompt = f"""
@@ -136,7 +174,7 @@ SetBoardStateTool: 주어진 FEN 정보를 사용하여 보드 상태를 업데
 {{"tool": "MoveExecutionTool", "args": {{"move": "e2e4"}}}}
 만약 도구 호출이 필요 없으면, {{"tool": "None", "args": {{}}}}라고 응답해.
 단, 모든 응답은 한국어로 작성하고, 사용자의 말투(반말/존댓말)를 따라해.
-또한, 만약 입력에 FEN 정보가 포함되어 있다면 SetBoardStateTool을 사용하고,
+또한, 입력이 FEN만 있거나 그 FEN으로 보드를 바꿔 달라는 요청이면 SetBoardStateTool을 사용하고, FEN 포지션에 대한 질문이면 보드를 바꾸지 말고 SearchChessKnowledgeTool을 사용해.
 "수행","이동" 이라는 문구가 있거나 SAN형식의 이동이 입력으로 들어오면 반드시 이동 실행을 포함하여 MoveExecutionTool을 호출해서 이동된 보드를 반환해줘.
     """
     response = llm_agent.invoke(prompt)
@@ -169,13 +207,40 @@ def agent_final_response(user_query: str, tool_results: dict, board: chess.Board
     final_response = llm_agent.invoke(prompt)
     return final_response.content
 
+def run_tool(selected_tool: str, args: dict, board: chess.Board, user_query: str):
+    """선택된 도구를 실행하고 (결과, 도구 실행 후의 보드)를 반환합니다."""
+    if selected_tool == "MoveExecutionTool":
+        move_arg = args.get("move", "")
+        # 실제 이동을 실행하여 보드를 업데이트함
+        result = tools[selected_tool](move_arg, board)
+    elif selected_tool == "PieceInfoTool":
+        square_arg = args.get("square", "")
+        result = tools[selected_tool](square_arg, board)
+    elif selected_tool == "SearchChessKnowledgeTool":
+        query_arg = user_query if extract_fen(user_query) else args.get("query", user_query)  # 질문에 있던 FEN이 빠지지 않도록 원문 사용
+        result = tools[selected_tool](query_arg, board)
+    elif selected_tool == "SetBoardStateTool":
+        fen_arg = args.get("fen", "")
+        result = tools[selected_tool](fen_arg, board)
+        board = st.session_state.board  # 업데이트된 보드 반영
+    else:
+        # BoardStateTool 또는 LegalMovesTool 등
+        result = tools[selected_tool](board)
+    return result, board
+
 def agent_process(user_query: str, board: chess.Board):
     """
     전체 에이전트 파이프라인:
+      0. "e4", "Nf3", "e2e4", "e4에 뭐 있어?", FEN 등 명확한 입력은 LLM 없이 바로 도구 실행 + 템플릿 답변 (common/move_parser.py)
       1. 사용자 입력을 분석하여 호출할 도구 결정 (agent_decision)
       2. 선택한 도구를 실행하고 결과를 수집
       3. 도구 결과와 보드 상태를 바탕으로 최종 답변 생성 (agent_final_response)
     """
+    command = COMMAND_PARSER.parse(user_query, board, session=st.session_state.session_id)
+    if command:
+        result, board = run_tool(command.tool, command.args, board, user_query)
+        return command_reply(user_query, command, result)
+
     if llm_agent is None:
         return "API 키가 필요합니다. 사이드바에 입력하세요."
     
@@ -185,28 +250,8 @@ def agent_process(user_query: str, board: chess.Board):
     args = decision.get("args", {})
     
     if selected_tool != "None" and selected_tool in tools:
-        if selected_tool == "MoveExecutionTool":
-            move_arg = args.get("move", "")
-            # 실제 이동을 실행하여 보드를 업데이트함
-            result = tools[selected_tool](move_arg, board)
-            tool_results[selected_tool] = result
-        elif selected_tool == "PieceInfoTool":
-            square_arg = args.get("square", "")
-            result = tools[selected_tool](square_arg, board)
-            tool_results[selected_tool] = result
-        elif selected_tool == "SearchChessKnowledgeTool":
-            query_arg = args.get("query", user_query)
-            result = tools[selected_tool](query_arg)
-            tool_results[selected_tool] = result
-        elif selected_tool == "SetBoardStateTool":
-            fen_arg = args.get("fen", "")
-            result = tools[selected_tool](fen_arg, board)
-            tool_results[selected_tool] = result
-            board = st.session_state.board  # 업데이트된 보드 반영
-        else:
-            # BoardStateTool 또는 LegalMovesTool 등
-            result = tools[selected_tool](board)
-            tool_results[selected_tool] = result
+        result, board = run_tool(selected_tool, args, board, user_query)
+        tool_results[selected_tool] = result
     else:
         tool_results["None"] = "도구 호출이 필요하지 않음."
     
@@ -224,14 +269,18 @@ with col1:
     st.markdown("### 체스 보드")
     board_placeholder = st.empty()
 
+    # ✅ SVG 전체 대신 FEN + 마지막 수만 보내고 브라우저에서 그림 (common/chessboard_component.py)
+    # 입력을 처리한 뒤 실행마다 한 번, 같은 key로만 그려야 iframe이 유지되어 마지막 수가 애니메이션으로 보임
     def update_board():
-        svg = chess.svg.board(board=st.session_state.board, size=350)
-        board_placeholder.markdown(
-            f'<div style="width: 350px; height: 350px;">{svg}</div>',
-            unsafe_allow_html=True
-        )
+        with board_placeholder:
+            render_board(st.session_state.board, size=350, key="board")
 
-    update_board()
+# --- 채팅 기록: 화면(최신이 위)과 게임 저장소에 함께 기록 ---
+def record_chat(user_input: str, response: str):
+    pair = [("👤 사용자", user_input), ("🤖 에이전트", response)]
+    st.session_state.chat_history[:0] = [f"{role}: {text}" for role, text in pair]  # 사용자 → 에이전트 순서 그대로 맨 위에
+    for role, text in pair:
+        GAME_STORE.add_message(st.session_state.game_id, role, text)
 
 # --- 오른쪽: 통합 자연어 인터페이스 (에이전트) ---
 with col2:
@@ -245,15 +294,19 @@ with col2:
         if user_input.strip().upper().startswith("FEN:"):
             fen_str = user_input.strip()[4:].strip()  # "FEN:" 제거 후 FEN 문자열 추출
             result = set_board_state_tool(fen_str, st.session_state.board)
-            st.session_state.chat_history.insert(0, f"🤖 에이전트: {result}")
-            st.session_state.chat_history.insert(0, f"👤 사용자: {user_input}")
-            update_board()
+            record_chat(user_input, result)
         else:
             response = agent_process(user_input, st.session_state.board)
-            st.session_state.chat_history.insert(0, f"🤖 에이전트: {response}")
-            st.session_state.chat_history.insert(0, f"👤 사용자: {user_input}")
-            update_board()
+            record_chat(user_input, response)
+
+    parser_stats = COMMAND_PARSER.stats(session=st.session_state.session_id)
+    process_stats = COMMAND_PARSER.stats()
+    st.caption(f"⚡ 이번 세션에서 LLM 없이 처리한 턴: {parser_stats['fast_turns']}/{parser_stats['turns']} ({parser_stats['fast_ratio']:.0%}), 절약한 LLM 호출 {parser_stats['avoided_llm_calls']}회 "
+               f"(서버 프로세스 전체: {process_stats['fast_turns']}/{process_stats['turns']})")
 
     st.markdown("### 채팅 기록")
     for msg in st.session_state.chat_history:
         st.write(msg)
+
+# --- 보드 표시: 이번 실행의 입력을 반영한 뒤 한 번만 ---
+update_board()
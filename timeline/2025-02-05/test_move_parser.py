@@ -0,0 +1,83 @@
+'''
+
+chess_agent 앞단 파서(common/move_parser.py) 회귀 테스트
+명확한 수/명령만 LLM 없이 도구로 바로 가고, 나머지는 None(→ LLM 경로)이어야 함
+
+실행: python -m pytest timeline/2025-02-05/test_move_parser.py
+
+'''
+
+import os
+import sys
+
+import chess
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.move_parser import CommandParser, parse_command
+
+
+# ✅ 수로 실행되어야 하는 입력
+@pytest.mark.parametrize("text, move", [
+    ("e4", "e4"),
+    ("Nf3", "Nf3"),
+    ("e2e4", "e2e4"),
+    ("e4 둬", "e4"),
+    ("e4 둬요", "e4"),
+    ("e4 해줘", "e4"),
+    ("e4 해 줘", "e4"),
+    ("e4 둘게요", "e4"),
+    ("Nf3로 이동해줘", "Nf3"),
+    ("e4 수행해주세요", "e4"),
+    ("Nf3 play", "Nf3"),
+    ("e2에서 e4로", "e2e4"),
+    ("e2에서 e4로 이동해줘", "e2e4"),
+    ("g1에서 f3으로 옮겨 줘", "g1f3"),
+    ("0-0", "O-O"),
+])
+def test_moves(text, move):
+    command = parse_command(text, chess.Board())
+    assert command is not None
+    assert command.tool == "MoveExecutionTool"
+    assert command.args == {"move": move}
+
+
+# ✅ 수처럼 보여도 LLM으로 넘겨야 하는 입력 (동사가 정해진 어미와 정확히 같지 않음, 질문)
+@pytest.mark.parametrize("text", [
+    "e4 해석해줘",
+    "e4 해설",
+    "e4 두고 싶은데",
+    "e4 해보면 어때",
+    "e2에서 e4로 두면 안돼",
+    "e2에서 e4로 해석해줘",
+    "e4?",
+    "e4 두면 좋을까?",
+    "왜 e4가 좋은 수야?",
+    "e4 칸이 왜 중요해?",
+    "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1 포지션에서 뭐가 좋아?",
+])
+def test_falls_back_to_llm(text):
+    assert parse_command(text, chess.Board()) is None
+
+
+@pytest.mark.parametrize("text, tool, args", [
+    ("e4에 뭐 있어?", "PieceInfoTool", {"square": "e4"}),
+    ("what's on E2?", "PieceInfoTool", {"square": "e2"}),
+    ("가능한 수 알려줘", "LegalMovesTool", {}),
+    ("보드 상태 보여줘", "BoardStateTool", {}),
+    ("fen: 8/8/8/8/8/8/8/K6k w - - 0 1", "SetBoardStateTool", {"fen": "8/8/8/8/8/8/8/K6k w - - 0 1"}),
+])
+def test_commands(text, tool, args):
+    command = parse_command(text, chess.Board())
+    assert (command.tool, command.args) == (tool, args)
+
+
+def test_stats_per_session():
+    parser = CommandParser(log_path=None)
+    board = chess.Board()
+    parser.parse("e4", board, session="a")
+    parser.parse("e4 해석해줘", board, session="a")
+    parser.parse("e4", board, session="b")
+
+    assert parser.stats("a") == {"turns": 2, "fast_turns": 1, "fast_ratio": 0.5, "avoided_llm_calls": 2}
+    assert parser.stats()["turns"] == 3
@@ -4,11 +4,23 @@ from dotenv import load_dotenv
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
-from langgraph.graph import StateGraph
+from langgraph.graph import StateGraph, END
 from langchain.chat_models import ChatOpenAI
 from langchain.schema import HumanMessage
 from pydantic import BaseModel
 
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.tracing import Tracer
+from common.intent_classifier import NONE_LABEL, load_default_classifier
+
+# 디버깅용 state 출력 여부 (DEBUG_STATE=1 일 때만 출력)
+DEBUG_STATE = os.getenv("DEBUG_STATE") == "1"
+
+# 노드 트레이서 (TRACE_SAMPLE_RATE로 샘플링 비율 조절, 종료 시 traces/ 폴더에 저장)
+tracer = Tracer(sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1.0")))
+tracer.export_on_exit("traces", prefix="graph_structure")
+
 # 1️. 상태 정의
 class TaskState(BaseModel):
     user_input: str = ""
@@ -19,29 +31,45 @@ class TaskState(BaseModel):
 # 2️. LLM 설정
 llm = ChatOpenAI(model="gpt-4", openai_api_key=openai_api_key)
 
+# 태스크 분류기 (intent_log.jsonl에 쌓인 LLM 판정까지 학습해서 시작)
+intent_classifier = load_default_classifier(log_path="intent_log.jsonl")
+
 # 3️. 그래프 생성
 graph = StateGraph(TaskState)
 
 # 4️. 디버깅용 출력 함수
 def print_state(node_name, state: TaskState):
+    if not DEBUG_STATE:  # state 덤프/출력 자체도 비용이므로 디버깅할 때만 실행
+        return
     print(f"🟢 현재 실행 중인 노드: {node_name}")
     print(f"🔹 State: {state.model_dump()}\n")
 
 # 5️. 사용자 입력 노드
 def get_user_input(state: TaskState):
-    print_state("get_user_input", state)
     user_input = input("사용자 입력: ")  # 실제 응용에서는 UI에서 받을 수 있음
-    return {"user_input": user_input}
+    # 입력을 기다린 시간은 span에서 빼고, 입력을 받은 뒤부터 기록
+    with tracer.span("get_user_input", cat="node"):
+        print_state("get_user_input", state)
+        return {"user_input": user_input}
 
 # 6️. LLM을 통해 입력을 파싱하는 노드
-def parse_task(state: TaskState):
+def parse_task(state: TaskState, config):
     print_state("parse_task", state)
+    # 로컬 분류기(키워드 규칙 + n-gram 모델)로 먼저 판단하고, 확신도가 낮을 때만 LLM 호출
+    prediction = intent_classifier.predict(state.user_input)
+    if intent_classifier.is_confident(prediction):
+        if prediction.label == NONE_LABEL:  # 태스크가 아닌 입력(인사, 잡담 등)은 LLM 없이 에러 처리
+            return {"error": "올바른 태스크를 찾을 수 없습니다. 다시 입력하세요.", "parsed_task": ""}
+        return {"parsed_task": prediction.label, "error": ""}
+
     prompt = f"다음 입력에서 수행할 태스크를 하나의 단어로 지정하세요 (번역, 요약, 분석 중 하나): {state.user_input}"
-    response = llm([HumanMessage(content=prompt)]).content.strip().lower()
+    response = llm.invoke([HumanMessage(content=prompt)], config=config).content.strip().lower()
     
     if response not in ["번역", "요약", "분석"]:
+        intent_classifier.log(state.user_input, NONE_LABEL)  # 태스크가 아닌 입력도 "기타"로 학습
         return {"error": "올바른 태스크를 찾을 수 없습니다. 다시 입력하세요.", "parsed_task": ""}
-    
+
+    intent_classifier.log(state.user_input, response)  # LLM이 정한 라벨은 다음 학습 데이터로 사용
     return {"parsed_task": response, "error": ""}
 
 # 7️. Task 수행 노드 정의
@@ -72,20 +100,20 @@ def task_selector(state: TaskState):
         "분석": "analyze"
     }.get(state.parsed_task, "error_handler")
 
-# 10. 루프 구조: 작업 수행 후 다시 사용자 입력 받기
-graph.add_node("get_user_input", get_user_input)
-graph.add_node("parse_task", parse_task)
-graph.add_node("translate", translate_task)
-graph.add_node("summarize", summarize_task)
-graph.add_node("analyze", analyze_task)
-graph.add_node("error_handler", handle_error)
+# 10. 루프 구조: 작업 수행 후 END로 끝내고, 아래 while 루프에서 다시 사용자 입력 받기
+graph.add_node("get_user_input", get_user_input)  # span은 노드 안에서 입력을 받은 뒤 시작
+graph.add_node("parse_task", tracer.wrap_node("parse_task", parse_task))
+graph.add_node("translate", tracer.wrap_node("translate", translate_task))
+graph.add_node("summarize", tracer.wrap_node("summarize", summarize_task))
+graph.add_node("analyze", tracer.wrap_node("analyze", analyze_task))
+graph.add_node("error_handler", tracer.wrap_node("error_handler", handle_error))
 
 graph.add_edge("get_user_input", "parse_task")
 graph.add_conditional_edges("parse_task", task_selector)
-graph.add_edge("translate", "get_user_input")
-graph.add_edge("summarize", "get_user_input")
-graph.add_edge("analyze", "get_user_input")
-graph.add_edge("error_handler", "get_user_input")
+graph.add_edge("translate", END)
+graph.add_edge("summarize", END)
+graph.add_edge("analyze", END)
+graph.add_edge("error_handler", END)
 
 # 1️1. 시작 및 종료 지점 설정
 graph.set_entry_point("get_user_input")
@@ -94,5 +122,7 @@ graph.set_entry_point("get_user_input")
 app = graph.compile()
 state = TaskState()
 while True:
-    state = app.invoke(state)
-    print(f"실행 결과: {state.task_result}\n")
+    # 입력 하나 = invoke 한 번 = 턴 하나 (그래프 안에서 get_user_input으로 되돌아가면 세션 전체가 한 턴이 됨)
+    with tracer.turn():  # 턴 단위로 한 번만 샘플링 (trace가 노드별로 끊기지 않음)
+        state = app.invoke(state, config={"callbacks": [tracer.callback_handler()]})
+    print(f"실행 결과: {state.get('task_result', '')}\n")  # invoke는 dict를 반환
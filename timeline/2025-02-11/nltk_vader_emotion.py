@@ -9,26 +9,32 @@ openai_api_key = os.getenv("OPENAI_API_KEY")
 ##----------------------------------------------------
 
 
-import nltk
-from deep_translator import GoogleTranslator
-from nltk.sentiment import SentimentIntensityAnalyzer
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.translation import get_translation_service
+from common.sentiment_batch import score_texts, sentiment_label
+from common.vader import LazySentimentAnalyzer
+from common.korean_sentiment import is_korean, load_default_analyzer as load_korean_analyzer
 import openai
 
-# 1️⃣ NLTK VADER 감정 분석기 다운로드 (최초 1회 실행 필요)
-nltk.download('vader_lexicon')
-
 # 2️⃣ 감정 분석기 초기화
-sia = SentimentIntensityAnalyzer()
+sia = LazySentimentAnalyzer()  # 동봉된 어휘 사전(common/data)을 첫 분석 때 로드 (nltk.download 불필요)
+korean_sia = load_korean_analyzer()  # 한국어 극성 사전 기반 분석기 (번역 불필요)
+
+# 3️⃣ 번역 서비스 (번역기 재사용 + translation_cache.sqlite3 영구 캐시)
+translation_service = get_translation_service()
 
 # 4️⃣ 감정 분석 함수 (NLTK + OpenAI GPT 사용)
 def analyze_sentiment(text: str) -> str:
-    """한국어 텍스트를 영어로 번역한 후 감정 분석을 수행하는 함수"""
+    """텍스트의 감정 분석을 수행하는 함수 (한국어는 번역 없이 한국어 사전으로, 그 외는 영어로 번역 후 VADER로 분석)"""
     try:
-        # 1️⃣ 한국어 → 영어 번역
-        translated_text = GoogleTranslator(source='auto', target='en').translate(text)
-
-        # 2️⃣ NLTK VADER 감정 분석 수행
-        sentiment_scores = sia.polarity_scores(translated_text)
+        if is_korean(text):
+            # 1️⃣ 한국어 → 번역 요청 없이 로컬 한국어 감정 사전으로 분석
+            sentiment_scores = korean_sia.polarity_scores(text)
+        else:
+            # 2️⃣ 그 외 언어 → 영어로 번역 후 NLTK VADER 감정 분석 수행
+            translated_text = translation_service.translate(text, target='en')
+            sentiment_scores = sia.polarity_scores(translated_text)
         compound_score = sentiment_scores["compound"]
 
         # 3️⃣ 감정 분석 결과 결정
@@ -44,6 +50,13 @@ def analyze_sentiment(text: str) -> str:
     except Exception as e:
         return f"❌ 감정 분석 오류: {str(e)}"
 
+# 4️⃣-2 배치 감정 분석 (대화 로그 등 많은 문장을 프로세스 풀로 한 번에 분석)
+def analyze_sentiment_batch(texts, processes=None):
+    """한국어가 아닌 문장만 한 번에 번역(배치 + 캐시)하고 워커 프로세스들에서 점수를 계산 (한국어는 한국어 사전으로 분석)"""
+    english = iter(translation_service.translate_batch([t for t in texts if not is_korean(t)], target='en'))
+    inputs = [text if is_korean(text) else next(english) for text in texts]
+    return [(sentiment_label(compound), compound) for _, _, _, compound in score_texts(inputs, processes=processes)]
+
 # 5️⃣ 테스트 실행
 if __name__ == "__main__":
     sample_texts = [
@@ -54,7 +67,14 @@ if __name__ == "__main__":
         "그냥 평범한 하루였어."
     ]
     
+    # 한국어가 아닌 문장은 한 번의 요청으로 미리 번역해서 캐시에 저장
+    translation_service.translate_batch([t for t in sample_texts if not is_korean(t)], target='en')
+
     for text in sample_texts:
         print(f"📝 입력 텍스트: {text}")
         print(analyze_sentiment(text))
         print("-" * 50)
+
+    # 배치 모드: 대량의 대화 로그는 `python timeline/common/sentiment_batch.py 대화.json -o sentiment.parquet`
+    for text, (label, compound) in zip(sample_texts, analyze_sentiment_batch(sample_texts)):
+        print(f"📦 {text} → {label} ({compound})")
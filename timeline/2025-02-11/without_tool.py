@@ -4,11 +4,26 @@ from dotenv import load_dotenv
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
-from langgraph.graph import StateGraph
+from langgraph.graph import StateGraph, END
 from langchain.chat_models import ChatOpenAI
 from langchain.schema import HumanMessage
 from pydantic import BaseModel
 
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.tracing import Tracer
+from common.intent_classifier import NONE_LABEL, load_default_classifier
+from common.translation import get_translation_service
+from common.vader import LazySentimentAnalyzer
+from common.korean_sentiment import is_korean, load_default_analyzer as load_korean_analyzer
+
+# 디버깅용 state 출력 여부 (DEBUG_STATE=1 일 때만 출력)
+DEBUG_STATE = os.getenv("DEBUG_STATE") == "1"
+
+# 노드 트레이서 (TRACE_SAMPLE_RATE로 샘플링 비율 조절, 종료 시 traces/ 폴더에 저장)
+tracer = Tracer(sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1.0")))
+tracer.export_on_exit("traces", prefix="without_tool")
+
 # 1️⃣ 상태 정의
 class TaskState(BaseModel):
     user_input: str = ""
@@ -20,55 +35,69 @@ class TaskState(BaseModel):
 # 2️⃣ LLM 설정
 llm = ChatOpenAI(model="gpt-4", openai_api_key=openai_api_key)
 
+# 태스크 분류기 (intent_log.jsonl에 쌓인 LLM 판정까지 학습해서 시작)
+intent_classifier = load_default_classifier(log_path="intent_log.jsonl")
+
 # 3️⃣ 그래프 생성
 graph = StateGraph(TaskState)
 
 # 4️⃣ 디버깅용 출력 함수
 def print_state(node_name, state: TaskState):
+    if not DEBUG_STATE:  # state 덤프/출력 자체도 비용이므로 디버깅할 때만 실행
+        return
     print(f"\n🟢 현재 실행 중인 노드: {node_name}")
     print(f"🔹 State: {state.model_dump()}\n")
 
 # 5️⃣ 사용자 입력 노드
 def get_user_input(state: TaskState):
-    print_state("get_user_input", state)
     user_input = input("사용자 입력: ").strip().lower()
+    # 입력을 기다린 시간은 span에서 빼고, 입력을 받은 뒤부터 기록
+    with tracer.span("get_user_input", cat="node"):
+        print_state("get_user_input", state)
     
-    if user_input in ["그만", "종료", "quit"]:
-        return {"end": True}
+        if user_input in ["그만", "종료", "quit"]:
+            return {"end": True}
     
-    return {"user_input": user_input}
+        return {"user_input": user_input}
 
 # 6️⃣ LLM을 통해 입력을 파싱하는 노드
-def parse_task(state: TaskState):
+def parse_task(state: TaskState, config):
     print_state("parse_task", state)
     if state.end:  # 사용자가 종료 의도를 보였을 경우 종료
         return {"parsed_task": "종료"}
 
+    # 로컬 분류기(키워드 규칙 + n-gram 모델)로 먼저 판단하고, 확신도가 낮을 때만 LLM 호출
+    prediction = intent_classifier.predict(state.user_input)
+    if intent_classifier.is_confident(prediction):
+        if prediction.label == NONE_LABEL:  # 태스크가 아닌 입력(인사, 잡담 등)은 LLM 없이 에러 처리
+            return {"error": "올바른 태스크를 찾을 수 없습니다. 다시 입력하세요.", "parsed_task": ""}
+        return {"parsed_task": prediction.label, "error": ""}
+
     prompt = f"다음 입력에서 수행할 태스크를 하나의 단어로 지정하세요 (번역, 요약, 분석 중 하나): {state.user_input}"
-    response = llm([HumanMessage(content=prompt)]).content.strip().lower()
+    response = llm.invoke([HumanMessage(content=prompt)], config=config).content.strip().lower()
     
     if response not in ["번역", "요약", "분석"]:
+        intent_classifier.log(state.user_input, NONE_LABEL)  # 태스크가 아닌 입력도 "기타"로 학습
         return {"error": "올바른 태스크를 찾을 수 없습니다. 다시 입력하세요.", "parsed_task": ""}
-    
+
+    intent_classifier.log(state.user_input, response)  # LLM이 정한 라벨은 다음 학습 데이터로 사용
     return {"parsed_task": response, "error": ""}
 
 
 import openai
 from googletrans import Translator
 from textblob import TextBlob
-from nltk.sentiment import SentimentIntensityAnalyzer
-import nltk
 
-# nltk.download("vader_lexicon")  # 감정 분석을 위한 데이터셋 다운로드
-sia = SentimentIntensityAnalyzer()
+sia = LazySentimentAnalyzer()  # 동봉된 어휘 사전(common/data)을 첫 분석 때 로드 (nltk.download 불필요)
+korean_sia = load_korean_analyzer()  # 한국어 극성 사전 기반 분석기 (번역 불필요)
+# 번역 서비스 (번역기 재사용 + translation_cache.sqlite3 영구 캐시)
+translation_service = get_translation_service()
 
 # 7️⃣ Task별 Tool 정의
-# 번역 툴 (Google Translate API 사용)
-from deep_translator import GoogleTranslator
-
+# 번역 툴 (Google Translate API 사용, 캐시된 번역은 재사용)
 def translate_tool(text: str, target_lang: str = "en") -> str:
     try:
-        translated_text = GoogleTranslator(source='auto', target=target_lang).translate(text)
+        translated_text = translation_service.translate(text, target=target_lang)
         return f"🔠 번역 결과: {translated_text}"
     except Exception as e:
         return f"❌ 번역 오류: {str(e)}"
@@ -88,13 +117,15 @@ def summarize_tool(text: str) -> str:
 
 # 감정 분석 툴 (VADER Sentiment Analyzer 사용)
 def analyze_tool(text: str) -> str:
-    """한국어 텍스트를 영어로 번역한 후 감정 분석을 수행하는 함수"""
+    """텍스트의 감정 분석을 수행하는 함수 (한국어는 번역 없이 한국어 사전으로, 그 외는 영어로 번역 후 VADER로 분석)"""
     try:
-        # 1️⃣ 한국어 → 영어 번역
-        translated_text = GoogleTranslator(source='auto', target='en').translate(text)
-
-        # 2️⃣ NLTK VADER 감정 분석 수행
-        sentiment_scores = sia.polarity_scores(translated_text)
+        if is_korean(text):
+            # 1️⃣ 한국어 → 번역 요청 없이 로컬 한국어 감정 사전으로 분석
+            sentiment_scores = korean_sia.polarity_scores(text)
+        else:
+            # 2️⃣ 그 외 언어 → 영어로 번역 후 NLTK VADER 감정 분석 수행
+            translated_text = translation_service.translate(text, target='en')
+            sentiment_scores = sia.polarity_scores(translated_text)
         compound_score = sentiment_scores["compound"]
 
         # 3️⃣ 감정 분석 결과 결정
@@ -146,20 +177,20 @@ def task_selector(state: TaskState):
     }.get(state.parsed_task, "error_handler")
 
 # 1️⃣2️⃣ 그래프 구조 설정
-graph.add_node("get_user_input", get_user_input)
-graph.add_node("parse_task", parse_task)
-graph.add_node("translate", translate_task)
-graph.add_node("summarize", summarize_task)
-graph.add_node("analyze", analyze_task)
-graph.add_node("error_handler", handle_error)
-graph.add_node("end_node", end_node)  # 종료 노드 추가
+graph.add_node("get_user_input", get_user_input)  # span은 노드 안에서 입력을 받은 뒤 시작
+graph.add_node("parse_task", tracer.wrap_node("parse_task", parse_task))
+graph.add_node("translate", tracer.wrap_node("translate", translate_task))
+graph.add_node("summarize", tracer.wrap_node("summarize", summarize_task))
+graph.add_node("analyze", tracer.wrap_node("analyze", analyze_task))
+graph.add_node("error_handler", tracer.wrap_node("error_handler", handle_error))
+graph.add_node("end_node", tracer.wrap_node("end_node", end_node))  # 종료 노드 추가
 
 graph.add_edge("get_user_input", "parse_task")
 graph.add_conditional_edges("parse_task", task_selector)
-graph.add_edge("translate", "get_user_input")
-graph.add_edge("summarize", "get_user_input")
-graph.add_edge("analyze", "get_user_input")
-graph.add_edge("error_handler", "get_user_input")
+graph.add_edge("translate", END)
+graph.add_edge("summarize", END)
+graph.add_edge("analyze", END)
+graph.add_edge("error_handler", END)
 
 # 1️⃣3️⃣ 시작 및 종료 지점 설정
 graph.set_entry_point("get_user_input")
@@ -169,7 +200,9 @@ graph.set_finish_point("end_node")  # 종료 노드 설정
 app = graph.compile()
 state = TaskState()
 while True:
-    state = app.invoke(state)  # `state`는 이제 `dict` 형태임
+    # 입력 하나 = invoke 한 번 = 턴 하나 (그래프 안에서 get_user_input으로 되돌아가면 세션 전체가 한 턴이 됨)
+    with tracer.turn():  # 턴 단위로 한 번만 샘플링 (trace가 노드별로 끊기지 않음)
+        state = app.invoke(state, config={"callbacks": [tracer.callback_handler()]})  # `state`는 이제 `dict` 형태임
     print(f"✅ 실행 결과: {state.get('task_result', '')}\n")  # `.get()`을 사용하여 오류 방지
     if state.get("end", False):  # 종료 조건 확인
         break
\ No newline at end of file
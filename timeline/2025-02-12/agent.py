@@ -5,27 +5,37 @@ from langchain_openai import ChatOpenAI
 from langchain.agents import initialize_agent, AgentType
 from langchain.tools import tool
 
-from deep_translator import GoogleTranslator
-from nltk.sentiment import SentimentIntensityAnalyzer
-import nltk
 from langchain_community.tools import DuckDuckGoSearchRun
 from langchain_experimental.tools import PythonREPLTool
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.metrics import MetricsCallbackHandler, start_exporter_from_env
+from common.translation import get_translation_service
+from common.vader import LazySentimentAnalyzer
+from common.korean_sentiment import is_korean, load_default_analyzer as load_korean_analyzer
 
 # 환경 변수 로드
 load_dotenv()
 openai.api_key = os.getenv("OPENAI_API_KEY")
 llm = ChatOpenAI(model="gpt-4o-mini", max_tokens = 150)
 
+# ✅ 툴 메트릭 (호출 수/오류/지연 시간/페이로드 크기) 수집 및 Prometheus 파일 내보내기
+metrics_handler = MetricsCallbackHandler()
+start_exporter_from_env()
+
 # 감정 분석기 초기화
-nltk.download("vader_lexicon")
-sia = SentimentIntensityAnalyzer()
+sia = LazySentimentAnalyzer()  # 동봉된 어휘 사전(common/data)을 첫 분석 때 로드 (nltk.download 불필요)
+korean_sia = load_korean_analyzer()  # 한국어 극성 사전 기반 분석기 (번역 불필요)
+
+# 번역 서비스 (번역기 재사용 + translation_cache.sqlite3 영구 캐시)
+translation_service = get_translation_service()
 
 # 🔹 번역 툴
 @tool
 def translate_tool(text: str) -> str:
     """주어진 텍스트를 영어로 번역하는 툴"""
     try:
-        translated_text = GoogleTranslator(source='auto', target='en').translate(text)
+        translated_text = translation_service.translate(text, target='en')
         return f"🔠 번역 결과: {translated_text}"
     except Exception as e:
         return f"❌ 번역 오류: {str(e)}"
@@ -48,10 +58,12 @@ def summarize_tool(text: str) -> str:
 # 🔹 감정 분석 툴
 @tool
 def analyze_sentiment(text: str) -> str:
-    """한국어 텍스트를 영어로 번역한 후 감정 분석을 수행하는 툴"""
+    """텍스트의 감정 분석을 수행하는 툴 (한국어는 번역 없이 바로 분석)"""
     try:
-        translated_text = GoogleTranslator(source='auto', target='en').translate(text)
-        sentiment_scores = sia.polarity_scores(translated_text)
+        if is_korean(text):  # 한국어는 로컬 한국어 감정 사전으로 분석 (번역 요청 없음)
+            sentiment_scores = korean_sia.polarity_scores(text)
+        else:
+            sentiment_scores = sia.polarity_scores(translation_service.translate(text, target='en'))
         compound_score = sentiment_scores["compound"]
         sentiment_label = "긍정적 😀" if compound_score > 0.05 else "부정적 😞" if compound_score < -0.05 else "중립적 😐"
         return f"📊 감정 분석 결과: {sentiment_label} (점수: {compound_score})"
@@ -103,7 +115,7 @@ def run_agent():
             print("🛑 대화 종료")
             break
         
-        response = agent.invoke(user_input)
+        response = agent.invoke(user_input, config={"callbacks": [metrics_handler]})
         print(f"🤖: {response["output"]}")
 
 
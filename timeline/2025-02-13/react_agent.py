@@ -8,6 +8,9 @@ from langgraph.store.memory import InMemoryStore
 from langchain.memory import ConversationBufferMemory
 from langchain_community.tools import DuckDuckGoSearchRun
 from langchain_core.tools import tool
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.metrics import MetricsCallbackHandler, start_exporter_from_env
 
 # ✅ 환경 변수 로드
 load_dotenv()
@@ -16,6 +19,10 @@ openai.api_key = os.getenv("OPENAI_API_KEY")
 # ✅ LLM 설정 (GPT-4o 사용)
 llm = ChatOpenAI(model="gpt-4o-mini", max_tokens= 150)
 
+# ✅ 툴 메트릭 (호출 수/오류/지연 시간/페이로드 크기) 수집 및 Prometheus 파일 내보내기
+metrics_handler = MetricsCallbackHandler()
+start_exporter_from_env()
+
 # ✅ 체크포인트 저장소 (대화 상태 저장)
 store = InMemoryStore()
 checkpointer = MemorySaver()
@@ -114,7 +121,7 @@ def print_stream(graph, inputs, config):
 # ✅ 챗봇 실행 함수
 def run_agent():
     thread_id = input("\n✅당신의 닉네임을 입력하세요: ").strip()
-    config = {"configurable": {"thread_id": thread_id}}
+    config = {"configurable": {"thread_id": thread_id}, "callbacks": [metrics_handler]}
     graph.get_state(config)
 
     while True:
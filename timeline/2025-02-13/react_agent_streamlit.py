@@ -9,6 +9,12 @@ from langchain.memory import ConversationBufferMemory
 from langchain_community.tools import DuckDuckGoSearchRun
 from langchain_core.tools import tool
 import random
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.metrics import MetricsCallbackHandler, start_exporter_from_env
+from common.usage import UsageCallbackHandler, get_ledger, show_usage_sidebar
+from common.emotion_matcher import load_default_matcher
+from common.emotion_router import EmotionRouter
 
 # ✅ Streamlit 페이지 설정
 st.set_page_config(page_title="🤖 AI 챗봇", layout="wide")
@@ -27,6 +33,14 @@ if not openai_api_key or not thread_id:
 # ✅ LLM 설정
 llm = ChatOpenAI(model="gpt-4o-mini", max_tokens=150, api_key=openai_api_key)
 
+# ✅ 툴 메트릭 (호출 수/오류/지연 시간/페이로드 크기) 수집 및 Prometheus 파일 내보내기
+metrics_handler = MetricsCallbackHandler()
+start_exporter_from_env()
+
+# ✅ thread_id별 토큰/비용 사용량 (툴 내부 LLM 호출 포함)
+usage_ledger = get_ledger("token_usage.json")
+usage_handler = UsageCallbackHandler(usage_ledger, thread_id)
+
 # ✅ 체크포인트 저장소 (대화 상태 저장)
 store = InMemoryStore()
 checkpointer = MemorySaver()
@@ -56,12 +70,16 @@ def search_summary_tool(query: str) -> str:
     return response.content
 
 # 🔹 **감정 반응 툴**
+# 감정 어휘 사전(common/data/emotion_lexicon_ko.tsv)을 Aho–Corasick 매처로 한 번에 검사 (활용형 포함)
+emotion_matcher = load_default_matcher()
+
 @tool
 def emotional_response_tool(user_input: str) -> str:
     """사용자의 감정에 따라 자연스럽게 반응하는 툴"""
-    if any(word in user_input.lower() for word in ["힘들어", "우울해", "슬퍼", "지쳤어", "짜증나", "속상해"]):
+    category, _ = emotion_matcher.classify(user_input)
+    if category in ("sad", "angry", "worried"):
         return random.choice(["괜찮아? 무슨 일 있었어?", "음… 나한테 말해도 괜찮아. 무슨 일인데?", "그랬구나... 나도 그런 기분 들 때가 있어."])
-    elif any(word in user_input.lower() for word in ["기뻐", "좋아", "행복해", "신나", "설레", "즐거워"]):
+    elif category == "happy":
         return random.choice(["오! 좋은 일이 있었구나! 무슨 일이야?", "와, 너 정말 행복해 보인다!"])
     return ""
 
@@ -71,6 +89,9 @@ tools = [memory_tool, search_summary_tool, emotional_response_tool]
 # ✅ **ReAct 기반 챗봇 생성 (LangChain Memory 적용)**
 graph = create_react_agent(llm, tools=tools, checkpointer=checkpointer, store=store)
 
+# ✅ **감정 표현만 있는 입력은 에이전트 없이 바로 답변 (route_log.jsonl에 기록)**
+emotion_router = EmotionRouter(emotion_matcher, emotional_response_tool.func)
+
 # ✅ **Streamlit 세션 상태 저장 (이전 대화 유지)**
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -94,11 +115,16 @@ if user_input:
     # ✅ **LLM 실행을 위한 메시지 구성**
     messages = chat_history + [("user", user_input)]
     inputs = {"messages": messages}
-    config = {"configurable": {"thread_id": thread_id}}
+    config = {"configurable": {"thread_id": thread_id}, "callbacks": [metrics_handler, usage_handler]}
 
-    # ✅ **LangGraph 실행**
-    response = graph.invoke(inputs, config=config)
-    ai_response = response["messages"][-1].content
+    # ✅ **감정 fast path → 아니면 LangGraph 실행**
+    decision = emotion_router.route(user_input, thread_id)
+    if decision.route == "fast":
+        ai_response = decision.reply
+    else:
+        response = graph.invoke(inputs, config=config)
+        ai_response = response["messages"][-1].content
+        usage_ledger.flush()
 
     # ✅ **LangChain Memory에 대화 저장**
     memory.save_context({"input": user_input}, {"output": ai_response})
@@ -111,3 +137,6 @@ if user_input:
     st.session_state.messages.append({"role": "assistant", "content": ai_response})
     with st.chat_message("assistant"):
         st.markdown(ai_response)
+
+# ✅ **사이드바에 토큰 사용량 표시**
+show_usage_sidebar(usage_ledger, thread_id)
@@ -11,6 +11,9 @@ from langchain.memory import ConversationBufferMemory
 from langchain.schema import AIMessage, HumanMessage, SystemMessage
 from langchain_community.tools import DuckDuckGoSearchRun
 from langchain_core.tools import tool
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.metrics import MetricsCallbackHandler, start_exporter_from_env
 
 # ✅ 환경 변수 로드
 load_dotenv()
@@ -19,6 +22,10 @@ openai.api_key = os.getenv("OPENAI_API_KEY")
 # ✅ LLM 설정 (GPT-4o 사용)
 llm = ChatOpenAI(model="gpt-4o-mini", max_tokens=150)
 
+# ✅ 툴 메트릭 (호출 수/오류/지연 시간/페이로드 크기) 수집 및 Prometheus 파일 내보내기
+metrics_handler = MetricsCallbackHandler()
+start_exporter_from_env()
+
 # ✅ 글로벌 저장소 (각 닉네임별 저장)
 store = InMemoryStore()
 
@@ -154,7 +161,7 @@ def run_agent():
     # ✅ 현재 스레드(사용자 닉네임) 저장
     threading.current_thread().name = thread_id
 
-    config = {"configurable": {"thread_id": thread_id}}
+    config = {"configurable": {"thread_id": thread_id}, "callbacks": [metrics_handler]}
     graph.get_state(config)
 
     while True:
@@ -12,6 +12,12 @@ from langchain_community.tools import DuckDuckGoSearchRun
 from langchain.agents import initialize_agent, AgentType
 from langchain_core.tools import tool
 import random
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.metrics import MetricsCallbackHandler, start_exporter_from_env
+from common.usage import UsageCallbackHandler, get_ledger, show_usage_sidebar
+from common.emotion_matcher import load_default_matcher
+from common.emotion_router import EmotionRouter
 
 # ✅ 환경 변수 로드
 load_dotenv()
@@ -85,6 +91,14 @@ if not openai_api_key or not thread_id or not filename:
 # ✅ LLM 설정
 llm = ChatOpenAI(model="gpt-4o-mini", max_tokens=200, api_key=openai_api_key)
 
+# ✅ 툴 메트릭 (호출 수/오류/지연 시간/페이로드 크기) 수집 및 Prometheus 파일 내보내기
+metrics_handler = MetricsCallbackHandler()
+start_exporter_from_env()
+
+# ✅ thread_id별 토큰/비용 사용량 (툴 내부 LLM 호출 포함)
+usage_ledger = get_ledger("token_usage.json")
+usage_handler = UsageCallbackHandler(usage_ledger, thread_id)
+
 # ✅ 체크포인트 저장소
 store = InMemoryStore()
 checkpointer = MemorySaver()
@@ -123,12 +137,16 @@ def search_summary_tool(query: str) -> str:
     ])
     return response.content
 
+# ✅ 감정 어휘 사전(common/data/emotion_lexicon_ko.tsv)을 Aho–Corasick 매처로 한 번에 검사 (활용형 포함)
+emotion_matcher = load_default_matcher()
+
 @tool
 def emotional_response_tool(user_input: str) -> str:
     """사용자의 감정에 따라 자연스럽게 반응하는 툴"""
-    if any(word in user_input.lower() for word in ["힘들어", "우울해", "슬퍼", "지쳤어", "짜증나"]):
+    category, _ = emotion_matcher.classify(user_input)
+    if category in ("sad", "angry", "worried"):
         return random.choice(["괜찮아? 무슨 일 있었어?", "음… 나한테 말해도 괜찮아. 무슨 일인데?"])
-    elif any(word in user_input.lower() for word in ["기뻐", "좋아", "행복해", "신나"]):
+    elif category == "happy":
         return random.choice(["오! 좋은 일이 있었구나!", "와, 너 정말 행복해 보인다!"])
     return ""
 
@@ -147,6 +165,9 @@ agent = initialize_agent(
     handle_parsing_errors = True
 )
 
+# ✅ 감정 표현만 있는 입력은 에이전트 없이 바로 답변 (route_log.jsonl에 기록)
+emotion_router = EmotionRouter(emotion_matcher, emotional_response_tool.func)
+
 
 # ✅ 실시간 스트리밍 출력 함수 (대화 내용을 기억)
 def print_stream(graph, inputs, config):
@@ -174,7 +195,7 @@ if user_input:
     print()
     print("user_input:", user_input)
     messages = memory.load_memory_variables({}).get("chat_history", "") + [("user", user_input)]
-    config = {"configurable": {"thread_id": thread_id}}
+    config = {"configurable": {"thread_id": thread_id}, "callbacks": [metrics_handler, usage_handler]}
     # inputs = {"messages": messages}
     inputs = {"input": messages}
 
@@ -185,9 +206,14 @@ if user_input:
 
 
     # response = agent.invoke(inputs, config=config)["messages"][-1].content
-    response = agent.invoke(inputs, config=config)
-    # print(response)
-    ai_response = response["output"]
+    decision = emotion_router.route(user_input, thread_id)
+    if decision.route == "fast":
+        ai_response = decision.reply
+    else:
+        response = agent.invoke(inputs, config=config)
+        # print(response)
+        ai_response = response["output"]
+        usage_ledger.flush()
 
     print("response:", ai_response, "\n")
     memory.save_context({"input": user_input}, {"output": ai_response})
@@ -200,4 +226,7 @@ if user_input:
         st.markdown(ai_response)
     st.rerun()
 
-    print_stream(agent, inputs, config)
\ No newline at end of file
+    print_stream(agent, inputs, config)
+
+# ✅ 사이드바에 토큰 사용량 표시 (이번 턴을 처리한 뒤라서 방금 쓴 토큰까지 포함)
+show_usage_sidebar(usage_ledger, thread_id)
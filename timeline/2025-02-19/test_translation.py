@@ -0,0 +1,132 @@
+'''
+
+공용 번역 서비스(common/translation.py) 테스트
+네트워크 없이 로컬 번역기 대역으로 요청 수, 배치 경계 확인, 영구 캐시 동작을 확인
+
+실행: python -m pytest timeline/2025-02-19/test_translation.py
+
+'''
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.translation import _MARKER, _SEPARATOR, TranslationService
+
+
+class StandInTranslator:
+    """GoogleTranslator 대역 (사전에 있으면 치환, 없으면 [target] 접두어). 받은 요청을 기록"""
+
+    def __init__(self, source="auto", target="en", dictionary=None, merge_lines=False, empty=False):
+        self.source = source
+        self.target = target
+        self.dictionary = dictionary or {}
+        self.merge_lines = merge_lines  # 실제 번역기처럼 짧은 줄 두 개를 한 줄로 합쳐 버리는 경우 흉내
+        self.empty = empty  # 번역에 실패해서 빈 결과를 돌려주는 경우 흉내
+        self.requests = []
+
+    def _line(self, line):
+        marker = _MARKER.match(line)
+        prefix, body = (line[:marker.end()], line[marker.end():]) if marker else ("", line)
+        return prefix + self.dictionary.get(body, f"[{self.target}] {body}")
+
+    def translate(self, text):
+        self.requests.append(text)
+        if self.empty:
+            return ""
+        lines = [self._line(line) for line in text.split(_SEPARATOR)]
+        if self.merge_lines and len(lines) >= 3:
+            lines[1:3] = [lines[1] + " " + _MARKER.sub("", lines[2])]  # 번호 하나가 사라짐
+        return _SEPARATOR.join(lines)
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "translation_cache.sqlite3")
+
+
+def make_service(cache_path, **kwargs):
+    """(서비스, 만들어진 번역기 목록)"""
+    translators = []
+
+    def factory(source, target):
+        translators.append(StandInTranslator(source, target, **kwargs))
+        return translators[-1]
+
+    return TranslationService(cache_path, translator_factory=factory), translators
+
+
+def test_batch_is_one_request(cache_path):
+    service, translators = make_service(cache_path, dictionary={"좋아": "I like it"})
+    texts = ["좋아", "싫어", "그냥 그래", "좋아"]
+
+    assert service.translate_batch(texts) == ["I like it", "[en] 싫어", "[en] 그냥 그래", "I like it"]
+    assert len(translators) == 1
+    assert len(translators[0].requests) == 1  # 중복을 뺀 세 문장을 한 번에
+    assert service.stats == {"hits": 0, "misses": 3, "requests": 1, "fallbacks": 0, "failures": 0}
+
+
+def test_cache_survives_restart(cache_path):
+    service, _ = make_service(cache_path)
+    texts = [f"문장 {i}" for i in range(5)]
+    expected = service.translate_batch(texts)
+
+    restarted, translators = make_service(cache_path)
+    assert restarted.translate_batch(texts) == expected
+    assert restarted.stats["requests"] == 0
+    assert restarted.stats["hits"] == 5
+    assert translators == []  # 캐시로 끝나면 번역기도 만들지 않음
+
+
+def test_cache_is_per_target(cache_path):
+    service, translators = make_service(cache_path)
+    assert service.translate("안녕", target="en") == "[en] 안녕"
+    assert service.translate("안녕", target="ja") == "[ja] 안녕"
+    assert service.translate("안녕", target="en") == "[en] 안녕"
+    assert [t.target for t in translators] == ["en", "ja"]
+    assert service.stats["requests"] == 2
+
+
+def test_merged_lines_fall_back_to_single_requests(cache_path):
+    service, translators = make_service(cache_path, merge_lines=True)
+    texts = [f"짧은 문장 {i}" for i in range(6)]
+
+    assert service.translate_batch(texts) == [f"[en] {text}" for text in texts]
+    assert service.stats["fallbacks"] == 1
+    assert service.stats["requests"] == 1 + len(texts)  # 버린 배치 1번 + 문장별 6번
+
+    # 합쳐진 줄이 다른 문장의 번역으로 캐시되지 않았는지 (정상 번역기로 다시 열어도 요청 없이 같은 결과)
+    restarted, _ = make_service(cache_path)
+    assert restarted.translate_batch(texts) == [f"[en] {text}" for text in texts]
+    assert restarted.stats["requests"] == 0
+
+
+def test_failed_translations_are_not_cached(cache_path):
+    service, _ = make_service(cache_path, empty=True)
+    assert service.translate_batch(["하나", "둘"]) == ["하나", "둘"]  # 실패하면 원문
+    assert service.stats["failures"] == 2
+
+    retry, translators = make_service(cache_path)
+    assert retry.translate_batch(["하나", "둘"]) == ["[en] 하나", "[en] 둘"]
+    assert len(translators[0].requests) == 1
+
+
+def test_multiline_text_is_translated_alone(cache_path):
+    service, translators = make_service(cache_path)
+    texts = ["첫 줄\n둘째 줄", "한 줄", "또 한 줄"]
+
+    assert service.translate_batch(texts) == ["[en] 첫 줄\n[en] 둘째 줄", "[en] 한 줄", "[en] 또 한 줄"]
+    assert translators[0].requests[1] == "첫 줄\n둘째 줄"
+    assert len(translators[0].requests) == 2  # 한 줄짜리 두 문장은 묶어서
+
+
+def test_batches_split_at_max_chars(cache_path):
+    service, translators = make_service(cache_path)
+    service.max_batch_chars = 100
+    texts = [f"{i:02d} " + "가" * 30 for i in range(10)]  # 줄마다 33자 + 표시 8자 → 배치당 2문장
+
+    assert service.translate_batch(texts) == [f"[en] {text}" for text in texts]
+    assert len(translators[0].requests) == 5
+    assert all(len(request) <= 100 for request in translators[0].requests)
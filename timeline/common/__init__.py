@@ -0,0 +1 @@
+"""timeline 예제 코드들이 함께 사용하는 공용 유틸리티 모음"""
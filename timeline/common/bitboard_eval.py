@@ -0,0 +1,294 @@
+"""
+NumPy 비트보드 배치 평가기 (chess_ai_node 코칭 답변용 포지션 특징 요약)
+
+- 포지션 N개를 (N, 9) uint64 배열(색별 점유 2 + 기물 종류별 6 + 둘 차례)로 묶고
+  기물 점수/기동력/킹 안전/폰 구조 특징을 시프트 연산으로 한 번에 계산 (포지션마다 파이썬 루프를 돌지 않음)
+- 슬라이딩 기물 공격은 방향별 dumb7fill, 나이트/킹/폰 공격은 파일 마스크를 씌운 시프트로 계산
+- 특징 (색별): 기물 점수, 기동력(기물 종류별 공격 칸 중 자기 기물/상대 폰 공격 칸 제외), 킹 주변 공격받는 칸,
+  폰 방패, 겹폰/고립 폰/통과 폰 → 가중합으로 백 기준 정적 평가(센티폰)
+- summarize_position: 현재 포지션 + 지금까지의 게임 전체를 한 번에 평가해서
+  LLM 프롬프트에 넣을 짧은 한국어 요약을 만듦 (FEN만 주고 모델이 직접 계산하게 하던 것을 대체)
+  - 후보 수는 정적 평가가 아니라 chess_engine 정지 탐색(잡고 다시 잡는 수까지)으로 순위를 매김
+  - 게임 흐름은 교환이 끝난(바로 되잡을 수 없는) 포지션끼리, 같은 쪽 차례인 포지션만 비교
+
+사용 예:
+    features = evaluate_batch([board1, board2, ...])   # {"score": array([...]), "mobility_w": ..., ...}
+    prompt += summarize_position(board)
+
+벤치마크:
+    python bitboard_eval.py [포지션 수]
+"""
+
+import sys
+
+import numpy as np
+
+import chess
+
+try:
+    from .chess_engine import ENGINE, MATE_BOUND, PIECE_VALUES
+except ImportError:  # python bitboard_eval.py 로 직접 실행할 때
+    from chess_engine import ENGINE, MATE_BOUND, PIECE_VALUES
+
+# ✅ 비트 i = 칸 i (a1 = 0, h1 = 7, a8 = 56)
+_U64 = np.uint64
+FULL = _U64(0xFFFFFFFFFFFFFFFF)
+FILE_A = _U64(0x0101010101010101)
+FILE_H = _U64(0x8080808080808080)
+RANK_1 = _U64(0xFF)
+NOT_A = ~FILE_A
+NOT_H = ~FILE_H
+NOT_AB = ~(FILE_A | FILE_A << _U64(1))
+NOT_GH = ~(FILE_H | FILE_H >> _U64(1))
+
+# (시프트 양, 시프트 후 씌울 마스크) — 양수는 위쪽(8랭크 방향)
+NORTH, SOUTH, EAST, WEST = (8, FULL), (-8, FULL), (1, NOT_A), (-1, NOT_H)
+NORTH_EAST, NORTH_WEST, SOUTH_EAST, SOUTH_WEST = (9, NOT_A), (7, NOT_H), (-7, NOT_A), (-9, NOT_H)
+ORTHOGONAL = (NORTH, SOUTH, EAST, WEST)
+DIAGONAL = (NORTH_EAST, NORTH_WEST, SOUTH_EAST, SOUTH_WEST)
+KNIGHT_JUMPS = ((17, NOT_A), (15, NOT_H), (10, NOT_AB), (6, NOT_GH), (-6, NOT_AB), (-10, NOT_GH), (-15, NOT_A), (-17, NOT_H))
+
+# 정적 평가 가중치 (센티폰)
+WEIGHTS = {"mobility": 4, "king_danger": -8, "shield": 10, "doubled": -15, "isolated": -12, "passed": 25}
+
+_COLUMNS = ("white", "black", "pawns", "knights", "bishops", "rooks", "queens", "kings", "turn")
+_PIECE_COLUMNS = ((chess.PAWN, 2), (chess.KNIGHT, 3), (chess.BISHOP, 4), (chess.ROOK, 5), (chess.QUEEN, 6))
+
+
+# ------------------------------------------------------------
+# 비트 연산 기본 함수
+# ------------------------------------------------------------
+if hasattr(np, "bitwise_count"):  # NumPy 2.0+
+    def popcount(bitboards):
+        return np.bitwise_count(bitboards).astype(np.int32)
+else:
+    _BYTE_COUNTS = np.array([bin(i).count("1") for i in range(256)], dtype=np.int32)
+
+    def popcount(bitboards):
+        bitboards = np.ascontiguousarray(bitboards, dtype=_U64)
+        return _BYTE_COUNTS[bitboards.view(np.uint8)].reshape(bitboards.shape + (8,)).sum(axis=-1)
+
+
+def shift(bitboards, direction):
+    amount, mask = direction
+    if amount > 0:
+        return (bitboards << _U64(amount)) & mask
+    return (bitboards >> _U64(-amount)) & mask
+
+
+def slide(sliders, empty, direction):
+    """한 방향 슬라이딩 공격 (dumb7fill, 처음 만나는 기물 칸까지 포함)"""
+    flood = gen = sliders
+    for _ in range(6):
+        gen = shift(gen, direction) & empty
+        flood = flood | gen
+    return shift(flood, direction)
+
+
+def fill(bitboards, direction):
+    """한 방향으로 끝까지 채움 (폰 파일/앞쪽 범위 계산용)"""
+    for amount in (1, 2, 4):
+        bitboards = bitboards | shift(bitboards, (direction[0] * amount, direction[1]))
+    return bitboards
+
+
+def knight_attacks(knights):
+    attacks = np.zeros_like(knights)
+    for jump in KNIGHT_JUMPS:
+        attacks |= shift(knights, jump)
+    return attacks
+
+
+def king_attacks(kings):
+    attacks = np.zeros_like(kings)
+    for direction in ORTHOGONAL + DIAGONAL:
+        attacks |= shift(kings, direction)
+    return attacks
+
+
+def pawn_attacks(pawns, color):
+    if color == chess.WHITE:
+        return shift(pawns, NORTH_EAST) | shift(pawns, NORTH_WEST)
+    return shift(pawns, SOUTH_EAST) | shift(pawns, SOUTH_WEST)
+
+
+# ------------------------------------------------------------
+# 배치 평가
+# ------------------------------------------------------------
+def pack_boards(boards):
+    """chess.Board 목록 → (N, 9) uint64 배열 (열: _COLUMNS)"""
+    rows = [
+        (b.occupied_co[chess.WHITE], b.occupied_co[chess.BLACK], b.pawns, b.knights, b.bishops, b.rooks, b.queens, b.kings, b.turn)
+        for b in boards
+    ]
+    return np.array(rows, dtype=_U64).reshape(-1, len(_COLUMNS))
+
+
+def _side_features(packed, color):
+    own = packed[:, 0] if color == chess.WHITE else packed[:, 1]
+    enemy = packed[:, 1] if color == chess.WHITE else packed[:, 0]
+    empty = ~(own | enemy)
+    pawns, knights, bishops, rooks, queens, kings = (packed[:, i] & own for i in range(2, 8))
+    enemy_pawns = packed[:, 2] & enemy
+    forward = NORTH if color == chess.WHITE else SOUTH
+    backward = SOUTH if color == chess.WHITE else NORTH
+
+    material = np.zeros(len(packed), dtype=np.int32)
+    for piece_type, column in _PIECE_COLUMNS:
+        material += PIECE_VALUES[piece_type] * popcount(packed[:, column] & own)
+
+    diagonal = [slide(bishops | queens, empty, d) for d in DIAGONAL]
+    orthogonal = [slide(rooks | queens, empty, d) for d in ORTHOGONAL]
+    attacks = {
+        "pawn": pawn_attacks(pawns, color),
+        "knight": knight_attacks(knights),
+        "diagonal": diagonal[0] | diagonal[1] | diagonal[2] | diagonal[3],
+        "orthogonal": orthogonal[0] | orthogonal[1] | orthogonal[2] | orthogonal[3],
+        "king": king_attacks(kings),
+    }
+    safe = ~own & ~pawn_attacks(enemy_pawns, not color)
+    mobility = sum(popcount(attacks[kind] & safe) for kind in ("knight", "diagonal", "orthogonal"))
+
+    # 폰 구조: 파일 단위로 채운 비트보드로 겹폰/고립 폰, 상대 폰의 앞쪽 범위로 통과 폰
+    pawn_files = fill(pawns, NORTH) | fill(pawns, SOUTH)
+    doubled = popcount(pawns) - popcount(pawn_files & RANK_1)
+    isolated = popcount(pawns & ~(shift(pawn_files, EAST) | shift(pawn_files, WEST)))
+    enemy_front = fill(shift(enemy_pawns, backward), backward)
+    passed = popcount(pawns & ~(enemy_front | shift(enemy_front, EAST) | shift(enemy_front, WEST)))
+
+    # 킹 앞 세 칸 + 그 앞 세 칸의 자기 폰
+    front = shift(kings | shift(kings, EAST) | shift(kings, WEST), forward)
+    shield = popcount(pawns & (front | shift(front, forward)))
+    king_zone = kings | attacks["king"]
+    all_attacks = attacks["pawn"] | attacks["knight"] | attacks["diagonal"] | attacks["orthogonal"] | attacks["king"]
+    return {
+        "material": material,
+        "mobility": mobility,
+        "shield": shield,
+        "doubled": doubled,
+        "isolated": isolated,
+        "passed": passed,
+        "_attacks": all_attacks,
+        "_king_zone": king_zone,
+    }
+
+
+def evaluate_batch(boards):
+    """포지션 목록(또는 pack_boards 결과) → 특징 이름별 (N,) 배열. score는 백 기준 센티폰"""
+    packed = boards if isinstance(boards, np.ndarray) else pack_boards(boards)
+    white = _side_features(packed, chess.WHITE)
+    black = _side_features(packed, chess.BLACK)
+    white["king_danger"] = popcount(white.pop("_king_zone") & black["_attacks"])
+    black["king_danger"] = popcount(black.pop("_king_zone") & white["_attacks"])
+    del white["_attacks"], black["_attacks"]
+
+    features = {}
+    score = white["material"] - black["material"]
+    for name in white:
+        features[f"{name}_w"], features[f"{name}_b"] = white[name], black[name]
+        if name in WEIGHTS:
+            score = score + WEIGHTS[name] * (white[name] - black[name])
+    features["score"] = score.astype(np.int32)
+    features["turn"] = packed[:, 8].astype(bool)  # True = 백 차례
+    return features
+
+
+# ------------------------------------------------------------
+# LLM 프롬프트용 요약
+# ------------------------------------------------------------
+def _pawns(centipawns):
+    return f"{centipawns / 100:+.2f}"
+
+
+def _move_score(centipawns):
+    return "메이트" if centipawns >= MATE_BOUND else "메이트 당함" if centipawns <= -MATE_BOUND else _pawns(centipawns)
+
+
+def summarize_position(board, top_moves=3, time_limit=0.5):
+    """현재 포지션과 게임 전체를 한 번의 배치로 평가하고, 후보 수는 엔진 정지 탐색으로 골라 짧은 요약 문자열로"""
+    history, settled = [], [0]  # settled: 교환이 끝난 포지션의 ply (방금 잡힌 칸을 둘 차례인 쪽이 다시 잡을 수 없음)
+    replay = board.root()
+    for ply, move in enumerate(board.move_stack, 1):
+        history.append(replay.copy(stack=False))
+        capture = replay.is_capture(move)
+        replay.push(move)
+        if not (capture and replay.attackers(replay.turn, move.to_square)):
+            settled.append(ply)
+
+    features = evaluate_batch([board] + history)
+    now = {name: values[0] for name, values in features.items()}
+
+    lines = [
+        "[포지션 요약 (평가는 비트보드 정적 평가, 후보 수만 엔진 정지 탐색)]",
+        f"- 평가(백 기준): {_pawns(now['score'])} / 기물 점수 백 {now['material_w'] / 100:.0f}, 흑 {now['material_b'] / 100:.0f}",
+        f"- 기동력: 백 {now['mobility_w']}, 흑 {now['mobility_b']}",
+        f"- 킹 안전: 킹 주변 공격받는 칸 백 {now['king_danger_w']}, 흑 {now['king_danger_b']} / "
+        f"폰 방패 백 {now['shield_w']}, 흑 {now['shield_b']}",
+        f"- 폰 구조: 겹폰 백 {now['doubled_w']}·흑 {now['doubled_b']}, 고립 폰 백 {now['isolated_w']}·흑 {now['isolated_b']}, "
+        f"통과 폰 백 {now['passed_w']}·흑 {now['passed_b']}",
+    ]
+
+    ranked = ENGINE.rank_moves(board, limit=top_moves, time_limit=time_limit)
+    if ranked:
+        moves = ", ".join(f"{board.san(move)} {_move_score(score)}" for move, score in ranked)
+        lines.append(f"- 둘 차례({'백' if board.turn == chess.WHITE else '흑'}) 기준 후보 수 (엔진 정지 탐색, 잡고 다시 잡는 수까지): {moves}")
+
+    if history:
+        trend = np.append(features["score"][1:], now["score"])  # ply 0 ~ 현재
+        # 같은 쪽 차례인 직전의 교환이 끝난 포지션과 비교 (교환 중간의 출렁임과 차례에 따른 차이를 빼기 위해)
+        pairs = []
+        for p in settled:
+            earlier = [q for q in settled if q < p and (p - q) % 2 == 0]
+            if earlier:
+                pairs.append((earlier[-1], p))
+        if pairs:
+            start, end = max(pairs, key=lambda pair: abs(trend[pair[1]] - trend[pair[0]]))
+            first = history[start]
+            moves = " ".join(history[ply].san(board.move_stack[ply]) for ply in range(start, end))
+            lines.append(
+                f"- 게임 흐름: {len(history)} ply, 평가가 가장 크게 바뀐 구간 "
+                f"{first.fullmove_number}{'.' if first.turn == chess.WHITE else '...'} {moves} "
+                f"({_pawns(trend[start])} → {_pawns(trend[end])}), 현재 {_pawns(trend[-1])}"
+            )
+        else:
+            lines.append(f"- 게임 흐름: {len(history)} ply, 현재 {_pawns(trend[-1])}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    try:
+        from .chess_engine import evaluate
+    except ImportError:
+        from chess_engine import evaluate
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = random.Random(0)
+    boards, board = [], chess.Board()
+    while len(boards) < count:
+        if board.is_game_over() or board.ply() > 120:
+            board = chess.Board()
+        board.push(rng.choice(list(board.legal_moves)))
+        boards.append(board.copy(stack=False))
+
+    start = time.perf_counter()
+    packed = pack_boards(boards)
+    pack_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    features = evaluate_batch(packed)
+    batch_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for b in boards:
+        evaluate(b)
+    loop_ms = (time.perf_counter() - start) * 1000
+
+    print(f"📦 포장: {count:,}개 {pack_ms:.0f} ms")
+    print(f"⚡ 배치 특징 계산: {batch_ms:.0f} ms ({count / batch_ms * 1000:,.0f} 포지션/s, 특징 {len(features)}개)")
+    print(f"🐢 참고 - chess_engine.evaluate 포지션별 루프 (기물+칸 점수만): {loop_ms:.0f} ms ({count / loop_ms * 1000:,.0f} 포지션/s)")
+
+    demo = chess.Board()
+    for san in ("e4", "e5", "Nf3", "Nc6", "Bb5", "a6", "Bxc6", "dxc6"):
+        demo.push_san(san)
+    print(summarize_position(demo))
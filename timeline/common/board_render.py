@@ -0,0 +1,189 @@
+"""
+렌더링된 체스 보드 이미지(SVG/PNG) 캐시
+
+- render_chessboard가 Streamlit rerun마다, 수를 둘 때마다 chess.svg.board + cairosvg.svg2png를 다시 실행하던 것을 대체
+- 키: (포지션 FEN, 크기, 마지막 수, 형식). 포지션은 기물 배치 + 차례만 사용 (수 카운터가 달라도 그림은 같음)
+- 값: 변경 불가능한 bytes/str (BytesIO는 읽은 위치가 바뀌어서 여러 번 공유하면 안 됨)
+- 크기가 정해진 LRU + 적중률 카운터, 시작 포지션과 자주 나오는 오프닝은 warm_openings()로 미리 렌더링
+- cairosvg는 PNG를 처음 만들 때만 import (SVG만 쓰는 화면은 cairo 없이도 동작)
+
+사용 예:
+    st.image(BOARD_IMAGES.png(board, size=400))
+
+벤치마크:
+    python board_render.py
+"""
+
+import threading
+from collections import OrderedDict
+
+import chess
+import chess.svg
+
+# ✅ 자주 나오는 오프닝 (UCI). 각 수순의 모든 중간 포지션도 함께 렌더링
+COMMON_OPENINGS = (
+    "e2e4 e7e5 g1f3 b8c6 f1b5",  # 루이 로페즈
+    "e2e4 e7e5 g1f3 b8c6 f1c4",  # 이탈리안
+    "e2e4 c7c5 g1f3 d7d6",  # 시실리안
+    "e2e4 e7e6 d2d4 d7d5",  # 프렌치
+    "e2e4 c7c6 d2d4 d7d5",  # 카로칸
+    "d2d4 d7d5 c2c4 e7e6",  # 퀸즈 갬빗 거절
+    "d2d4 d7d5 c2c4 d5c4",  # 퀸즈 갬빗 수락
+    "d2d4 g8f6 c2c4 g7g6",  # 킹스 인디언
+    "d2d4 g8f6 c2c4 e7e6",  # 님조/퀸즈 인디언
+    "c2c4 e7e5",  # 잉글리시
+    "g1f3 d7d5",  # 레티
+)
+
+
+def position_fen(board):
+    """그림에 영향을 주는 부분만 남긴 FEN (기물 배치 + 차례 → 체크 표시 여부)"""
+    return f"{board.board_fen()} {'w' if board.turn == chess.WHITE else 'b'}"
+
+
+def _svg2png(svg, size):
+    import cairosvg  # PNG가 필요할 때만 로드
+
+    return cairosvg.svg2png(bytestring=svg.encode("utf-8"), output_width=size, output_height=size)
+
+
+class BoardImageCache:
+    """(FEN, 크기, 마지막 수, 형식) → 렌더링 결과 LRU 캐시"""
+
+    def __init__(self, maxsize=256, rasterize=_svg2png):
+        self.maxsize = maxsize
+        self.rasterize = rasterize
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+        self._warmed = set()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key):
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return image
+
+    def _store(self, key, image):
+        with self._lock:
+            self._images[key] = image
+            self._images.move_to_end(key)
+            while len(self._images) > self.maxsize:
+                self._images.popitem(last=False)
+
+    @staticmethod
+    def _key(board, size, lastmove, fmt):
+        return position_fen(board), size, lastmove.uci() if lastmove else None, fmt
+
+    def svg(self, board, size=400, lastmove=None):
+        key = self._key(board, size, lastmove, "svg")
+        image = self._lookup(key)
+        if image is None:
+            image = chess.svg.board(board=board, size=size, lastmove=lastmove)
+            self._store(key, image)
+        return image
+
+    def png(self, board, size=400, lastmove=None):
+        key = self._key(board, size, lastmove, "png")
+        image = self._lookup(key)
+        if image is None:
+            image = self.rasterize(chess.svg.board(board=board, size=size, lastmove=lastmove), size)
+            self._store(key, image)
+        return image
+
+    def warm_openings(self, size=400, fmt="png", openings=COMMON_OPENINGS):
+        """시작 포지션과 오프닝 수순의 포지션들을 미리 렌더링 (크기/형식별로 한 번만). 렌더링한 수를 반환"""
+        with self._lock:
+            if (size, fmt) in self._warmed:
+                return 0
+            self._warmed.add((size, fmt))
+
+        render = self.png if fmt == "png" else self.svg
+        seen = set()
+        boards = [chess.Board()]
+        for line in openings:
+            board = chess.Board()
+            for uci in line.split():
+                board.push_uci(uci)
+                boards.append(board.copy(stack=False))
+
+        with self._lock:  # 미리 렌더링한 건 적중률 계산에서 제외
+            counters = self.hits, self.misses
+        rendered = 0
+        for board in boards:
+            key = self._key(board, size, None, fmt)
+            if key in seen:
+                continue
+            seen.add(key)
+            with self._lock:
+                cached = key in self._images
+            if not cached:
+                render(board, size)
+                rendered += 1
+        with self._lock:
+            self.hits, self.misses = counters
+        return rendered
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._images),
+                "bytes": sum(len(image) for image in self._images.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+# ✅ 프로세스 단위 공유 캐시 (Streamlit rerun/세션 간에도 유지)
+BOARD_IMAGES = BoardImageCache()
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    try:
+        _svg2png(chess.svg.board(size=50), 50)
+        formats = ("svg", "png")
+    except (ImportError, OSError) as e:
+        print(f"⚠️ cairosvg를 사용할 수 없어서 SVG만 측정합니다 ({type(e).__name__})")
+        formats = ("svg",)
+
+    # 한 판(40수)을 두면서 rerun마다 보드를 3번씩 다시 그리는 상황
+    rng = random.Random(0)
+    board = chess.Board()
+    redraws = []
+    for _ in range(40):
+        if board.is_game_over():
+            break
+        board.push(rng.choice(list(board.legal_moves)))
+        redraws.extend([board.copy()] * 3)
+
+    for fmt in formats:
+        start = time.perf_counter()
+        for b in redraws:
+            svg = chess.svg.board(board=b, size=400)
+            if fmt == "png":
+                _svg2png(svg, 400)
+        naive_ms = (time.perf_counter() - start) * 1000 / len(redraws)
+
+        cache = BoardImageCache()
+        start = time.perf_counter()
+        warmed = cache.warm_openings(fmt=fmt)
+        warm_ms = (time.perf_counter() - start) * 1000
+
+        render = cache.png if fmt == "png" else cache.svg
+        start = time.perf_counter()
+        for b in redraws:
+            render(b, 400)
+        cached_ms = (time.perf_counter() - start) * 1000 / len(redraws)
+
+        print(f"[{fmt}] 🐢 매번 렌더링: {naive_ms:.2f} ms/회, 🚀 캐시: {cached_ms:.2f} ms/회 {cache.stats()}")
+        print(f"[{fmt}] 🔥 오프닝 {warmed}개 포지션 미리 렌더링: {warm_ms:.0f} ms")
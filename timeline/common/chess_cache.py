@@ -0,0 +1,151 @@
+"""
+포지션별 합법 수 캐시 (모든 체스 툴이 공유)
+
+- legal_moves_tool, ai_move 재시도 루프 등에서 매번 board.legal_moves를 다시 만들고 board.san()을 호출하던 것을 대체
+- 키: 공개 속성으로 만든 비트보드 튜플 (기물 종류별/색별 비트보드 + 차례 + 캐슬링 + 실제로 둘 수 있는 앙파상 칸 + chess960)
+  → 합법 수를 결정하는 정보, 해시 계산 없이 바로 dict 키로 사용
+  (chess.polyglot.zobrist_hash는 64칸을 매번 훑어서 ~27µs로 board.is_legal보다 느렸음, 이 키는 ~1µs)
+  (비공개 board._transposition_key()와 같은 정보지만 python-chess 버전에 묶이지 않음, 속성이 없는 보드는 EPD 문자열)
+- 값: SAN/UCI 목록과 O(1) 검증용 UCI frozenset
+- 크기가 정해진 LRU (오래 안 쓴 포지션부터 제거), 프로세스 전체에서 LEGAL_MOVES 하나를 공유 (Streamlit rerun에도 유지)
+
+사용 예:
+    entry = LEGAL_MOVES.get(board)
+    ", ".join(entry.san)
+    LEGAL_MOVES.is_legal(board, "e2e4")
+
+벤치마크:
+    python chess_cache.py
+"""
+
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import chess
+
+
+class PositionMoves(NamedTuple):
+    moves: tuple  # chess.Move 목록
+    san: tuple
+    uci: tuple
+    uci_set: frozenset
+
+
+def position_key(board):
+    try:
+        return (
+            board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings,
+            board.occupied_co[chess.WHITE], board.occupied_co[chess.BLACK],
+            board.turn, board.clean_castling_rights(),
+            board.ep_square if board.has_legal_en_passant() else None,
+            board.chess960,
+        )
+    except AttributeError:  # 비트보드 속성이 없는 보드 → 같은 정보를 담은 EPD (느리지만 정확함)
+        return board.epd(en_passant="legal")
+
+
+class LegalMoveCache:
+    """포지션 키 → PositionMoves LRU 캐시"""
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, board):
+        key = position_key(board)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        moves = tuple(board.legal_moves)
+        uci = tuple(move.uci() for move in moves)
+        entry = PositionMoves(moves, tuple(board.san(move) for move in moves), uci, frozenset(uci))
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def san(self, board):
+        return self.get(board).san
+
+    def uci(self, board):
+        return self.get(board).uci
+
+    def is_legal(self, board, move):
+        """move: chess.Move 또는 UCI 문자열"""
+        if isinstance(move, chess.Move):
+            move = move.uci()
+        return move in self.get(board).uci_set
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+# ✅ 모든 체스 툴이 함께 쓰는 프로세스 단위 캐시
+LEGAL_MOVES = LegalMoveCache()
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    # 랜덤 대국에서 나온 포지션들을 툴 호출/재시도처럼 여러 번 반복 조회
+    rng = random.Random(0)
+    positions = []
+    board = chess.Board()
+    while len(positions) < 200:
+        if board.is_game_over():
+            board = chess.Board()
+        positions.append(board.copy())
+        board.push(rng.choice(list(board.legal_moves)))
+    lookups = [rng.choice(positions) for _ in range(5000)]
+
+    start = time.perf_counter()
+    for b in lookups:
+        san = [b.san(m) for m in b.legal_moves]
+        uci = [m.uci() for m in b.legal_moves]
+    naive_us = (time.perf_counter() - start) / len(lookups) * 1e6
+
+    cache = LegalMoveCache(maxsize=256)
+    start = time.perf_counter()
+    for b in lookups:
+        entry = cache.get(b)
+    cached_us = (time.perf_counter() - start) / len(lookups) * 1e6
+
+    start = time.perf_counter()
+    for b in lookups:
+        cache.is_legal(b, "e2e4")
+    check_us = (time.perf_counter() - start) / len(lookups) * 1e6
+
+    e2e4 = chess.Move.from_uci("e2e4")
+    start = time.perf_counter()
+    for b in lookups:
+        b.is_legal(e2e4)
+    direct_us = (time.perf_counter() - start) / len(lookups) * 1e6
+
+    print(f"🐢 매번 SAN/UCI 생성: {naive_us:.1f} µs/조회")
+    print(f"🚀 캐시 조회:         {cached_us:.1f} µs/조회 ({cache.stats()})")
+    print(f"✅ is_legal 검증:     {check_us:.1f} µs/조회 (board.is_legal 직접 호출 {direct_us:.1f} µs)")
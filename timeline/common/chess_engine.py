@@ -0,0 +1,368 @@
+"""
+python-chess 보드 위에서 동작하는 로컬 탐색 엔진 (LLM 없이 수를 고를 때 사용)
+
+- My_chess_page.py는 legal_moves[0], chess_manual.py는 LLM이 실패하면 랜덤 수를 두던 것을 대체
+- 반복 심화(iterative deepening) + 알파-베타(negamax) + 정지 탐색(quiescence, 잡는 수만)
+- 수 정렬: 치환표의 최선 수 → 잡는 수(MVV-LVA) / 승급 → 킬러 수 → 나머지
+- 치환표(transposition table): Zobrist 해시(chess.polyglot.zobrist_hash) → (깊이, 경계 종류, 점수, 최선 수)
+  메이트 점수는 노드 기준(ply 보정)으로 저장하고, 크기가 max_tt_entries(기본 10만)를 넘으면 비움
+- 반복: 게임 수순을 유지한 보드로 탐색해서 이미 나온 포지션으로 돌아가는 수는 무승부(0점)
+- 평가: 기물 가치 + 기물-칸 표(simplified evaluation function), 퀸이 모두 빠지면 킹은 엔드게임 표 사용
+- 수마다 시간 제한: 제한 시간이 지나면 마지막으로 끝까지 탐색한 깊이의 최선 수를 반환
+
+사용 예:
+    result = ENGINE.search(board, time_limit=1.0)
+    board.push(result.move)
+
+    MoveGenerator(llm, fallback=engine_fallback)  # LLM이 합법 수를 못 내면 엔진 수
+
+NPS 벤치마크:
+    python chess_engine.py
+"""
+
+import time
+from typing import NamedTuple, Optional
+
+import chess
+import chess.polyglot
+
+MATE = 100000
+INF = MATE + 1
+MATE_BOUND = MATE - 1000  # 이보다 크면 메이트 점수 (MATE - 메이트까지 남은 ply)
+
+PIECE_VALUES = {chess.PAWN: 100, chess.KNIGHT: 320, chess.BISHOP: 330, chess.ROOK: 500, chess.QUEEN: 900, chess.KING: 0}
+
+# ✅ 기물-칸 표 (백 기준, 보이는 그대로 8랭크 → 1랭크 순서)
+_PST_ROWS = {
+    chess.PAWN: (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0,
+    ),
+    chess.KNIGHT: (
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ),
+    chess.BISHOP: (
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ),
+    chess.ROOK: (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0,
+    ),
+    chess.QUEEN: (
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20,
+    ),
+    chess.KING: (
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20,
+    ),
+}
+_KING_ENDGAME_ROWS = (
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10, 0, 0, -10, -20, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -30, 0, 0, 0, 0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50,
+)
+
+
+def _square_tables(rows):
+    """(백 표, 흑 표)를 chess.A1 = 0 칸 번호로 변환하고 기물 가치를 더함"""
+    white = [rows[square ^ 56] for square in chess.SQUARES]
+    black = [rows[square] for square in chess.SQUARES]
+    return white, black
+
+
+PST = {piece_type: _square_tables(rows) for piece_type, rows in _PST_ROWS.items()}
+KING_ENDGAME_PST = _square_tables(_KING_ENDGAME_ROWS)
+
+
+def evaluate(board):
+    """차례인 쪽 기준 점수 (센티폰)"""
+    endgame = not board.queens
+    score = 0
+    for piece_type in chess.PIECE_TYPES:
+        value = PIECE_VALUES[piece_type]
+        white_table, black_table = KING_ENDGAME_PST if endgame and piece_type == chess.KING else PST[piece_type]
+        for square in chess.scan_forward(board.pieces_mask(piece_type, chess.WHITE)):
+            score += value + white_table[square]
+        for square in chess.scan_forward(board.pieces_mask(piece_type, chess.BLACK)):
+            score -= value + black_table[square]
+    return score if board.turn == chess.WHITE else -score
+
+
+class SearchResult(NamedTuple):
+    move: Optional[chess.Move]
+    score: int  # 차례인 쪽 기준 센티폰 (메이트는 ±MATE 근처)
+    depth: int
+    nodes: int
+    elapsed: float
+
+    @property
+    def nps(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+
+class _Timeout(Exception):
+    pass
+
+
+_EXACT, _LOWER, _UPPER = 0, 1, 2
+
+
+class Engine:
+    """반복 심화 알파-베타 탐색기 (치환표는 search 호출 사이에도 유지)
+
+    탐색 중 상태(노드 수, 킬러 수, 제한 시간)는 search 호출마다 _Search에 따로 두므로,
+    여러 세션이 한 엔진을 함께 써도 서로 막지 않음 (치환표 dict만 공유)
+    """
+
+    def __init__(self, max_tt_entries=100_000):
+        self.max_tt_entries = max_tt_entries  # 항목당 ~200바이트, 10만 개면 ~20MB
+        self.tt = {}
+
+    def search(self, board, time_limit=1.0, max_depth=64):
+        # 수순(move_stack)을 유지한 채 복사해야 게임에서 이미 나온 포지션으로 돌아가는 반복을 알 수 있음
+        return _Search(self, time_limit).run(board.copy(), max_depth)
+
+    def rank_moves(self, board, limit=3, time_limit=0.5):
+        """합법 수마다 정지 탐색(잡고 다시 잡는 수를 끝까지 따라감) 점수를 매겨 상위 limit개 [(수, 둘 차례 기준 센티폰)]
+
+        시간 안에 모든 수를 보지 못하면 일부만 비교한 순위가 되므로 [] 반환
+        """
+        search = _Search(self, time_limit)
+        board = board.copy()
+        scored = []
+        try:
+            for move in list(board.legal_moves):
+                board.push(move)
+                if board.is_checkmate():
+                    score = MATE - 1
+                elif board.is_stalemate() or board.is_insufficient_material():
+                    score = 0
+                else:
+                    score = -search._quiescence(board, -INF, INF, 1)
+                scored.append((move, score))
+                board.pop()
+        except _Timeout:
+            return []
+        scored.sort(key=lambda item: -item[1])
+        return scored[:limit]
+
+
+def _tt_score(score, ply):
+    """메이트 점수를 '현재 노드에서 메이트까지 남은 수' 기준으로 바꿔 저장 (다른 깊이에서 꺼내도 같은 뜻)"""
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _from_tt_score(score, ply):
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+class _Search:
+    """search 한 번의 상태"""
+
+    def __init__(self, engine, time_limit):
+        self.engine = engine
+        self.tt = engine.tt
+        self.nodes = 0
+        self.killers = {}
+        self.deadline = time.perf_counter() + time_limit
+
+    def run(self, board, max_depth):
+        start = time.perf_counter()
+        best = SearchResult(next(iter(board.legal_moves), None), 0, 0, 0, 0.0)
+        if best.move is None:
+            return best
+        for depth in range(1, max_depth + 1):
+            try:
+                score = self._negamax(board, depth, -INF, INF, 0)
+            except _Timeout:
+                break
+            entry = self.tt.get(chess.polyglot.zobrist_hash(board))
+            move = entry[3] if entry and entry[3] else best.move
+            best = SearchResult(move, score, depth, self.nodes, time.perf_counter() - start)
+            if abs(score) >= MATE - max_depth:  # 메이트를 찾았으면 더 깊이 볼 필요 없음
+                break
+        return best._replace(nodes=self.nodes, elapsed=time.perf_counter() - start)
+
+    def _tick(self):
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.perf_counter() > self.deadline:
+            raise _Timeout
+
+    def _ordered(self, board, moves, tt_move, ply):
+        killers = self.killers.get(ply, ())
+
+        def priority(move):
+            if move == tt_move:
+                return 1_000_000
+            if board.is_capture(move):
+                victim = board.piece_type_at(move.to_square) or chess.PAWN  # 앙파상
+                attacker = board.piece_type_at(move.from_square)
+                return 100_000 + PIECE_VALUES[victim] * 10 - PIECE_VALUES[attacker] // 10
+            if move.promotion:
+                return 90_000 + PIECE_VALUES[move.promotion]
+            if move in killers:
+                return 80_000
+            return 0
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        self._tick()
+        # 탐색 경로나 실제 게임 수순에서 이미 나온 포지션으로 돌아가면 무승부로 봄 (반복으로 비기는 수를 피하거나 찾음)
+        if ply and (board.halfmove_clock >= 100 or board.is_insufficient_material() or board.is_repetition(2)):
+            return 0
+        if depth <= 0:
+            return self._quiescence(board, alpha, beta, ply)
+
+        key = chess.polyglot.zobrist_hash(board)
+        entry = self.tt.get(key)
+        tt_move = None
+        if entry:
+            entry_depth, flag, entry_score, tt_move = entry
+            entry_score = _from_tt_score(entry_score, ply)
+            if ply and entry_depth >= depth:
+                if flag == _EXACT:
+                    return entry_score
+                if flag == _LOWER and entry_score >= beta:
+                    return entry_score
+                if flag == _UPPER and entry_score <= alpha:
+                    return entry_score
+
+        moves = list(board.legal_moves)
+        if not moves:
+            return -MATE + ply if board.is_check() else 0
+
+        original_alpha = alpha
+        best_score, best_move = -INF, None
+        for move in self._ordered(board, moves, tt_move, ply):
+            board.push(move)
+            score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.pop()
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not board.is_capture(move):
+                    killers = self.killers.setdefault(ply, [])
+                    if move not in killers:
+                        killers.insert(0, move)
+                        del killers[2:]
+                break
+
+        flag = _UPPER if best_score <= original_alpha else _LOWER if best_score >= beta else _EXACT
+        if len(self.tt) >= self.engine.max_tt_entries:
+            self.tt.clear()
+        self.tt[key] = (depth, flag, _tt_score(best_score, ply), best_move)
+        return best_score
+
+    def _quiescence(self, board, alpha, beta, ply):
+        self._tick()
+        stand_pat = evaluate(board)
+        if stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+        for move in self._ordered(board, board.generate_legal_captures(), None, ply):
+            board.push(move)
+            score = -self._quiescence(board, -beta, -alpha, ply + 1)
+            board.pop()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+
+# ✅ 프로세스 단위 공유 엔진 (chess_manual의 engine_fallback, bitboard_eval의 rank_moves, CLI가 함께 씀)
+# 탐색 상태는 search마다 _Search에 따로 두고 치환표만 공유해서 여러 세션이 동시에 불러도 됨 (My_chess_page만 세션마다 Engine())
+ENGINE = Engine()
+
+
+def engine_fallback(board, time_limit=0.5):
+    """MoveGenerator의 fallback으로 쓰는 함수 (UCI 반환)"""
+    return ENGINE.search(board, time_limit=time_limit).move.uci()
+
+
+# ✅ NPS 벤치마크용 포지션 (시작, 미들게임, 전술, 엔드게임)
+BENCH_POSITIONS = (
+    chess.STARTING_FEN,
+    "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+)
+
+
+def bench(depth=4, positions=BENCH_POSITIONS):
+    """고정 깊이로 탐색해서 (포지션별 결과, 전체 NPS) 반환"""
+    results = []
+    for fen in positions:
+        engine = Engine()
+        results.append((fen, engine.search(chess.Board(fen), time_limit=float("inf"), max_depth=depth)))
+    nodes = sum(result.nodes for _, result in results)
+    elapsed = sum(result.elapsed for _, result in results)
+    return results, nodes / elapsed if elapsed else 0.0
+
+
+if __name__ == "__main__":
+    import sys
+
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    results, nps = bench(depth)
+    for fen, result in results:
+        print(f"♟️ {fen}")
+        print(f"   깊이 {result.depth}: {result.move} ({result.score:+d}), {result.nodes:,} 노드, {result.elapsed:.2f}s, {result.nps:,.0f} nps")
+    print(f"🚀 전체 {nps:,.0f} nodes/s")
+
+    timed = ENGINE.search(chess.Board(BENCH_POSITIONS[1]), time_limit=1.0)
+    print(f"⏱️ 1초 제한: 깊이 {timed.depth}까지 완료, {timed.move} ({timed.score:+d}), {timed.elapsed:.2f}s")
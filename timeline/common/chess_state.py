@@ -0,0 +1,150 @@
+"""
+LangGraph 상태로 들고 다니는 살아 있는 보드 (노드마다 FEN을 다시 파싱하지 않음)
+
+- My_chess_page의 ai_move/user_move가 노드에 들어올 때마다 chess.Board(state["fen"])를 만들고,
+  노드마다 is_check/is_checkmate/is_stalemate를 다시 계산해서 새 state dict에 넣던 것을 대체
+- LiveBoard는 chess.Board 하나를 감싸고(복사하지 않음) push/pop으로만 바꿈
+  → 수순(move_stack)은 그대로 이어지고, 게임 상태 플래그는 처음 물어볼 때 한 번 계산해서 다음 push/pop까지 캐시
+- 체크메이트/스테일메이트 판정은 합법 수를 첫 번째 하나만 생성해서 확인 (세 플래그를 합법 수 생성 한 번으로 계산)
+
+사용 예:
+    state = {"game": LiveBoard(st.session_state.board), "current_node": "user_move"}
+    game = state["game"]
+    game.push_uci("e2e4")
+    if game.is_checkmate: ...
+
+벤치마크:
+    python chess_state.py
+"""
+
+import chess
+
+
+class LiveBoard:
+    """chess.Board + push/pop 때만 무효화되는 게임 상태 플래그 캐시"""
+
+    def __init__(self, board=None):
+        """board: 감쌀 chess.Board (같은 객체를 계속 씀) 또는 FEN 문자열, 없으면 시작 포지션"""
+        if board is None:
+            board = chess.Board()
+        elif isinstance(board, str):
+            board = chess.Board(board)
+        self.board = board
+        self._status = None
+        self._fen = None
+
+    # --------------------------------------------------------
+    # 변경 (캐시 무효화)
+    # --------------------------------------------------------
+    def push(self, move):
+        self.board.push(move)
+        self._status = self._fen = None
+
+    def push_uci(self, uci):
+        move = self.board.parse_uci(uci)
+        self.push(move)
+        return move
+
+    def push_san(self, san):
+        move = self.board.parse_san(san)
+        self.push(move)
+        return move
+
+    def pop(self):
+        move = self.board.pop()
+        self._status = self._fen = None
+        return move
+
+    # --------------------------------------------------------
+    # 조회 (캐시)
+    # --------------------------------------------------------
+    def _flags(self):
+        if self._status is None:
+            check = self.board.is_check()
+            no_moves = not any(self.board.generate_legal_moves())  # 합법 수가 하나라도 나오면 멈춤
+            self._status = {
+                "is_check": check,
+                "is_checkmate": check and no_moves,
+                "is_stalemate": not check and no_moves,
+            }
+        return self._status
+
+    @property
+    def is_check(self):
+        return self._flags()["is_check"]
+
+    @property
+    def is_checkmate(self):
+        return self._flags()["is_checkmate"]
+
+    @property
+    def is_stalemate(self):
+        return self._flags()["is_stalemate"]
+
+    @property
+    def turn(self):
+        return self.board.turn
+
+    @property
+    def move_stack(self):
+        return self.board.move_stack
+
+    def fen(self):
+        if self._fen is None:
+            self._fen = self.board.fen()
+        return self._fen
+
+    def peek(self):
+        return self.board.peek()
+
+    def status(self):
+        """예전 state dict와 같은 키 (화면 출력/로그용)"""
+        return {
+            "fen": self.fen(),
+            "current_turn": "user" if self.board.turn == chess.WHITE else "AI",
+            **self._flags(),
+        }
+
+    def __repr__(self):
+        flags = self._flags()
+        marks = [name[3:] for name, value in flags.items() if value]
+        return f"LiveBoard({self.fen()!r}{', ' + ', '.join(marks) if marks else ''})"
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    # 게임 하나를 두면서 한 수마다 노드 3번(user_move/ai_move → check_status) 지나가는 상황 비교
+    rng = random.Random(0)
+    games, plies = 50, 0
+    fen_ms = live_ms = 0.0
+    for _ in range(games):
+        board = chess.Board()
+        game = LiveBoard(board.copy())
+        while not board.is_game_over() and board.ply() < 150:
+            move = rng.choice(list(board.legal_moves))
+            plies += 1
+
+            # 예전 방식: 노드마다 FEN 파싱 + 상태 재계산
+            start = time.perf_counter()
+            for _ in range(3):
+                parsed = chess.Board(board.fen())
+                flags = (parsed.is_check(), parsed.is_checkmate(), parsed.is_stalemate())
+            board.push(move)
+            parsed = chess.Board(board.fen())
+            flags = (parsed.is_check(), parsed.is_checkmate(), parsed.is_stalemate())
+            fen_ms += (time.perf_counter() - start) * 1000
+
+            # LiveBoard: 같은 객체를 넘기고 플래그는 push 뒤 한 번만 계산
+            start = time.perf_counter()
+            for _ in range(3):
+                live_flags = (game.is_check, game.is_checkmate, game.is_stalemate)
+            game.push(move)
+            live_flags = (game.is_check, game.is_checkmate, game.is_stalemate)
+            live_ms += (time.perf_counter() - start) * 1000
+            assert flags == live_flags
+
+    print(f"♟️ {games}게임 / {plies:,}수")
+    print(f"🐢 FEN 파싱 + 노드마다 상태 재계산: {fen_ms / plies * 1000:.0f} µs/수")
+    print(f"⚡ LiveBoard: {live_ms / plies * 1000:.0f} µs/수 ({fen_ms / live_ms:.1f}배)")
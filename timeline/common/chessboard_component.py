@@ -0,0 +1,85 @@
+"""
+브라우저에서 그리는 체스 보드 Streamlit 컴포넌트
+
+- update_board가 rerun마다 chess.svg.board SVG 전체(수십 KB)를 st.markdown(unsafe_allow_html=True)로 보내던 것을 대체
+- 서버는 기물 배치 FEN + 마지막 수 + 체크 칸(100바이트 안팎)만 보내고, 그리기/이동 애니메이션은 브라우저에서 처리
+  (프런트엔드: chessboard_frontend/index.html, 빌드 없이 정적 파일로 제공되고 브라우저가 캐시함)
+- 같은 key로 호출하면 iframe이 유지되어 인자만 바뀌고, 바뀐 마지막 수를 애니메이션으로 보여줌
+  (한 실행에서 같은 key는 한 번만 쓸 수 있으므로, 입력을 처리한 뒤 실행마다 한 번만 그려야 함)
+- CHESSBOARD_MODE=svg 로 기존 SVG 방식으로 되돌릴 수 있음
+
+사용 예:
+    with board_placeholder:
+        render_board(st.session_state.board, size=350, key="board")
+
+수당 전송량 비교:
+    python chessboard_component.py
+"""
+
+import json
+import os
+
+import chess
+import chess.svg
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chessboard_frontend")
+
+_component = None
+
+
+def _get_component():
+    global _component
+    if _component is None:
+        import streamlit.components.v1 as components
+
+        _component = components.declare_component("chessboard", path=FRONTEND_DIR)
+    return _component
+
+
+def board_args(board, size=350):
+    """컴포넌트로 보내는 인자 (기물 배치, 마지막 수, 체크 당한 킹의 칸, 크기)"""
+    check = chess.square_name(board.king(board.turn)) if board.is_check() else None
+    return {
+        "fen": board.board_fen(),
+        "lastmove": board.peek().uci() if board.move_stack else None,
+        "check": check,
+        "size": size,
+    }
+
+
+def svg_markdown(board, size=350):
+    """기존 update_board가 보내던 HTML (SVG 전체 포함)"""
+    svg = chess.svg.board(board=board, size=size)
+    return f'<div style="width: {size}px; height: {size}px;">{svg}</div>'
+
+
+def render_board(board, size=350, key=None, mode=None):
+    """mode: "component"(기본값) 또는 "svg" (기본값은 CHESSBOARD_MODE 환경 변수)"""
+    import streamlit as st
+
+    mode = mode or os.getenv("CHESSBOARD_MODE", "component")
+    if mode == "svg":
+        st.markdown(svg_markdown(board, size), unsafe_allow_html=True)
+        return None
+    return _get_component()(**board_args(board, size), key=key, default=None)
+
+
+if __name__ == "__main__":
+    import random
+
+    # 한 판(40수) 동안 수마다 서버가 보내는 보드 데이터 크기
+    rng = random.Random(0)
+    board = chess.Board()
+    svg_bytes, component_bytes, moves = 0, 0, 0
+    for _ in range(40):
+        if board.is_game_over():
+            break
+        board.push(rng.choice(list(board.legal_moves)))
+        svg_bytes += len(svg_markdown(board).encode("utf-8"))
+        component_bytes += len(json.dumps(board_args(board)).encode("utf-8"))
+        moves += 1
+
+    frontend_bytes = os.path.getsize(os.path.join(FRONTEND_DIR, "index.html"))
+    print(f"🐢 SVG markdown: {svg_bytes / moves:,.0f} bytes/수")
+    print(f"🚀 컴포넌트 인자: {component_bytes / moves:,.0f} bytes/수 (프런트엔드 {frontend_bytes:,} bytes는 처음 한 번만 로드)")
+    print(f"📉 {moves}수 기준 {svg_bytes / component_bytes:.0f}배 감소")
@@ -0,0 +1,264 @@
+"""
+감정 어휘 사전 기반 Aho–Corasick 멀티 패턴 매처
+
+- emotional_response_tool에서 단어 목록마다 `word in user_input.lower()`를 반복하던 방식을 대체
+- 파일(data/emotion_lexicon_ko.tsv)에서 어휘를 읽고, 용언은 활용형(슬퍼/슬펐/슬픈 등)까지 자동으로 펼침
+- 입력을 한 번만 훑으면서 감정 범주별 점수를 계산 (어휘 수와 관계없이 입력 길이에 비례)
+
+사용 예:
+    matcher = load_default_matcher()
+    category, score = matcher.classify("오늘 너무 슬펐어")  # ("sad", 2.0)
+
+벤치마크:
+    python emotion_matcher.py
+"""
+
+import os
+import random
+import re
+import time
+from collections import deque
+
+DEFAULT_LEXICON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "emotion_lexicon_ko.tsv")
+
+# ✅ 점수가 같을 때 우선하는 순서 (기존 툴의 if/elif 순서와 동일)
+CATEGORIES = ("sad", "happy", "angry", "worried")
+
+# ✅ 부정 표현 ("안 좋아", "좋지 않아", "못 참겠어" 등)
+_NEGATION_BEFORE = ("안 ", "못 ", "안", "못")
+_NEGATION_AFTER = re.compile(r"\s*지?\s*(않|못)")
+
+# ✅ 한 음절 어간에 붙여서 패턴으로 사용할 어미 (좋 → 좋아, 좋은, ...)
+_SHORT_STEM_ENDINGS = ("다", "아", "어", "았", "었", "은", "고", "네", "지", "게", "음")
+
+_HANGUL_BASE = 0xAC00
+_JONG_NIEUN, _JONG_RIEUL, _JONG_BIEUP, _JONG_SSANGSIOT = 4, 8, 17, 20
+
+
+def _decompose(syllable):
+    code = ord(syllable) - _HANGUL_BASE
+    if not 0 <= code < 11172:
+        return None
+    return code // 588, (code % 588) // 28, code % 28
+
+
+def _compose(lead, vowel, tail=0):
+    return chr(_HANGUL_BASE + (lead * 21 + vowel) * 28 + tail)
+
+
+# ✅ 어간 끝 모음 + 어/아 축약 (ㅡ 탈락은 앞 음절 모음에 따라 결정)
+_CONTRACTION = {20: 6, 8: 9, 13: 14, 11: 10, 0: 0, 1: 1, 4: 4, 5: 5, 6: 6}
+
+
+def conjugation_forms(term):
+    """사전형 용언('슬프다')을 매칭용 활용형 패턴 집합으로 변환. 용언이 아니면 그대로 반환"""
+    if not term.endswith("다") or len(term) < 2:
+        return {term}
+
+    stem = term[:-1]
+    head, last = stem[:-1], stem[-1]
+    forms = {stem}
+    jamo = _decompose(last)
+
+    if last == "하":
+        if len(head) >= 2:  # 우울하다 → '우울' 하나로 우울해/우울했/우울한 모두 매칭
+            forms.add(head)
+        forms |= {head + "해", head + "했", head + "한"}
+    elif jamo:
+        lead, vowel, tail = jamo
+        if tail == 0:
+            forms.add(head + _compose(lead, vowel, _JONG_NIEUN))  # 관형형: 지친, 슬픈
+            if vowel == 18:  # ㅡ 탈락: 슬프 → 슬퍼, 아프 → 아파
+                prev = _decompose(head[-1]) if head else None
+                contracted = 0 if prev and prev[1] in (0, 8) else 4
+            else:
+                contracted = _CONTRACTION.get(vowel)
+            if contracted is not None:
+                forms.add(head + _compose(lead, contracted))  # 지쳐, 슬퍼
+                forms.add(head + _compose(lead, contracted, _JONG_SSANGSIOT))  # 지쳤, 슬펐
+        elif tail == _JONG_RIEUL:  # ㄹ 탈락: 힘들 → 힘든
+            forms.add(head + _compose(lead, vowel, _JONG_NIEUN))
+        elif tail == _JONG_BIEUP:  # ㅂ 불규칙: 외롭 → 외로워, 외로웠, 외로운
+            base = head + _compose(lead, vowel)
+            forms |= {base + "워", base + "웠", base + "운"}
+
+    if len(stem) == 1:  # 한 음절 어간은 오탐이 많으므로 어미를 붙인 형태만 사용
+        forms = {stem + ending for ending in _SHORT_STEM_ENDINGS}
+    return {form for form in forms if len(form) >= 2}
+
+
+class AhoCorasick:
+    """여러 패턴을 한 번의 입력 순회로 찾는 Aho–Corasick 오토마톤"""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+
+        for index, pattern in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            self._out[node] += (index,)
+
+        # BFS로 실패 링크 생성, 출력은 긴 패턴이 먼저 오도록 정렬
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+        self._out = [tuple(sorted(out, key=lambda i: -len(self.patterns[i]))) for out in self._out]
+
+    def iter_matches(self, text):
+        """(끝 위치, 패턴 index)를 끝 위치 순서대로 반환"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for pos, ch in enumerate(text, 1):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for index in out[node]:
+                yield pos, index
+
+
+class EmotionMatcher:
+    """감정 어휘 사전으로 입력의 감정 범주별 점수를 계산"""
+
+    def __init__(self, lexicon):
+        """lexicon: (어휘, 범주, 가중치) 목록"""
+        entries = {}
+        for term, category, weight in lexicon:
+            for form in conjugation_forms(term.lower()):
+                if weight > entries.get(form, (None, 0.0))[1]:
+                    entries[form] = (category, weight)
+        self.entries = entries
+        self._patterns = list(entries)
+        self._automaton = AhoCorasick(self._patterns)
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_LEXICON):
+        lexicon = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line.strip() or line.startswith("#"):
+                    continue
+                term, category, weight = line.split("\t")
+                lexicon.append((term, category, float(weight)))
+        return cls(lexicon)
+
+    def matches(self, text):
+        """겹치는 매칭 중 가장 긴 것만 남긴 (시작, 끝, 범주, 가중치, 부정 여부) 목록"""
+        text = text.lower()
+        accepted = []
+        last_end = -1
+        for end, index in self._automaton.iter_matches(text):
+            if end == last_end:
+                continue  # 같은 위치에서 끝나는 더 짧은 패턴은 건너뜀
+            last_end = end
+            start = end - len(self._patterns[index])
+            if accepted and start <= accepted[-1][0]:
+                accepted.pop()  # 앞의 매칭을 포함하는 더 긴 매칭 (짜증 → 짜증나)
+            elif accepted and start < accepted[-1][1]:
+                continue  # 부분적으로 겹치는 매칭은 앞의 것을 유지
+            category, weight = self.entries[self._patterns[index]]
+            negated = text[max(0, start - 2):start].endswith(_NEGATION_BEFORE) or bool(_NEGATION_AFTER.match(text, end))
+            accepted.append((start, end, category, weight, negated))
+        return accepted
+
+    def scores(self, text):
+        """범주별 점수와 부정 표현으로 제외된 매칭 수를 반환"""
+        scores = dict.fromkeys(CATEGORIES, 0.0)
+        negated = 0
+        for _, _, category, weight, is_negated in self.matches(text):
+            if is_negated:
+                negated += 1
+            else:
+                scores[category] = scores.get(category, 0.0) + weight
+        return scores, negated
+
+    def classify(self, text):
+        """가장 점수가 높은 범주와 점수를 반환. 매칭이 없으면 (None, 0.0)"""
+        scores, _ = self.scores(text)
+        category = max(CATEGORIES, key=lambda c: (scores[c], -CATEGORIES.index(c)))
+        if scores[category] <= 0:
+            return None, 0.0
+        return category, scores[category]
+
+
+_default_matcher = None
+
+
+def load_default_matcher():
+    """기본 사전으로 만든 매처를 한 번만 생성해서 재사용"""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = EmotionMatcher.from_file()
+    return _default_matcher
+
+
+# ------------------------------------------------------------
+# 벤치마크: 기존 `any(word in user_input.lower() ...)` 스캔 vs Aho–Corasick
+# ------------------------------------------------------------
+def _naive_classify(text, words_by_category):
+    for category, words in words_by_category.items():
+        if any(word in text.lower() for word in words):
+            return category
+    return None
+
+
+def _random_word(rng):
+    return "".join(chr(_HANGUL_BASE + rng.randrange(11172)) for _ in range(rng.randint(2, 4)))
+
+
+def benchmark(sizes=(100, 1000, 5000, 10000), repeat=200):
+    rng = random.Random(0)
+    texts = [
+        "오늘 하루 정말 최악이었어. 너무 힘들다.",
+        "이 영화는 내 인생 최고의 영화야! 너무 감동적이야.",
+        "내일 발표가 있는데 너무 떨려서 잠이 안 와",
+        "그냥 평범한 하루였어. 점심은 김치찌개 먹었고 오후에는 회의가 길었어.",
+    ]
+    print(f"{'lexicon':>8} | {'naive any() (µs/입력)':>22} | {'aho-corasick (µs/입력)':>24} | 빌드(ms)")
+    for size in sizes:
+        lexicon = [(_random_word(rng), rng.choice(CATEGORIES), 1.0) for _ in range(size)]
+        words_by_category = {c: [t for t, cat, _ in lexicon if cat == c] for c in CATEGORIES}
+
+        start = time.perf_counter()
+        matcher = EmotionMatcher(lexicon)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for text in texts:
+                _naive_classify(text, words_by_category)
+        naive_us = (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for text in texts:
+                matcher.classify(text)
+        ac_us = (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+        print(f"{size:>8} | {naive_us:>22.1f} | {ac_us:>24.1f} | {build_ms:.1f}")
+
+
+if __name__ == "__main__":
+    matcher = load_default_matcher()
+    print(f"기본 사전: 패턴 {len(matcher.entries)}개")
+    for sample in ["오늘 너무 슬펐어", "요즘 너무 지쳐", "기분이 안 좋아", "완전 빡쳤어", "시험 때문에 너무 불안해", "그냥 평범한 하루"]:
+        print(f"  {sample} → {matcher.classify(sample)}")
+    print()
+    benchmark()
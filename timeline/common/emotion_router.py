@@ -0,0 +1,137 @@
+"""
+에이전트 앞단의 감정 대화 fast path 라우터
+
+- emotional_response_tool이 호출될 만한 "순수한 감정 표현" 입력은 agent.invoke 없이 바로 답변
+  (ReAct 루프의 툴 선택 + 최종 답변 작성, 최소 2번의 LLM 호출을 생략)
+- 질문/요청이 섞여 있거나 확신도가 낮으면 기존처럼 에이전트로 넘김
+- 모든 라우팅 결과를 JSONL로 기록해서 절약한 LLM 호출 수를 집계
+
+사용 예:
+    router = EmotionRouter(load_default_matcher(), emotional_response_tool.func)
+    decision = router.route(user_input, thread_id)
+    ai_response = decision.reply if decision.route == "fast" else agent.invoke(...)
+
+로그 요약:
+    python emotion_router.py route_log.jsonl
+"""
+
+import json
+import sys
+import threading
+import time
+from typing import NamedTuple, Optional
+
+# ✅ 정보 요청/명령이 섞인 입력은 에이전트가 처리해야 함
+REQUEST_CUES = (
+    "?", "검색", "알려", "찾아", "뭐야", "뭐지", "언제", "어디", "누구", "얼마",
+    "추천", "설명", "해줘", "해 줘", "기억", "번역", "요약", "http",
+)
+
+# ✅ 같은 답변을 쓰는 감정 범주 묶음 (슬픔/분노/걱정은 모두 위로하는 답변)
+POLARITY = {"sad": "negative", "angry": "negative", "worried": "negative", "happy": "positive"}
+
+# ✅ ReAct 에이전트가 감정 툴을 쓸 때 최소 LLM 호출 수 (툴 선택 1 + 최종 답변 1)
+LLM_CALLS_PER_AGENT_TURN = 2
+
+
+class RouteDecision(NamedTuple):
+    route: str  # "fast" 또는 "agent"
+    category: Optional[str]
+    confidence: float
+    reason: str
+    reply: str = ""
+
+
+class EmotionRouter:
+    """감정 매처 점수로 입력을 fast path / 에이전트로 분류"""
+
+    def __init__(self, matcher, responder, threshold=0.75, max_length=60, log_path="route_log.jsonl"):
+        self.matcher = matcher
+        self.responder = responder  # 감정 범주에 맞는 답변을 만드는 함수 (emotional_response_tool.func)
+        self.threshold = threshold
+        self.max_length = max_length
+        self.log_path = log_path
+        self._lock = threading.Lock()
+
+    def classify(self, text):
+        """(범주, 확신도, 사유) 반환"""
+        if len(text) > self.max_length:
+            return None, 0.0, "long_input"
+        lowered = text.lower()
+        if any(cue in lowered for cue in REQUEST_CUES):
+            return None, 0.0, "request"
+
+        scores, negated = self.matcher.scores(text)
+        total = sum(scores.values())
+        if total <= 0:
+            return None, 0.0, "no_emotion"
+
+        polarity = {}
+        for category, score in scores.items():
+            key = POLARITY.get(category, category)
+            polarity[key] = polarity.get(key, 0.0) + score
+        dominant = max(polarity, key=polarity.get)
+        category = max((c for c in scores if POLARITY.get(c, c) == dominant), key=scores.get)
+        # 한 방향(긍정/부정)에 집중될수록, 감정 어휘가 많을수록 확신도가 높아짐 (부정 표현이 있으면 낮춤)
+        confidence = polarity[dominant] / total * min(1.0, total / 2.0) / (1 + negated)
+        return category, confidence, "emotion"
+
+    def route(self, text, thread_id=None):
+        start = time.perf_counter()
+        category, confidence, reason = self.classify(text)
+
+        decision = RouteDecision("agent", category, confidence, reason)
+        if reason == "emotion":
+            if confidence < self.threshold:
+                decision = decision._replace(reason="low_confidence")
+            else:
+                reply = self.responder(text)
+                if reply:
+                    decision = RouteDecision("fast", category, confidence, reason, reply)
+                else:
+                    decision = decision._replace(reason="empty_reply")
+
+        self._log(thread_id, text, decision, (time.perf_counter() - start) * 1e6)
+        return decision
+
+    def _log(self, thread_id, text, decision, latency_us):
+        if not self.log_path:
+            return
+        record = {
+            "ts": time.time(),
+            "thread_id": thread_id,
+            "route": decision.route,
+            "category": decision.category,
+            "confidence": round(decision.confidence, 3),
+            "reason": decision.reason,
+            "chars": len(text),
+            "latency_us": round(latency_us, 1),
+        }
+        with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def summarize_log(path="route_log.jsonl"):
+    """라우팅 로그에서 fast path 비율과 절약한 LLM 호출 수를 계산"""
+    total = fast = 0
+    reasons = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            total += 1
+            fast += record["route"] == "fast"
+            reasons[record["reason"]] = reasons.get(record["reason"], 0) + 1
+    return {
+        "turns": total,
+        "fast_turns": fast,
+        "fast_ratio": fast / total if total else 0.0,
+        "avoided_llm_calls": fast * LLM_CALLS_PER_AGENT_TURN,
+        "reasons": reasons,
+    }
+
+
+if __name__ == "__main__":
+    summary = summarize_log(sys.argv[1] if len(sys.argv) > 1 else "route_log.jsonl")
+    print(f"📊 전체 턴: {summary['turns']}, fast path: {summary['fast_turns']} ({summary['fast_ratio']:.1%})")
+    print(f"💰 절약한 LLM 호출 (추정): {summary['avoided_llm_calls']}회")
+    print(f"🔎 사유별: {summary['reasons']}")
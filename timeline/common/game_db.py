@@ -0,0 +1,508 @@
+"""
+로컬 PGN 게임 데이터베이스 (search_chess_knowledge_tool의 백엔드)
+
+- 시뮬레이션 문자열만 반환하던 search_chess_knowledge_tool을 실제 기보 검색으로 대체
+- 큰 PGN 파일도 스트리밍으로 읽어서 sqlite에 저장 (N게임씩 묶어 워커 프로세스들이 파싱, 변형/주석은 건너뜀, 묶음마다 한 트랜잭션)
+- 수순은 수당 16비트(출발 칸 6 + 도착 칸 6 + 승급 3)로 인코딩한 BLOB 하나로 저장
+- 포지션 인덱스: (Zobrist 해시, 게임, ply, 다음 수) → "이 포지션에 도달한 게임"과 승/무/패, 다음 수 통계를 한 번의 인덱스 조회로 계산
+  (해시는 opening_book.py와 같은 chess.polyglot.zobrist_hash 값, 기본적으로 게임당 앞 60 ply만 인덱싱)
+- 인제스트 때는 해시를 매 포지션 처음부터 계산하지 않고 수마다 바뀐 기물만 XOR로 갱신
+- SetUp/FEN 헤더가 있는 게임은 시작 포지션(start_fen)도 저장해서 replay가 그 포지션부터 재생
+- 게임마다 (선수, 대회, 날짜, 결과, 시작 포지션, 수순)의 해시를 저장해서 같은 PGN을 다시 넣어도 중복 저장하지 않음
+- 기본 DB는 data/에 쓸 수 없으면 CHESS_CACHE_DIR(기본값 임시 폴더/chess-chatbot)에 만들고,
+  동봉된 작은 PGN만 현재 프로세스에서 넣음 (큰 PGN은 미리 `python game_db.py ingest`로 빌드)
+
+사용 예:
+    db = get_game_db()
+    db.position_stats(board)   # {"games": 120, "white": 48, "draw": 40, "black": 32, "moves": [...]}
+    db.search_players("Carlsen")
+
+인제스트/벤치마크:
+    python game_db.py ingest games.pgn [...]
+    python game_db.py bench          # 랜덤 게임 PGN을 만들어서 games/s, 조회 지연 시간 측정
+"""
+
+import hashlib
+import io
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import chess
+import chess.pgn
+import chess.polyglot
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_DB = os.getenv("GAME_DB", os.path.join(DATA_DIR, "games.sqlite3"))
+DEFAULT_PGN = os.path.join(DATA_DIR, "openings.pgn")
+CACHE_DIR = os.getenv("CHESS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "chess-chatbot"))
+
+RESULTS = {"1-0": 1, "1/2-1/2": 0, "0-1": -1}
+_RESULT_KEYS = {1: "white", 0: "draw", -1: "black"}
+
+
+# ------------------------------------------------------------
+# 16비트 수 인코딩
+# ------------------------------------------------------------
+def encode_move16(move):
+    """출발 칸(0~5비트) | 도착 칸(6~11비트) | 승급 기물(12~14비트, 0 = 없음)"""
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+
+def decode_move16(value):
+    return chess.Move(value & 0x3F, value >> 6 & 0x3F, value >> 12 or None)
+
+
+def pack_moves(moves):
+    return struct.pack(f"<{len(moves)}H", *(encode_move16(move) for move in moves))
+
+
+def unpack_moves(blob):
+    return [decode_move16(value) for value in struct.unpack(f"<{len(blob) // 2}H", blob)]
+
+
+def game_digest(white, black, event, date, result, start_fen, blob):
+    """중복 게임 판별용 해시 (DB에 저장하는 값만 사용해서 기존 행도 같은 방식으로 채울 수 있음)"""
+    header = "\x00".join(str(value) if value is not None else "" for value in (white, black, event, date, result, start_fen))
+    return hashlib.sha256(header.encode("utf-8") + b"\x00" + blob).digest()[:16]
+
+
+def _signed64(value):
+    """sqlite INTEGER는 부호 있는 64비트라서 Zobrist 해시를 변환해서 저장"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+# ------------------------------------------------------------
+# 증분 Zobrist 해시 (chess.polyglot.zobrist_hash와 같은 값)
+# ------------------------------------------------------------
+_HASHER = chess.polyglot.ZobristHasher(chess.polyglot.POLYGLOT_RANDOM_ARRAY)
+_ARRAY = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+
+
+def _piece_key(piece_type, color, square):
+    return _ARRAY[64 * ((piece_type - 1) * 2 + int(color)) + square]
+
+
+class IncrementalZobrist:
+    """기물 배치 부분의 해시를 수마다 갱신 (zobrist_hash는 매번 64칸을 모두 훑어서 인제스트 시간의 절반을 차지했음)"""
+
+    def __init__(self, board):
+        self.pieces = _HASHER.hash_board(board)
+
+    def key(self, board):
+        return self.pieces ^ _HASHER.hash_castling(board) ^ _HASHER.hash_ep_square(board) ^ _HASHER.hash_turn(board)
+
+    def update(self, board, move):
+        """board.push(move) 직전에 호출"""
+        color = board.turn
+        piece_type = board.piece_type_at(move.from_square)
+        pieces = self.pieces ^ _piece_key(piece_type, color, move.from_square)
+        if board.is_castling(move):
+            rank = chess.square_rank(move.from_square)
+            king_file, rook_from, rook_to = (6, 7, 5) if board.is_kingside_castling(move) else (2, 0, 3)
+            pieces ^= _piece_key(chess.KING, color, chess.square(king_file, rank))
+            pieces ^= _piece_key(chess.ROOK, color, chess.square(rook_from, rank))
+            pieces ^= _piece_key(chess.ROOK, color, chess.square(rook_to, rank))
+        else:
+            captured_square = move.to_square
+            if board.is_en_passant(move):
+                captured_square += -8 if color == chess.WHITE else 8
+            captured = board.piece_type_at(captured_square)
+            if captured:
+                pieces ^= _piece_key(captured, not color, captured_square)
+            pieces ^= _piece_key(move.promotion or piece_type, color, move.to_square)
+        self.pieces = pieces
+
+
+# ------------------------------------------------------------
+# PGN 스트리밍 파싱 (메인라인만)
+# ------------------------------------------------------------
+class _MainlineVisitor(chess.pgn.BaseVisitor):
+    """헤더 + 메인라인 수 + 각 수 직전 포지션 해시만 모으는 visitor (GameNode 트리를 만들지 않음)"""
+
+    def __init__(self, index_plies):
+        self.index_plies = index_plies
+
+    def begin_game(self):
+        self.headers = {}
+        self.moves = []
+        self.hashes = []
+        self.zobrist = None
+        self.error = False
+
+    def visit_header(self, tagname, tagvalue):
+        self.headers[tagname] = tagvalue
+
+    def begin_variation(self):
+        return chess.pgn.SKIP
+
+    def visit_move(self, board, move):
+        if len(self.moves) < self.index_plies:
+            if self.zobrist is None:
+                self.zobrist = IncrementalZobrist(board)
+            self.hashes.append(self.zobrist.key(board))
+            self.zobrist.update(board, move)
+        self.moves.append(move)
+
+    def handle_error(self, error):
+        self.error = True
+
+    def result(self):
+        return self.headers, self.moves, self.hashes, self.error
+
+
+def _iter_game_chunks(f, games_per_chunk):
+    """PGN 파일을 게임 경계(무보 다음에 나오는 헤더 줄)에서 잘라 games_per_chunk개씩 묶은 텍스트로"""
+    lines, games, in_movetext = [], 0, False
+    for line in f:
+        if line.startswith("[") and in_movetext:
+            games += 1
+            in_movetext = False
+            if games >= games_per_chunk:
+                yield "".join(lines)
+                lines, games = [], 0
+        elif line.strip() and not line.startswith(("[", "%", ";")):
+            in_movetext = True
+        lines.append(line)
+    if lines:
+        yield "".join(lines)
+
+
+def _parse_chunk(text, index_plies):
+    """PGN 텍스트 → [(게임 행, 포지션 해시 목록, 다음 수 목록)] (워커 프로세스에서 실행)
+
+    게임 행은 games 테이블의 id를 뺀 나머지 열 순서 (white, black, event, date, eco, result, ply_count, moves, start_fen, digest)
+    """
+    parsed_games = []
+    stream = io.StringIO(text)
+    while True:
+        parsed = chess.pgn.read_game(stream, Visitor=lambda: _MainlineVisitor(index_plies))
+        if parsed is None:
+            break
+        headers, moves, hashes, error = parsed
+        if error or not moves:
+            continue
+        next_moves = [encode_move16(move) for move in moves[: len(hashes)]]
+        blob = pack_moves(moves)
+        start_fen = headers.get("FEN")  # chess.pgn도 SetUp 값과 관계없이 FEN 헤더에서 시작
+        white, black, event, date = (headers.get(name) for name in ("White", "Black", "Event", "Date"))
+        result = RESULTS.get(headers.get("Result"))
+        row = (
+            white, black, event, date, headers.get("ECO"), result, len(moves), blob,
+            start_fen, game_digest(white, black, event, date, result, start_fen, blob),
+        )
+        parsed_games.append((row, [_signed64(key) for key in hashes], next_moves))
+    return parsed_games
+
+
+def _parse_chunks(chunks, index_plies, processes=None):
+    """파싱 결과를 입력 순서대로 생성 (처리 중인 묶음 수를 제한해서 큰 파일도 메모리를 일정하게 유지)"""
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        for chunk in chunks:
+            yield _parse_chunk(chunk, index_plies)
+        return
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_parse_chunk, chunk, index_plies))
+            if len(pending) >= processes * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class GameDatabase:
+    def __init__(self, path=DEFAULT_DB, index_plies=60):
+        self.path = path
+        self.index_plies = index_plies
+        self._local = threading.local()  # Streamlit 스레드마다 연결 하나
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS games (
+                    id INTEGER PRIMARY KEY,
+                    white TEXT, black TEXT, event TEXT, date TEXT, eco TEXT,
+                    result INTEGER,          -- 1 백 승, 0 무승부, -1 흑 승, NULL 미정
+                    ply_count INTEGER,
+                    moves BLOB,              -- 수당 16비트 (encode_move16)
+                    start_fen TEXT,          -- SetUp/FEN 헤더의 시작 포지션, NULL이면 표준 시작 포지션
+                    digest BLOB              -- game_digest (중복 인제스트 방지)
+                );
+                CREATE TABLE IF NOT EXISTS positions (
+                    hash INTEGER NOT NULL,   -- chess.polyglot.zobrist_hash (부호 있는 64비트로 변환)
+                    game_id INTEGER NOT NULL,
+                    ply INTEGER NOT NULL,
+                    next_move INTEGER        -- 이 포지션에서 실제로 둔 수 (encode_move16)
+                );
+                CREATE INDEX IF NOT EXISTS positions_hash ON positions (hash);
+            """)
+            self._migrate(conn)
+
+    def _migrate(self, conn):
+        """start_fen/digest 열이 없던 예전 DB에 열을 추가하고 기존 게임의 digest를 채움"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(games)")}
+        if "start_fen" not in columns:
+            conn.execute("ALTER TABLE games ADD COLUMN start_fen TEXT")
+        if "digest" not in columns:
+            conn.execute("ALTER TABLE games ADD COLUMN digest BLOB")
+            rows = conn.execute("SELECT id, white, black, event, date, result, start_fen, moves FROM games").fetchall()
+            conn.executemany(
+                "UPDATE games SET digest = ? WHERE id = ?",
+                [(game_digest(*row[1:]), row[0]) for row in rows],
+            )
+            # 예전에 같은 PGN을 두 번 넣었으면 먼저 들어간 게임만 남김
+            duplicates = "SELECT id FROM games WHERE id NOT IN (SELECT MIN(id) FROM games GROUP BY digest)"
+            conn.execute(f"DELETE FROM positions WHERE game_id IN ({duplicates})")
+            conn.execute(f"DELETE FROM games WHERE id IN ({duplicates})")
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS games_digest ON games (digest)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    # --------------------------------------------------------
+    # 인제스트
+    # --------------------------------------------------------
+    def ingest(self, pgn_path, batch_games=500, processes=None):
+        """PGN 파일을 스트리밍으로 읽어서 저장하고 새로 저장한 게임 수를 반환 (파싱 오류가 있는 게임, 이미 있는 게임은 건너뜀)
+
+        SAN 해석이 대부분의 시간을 차지하므로 batch_games개씩 묶은 PGN 텍스트를 워커 프로세스들이 파싱하고,
+        이 프로세스는 순서대로 받아서 한 묶음당 한 트랜잭션으로 저장 (processes=1이면 현재 프로세스에서 파싱)
+        """
+        conn = self._connect()
+        next_id = (conn.execute("SELECT MAX(id) FROM games").fetchone()[0] or 0) + 1
+        total = 0
+        with open(pgn_path, "r", encoding="utf-8", errors="replace") as f:
+            for parsed_games in _parse_chunks(_iter_game_chunks(f, batch_games), self.index_plies, processes):
+                digests = [row[-1] for row, _, _ in parsed_games]
+                existing = set()
+                for i in range(0, len(digests), 500):  # sqlite 변수 개수 제한
+                    chunk = digests[i:i + 500]
+                    existing.update(
+                        digest for (digest,) in
+                        conn.execute(f"SELECT digest FROM games WHERE digest IN ({','.join('?' * len(chunk))})", chunk)
+                    )
+                games, positions = [], []
+                for row, hashes, next_moves in parsed_games:
+                    if row[-1] in existing:
+                        continue
+                    existing.add(row[-1])  # 같은 묶음 안의 중복
+                    game_id = next_id + total
+                    games.append((game_id, *row))
+                    positions.extend(
+                        (key, game_id, ply, next_move) for ply, (key, next_move) in enumerate(zip(hashes, next_moves))
+                    )
+                    total += 1
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO games (id, white, black, event, date, eco, result, ply_count, moves, start_fen, digest)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        games,
+                    )
+                    conn.executemany("INSERT INTO positions VALUES (?, ?, ?, ?)", positions)
+        return total
+
+    # --------------------------------------------------------
+    # 조회
+    # --------------------------------------------------------
+    def position_stats(self, board, top_moves=5):
+        """이 포지션에 도달한 게임 수, 승/무/패, 다음 수별 통계
+
+        같은 포지션을 여러 번 지나간 게임도 한 번만 셈 (다음 수별 통계에서는 그 수를 둔 게임마다 한 번)
+        """
+        conn = self._connect()
+        position = _signed64(chess.polyglot.zobrist_hash(board))
+        totals = conn.execute(
+            """
+            SELECT g.result, COUNT(DISTINCT p.game_id)
+            FROM positions p JOIN games g ON g.id = p.game_id
+            WHERE p.hash = ?
+            GROUP BY g.result
+            """,
+            (position,),
+        ).fetchall()
+        rows = conn.execute(
+            """
+            SELECT p.next_move, g.result, COUNT(DISTINCT p.game_id)
+            FROM positions p JOIN games g ON g.id = p.game_id
+            WHERE p.hash = ?
+            GROUP BY p.next_move, g.result
+            """,
+            (position,),
+        ).fetchall()
+
+        stats = {"games": 0, "white": 0, "draw": 0, "black": 0, "moves": []}
+        for result, count in totals:
+            stats["games"] += count
+            if result in _RESULT_KEYS:
+                stats[_RESULT_KEYS[result]] += count
+        moves = {}
+        for next_move, result, count in rows:
+            key = _RESULT_KEYS.get(result)
+            entry = moves.setdefault(next_move, {"games": 0, "white": 0, "draw": 0, "black": 0})
+            entry["games"] += count
+            if key:
+                entry[key] += count
+
+        for value, entry in sorted(moves.items(), key=lambda item: -item[1]["games"])[:top_moves]:
+            move = decode_move16(value)
+            entry["move"] = board.san(move) if board.is_legal(move) else move.uci()
+            stats["moves"].append(entry)
+        return stats
+
+    def games_at(self, board, limit=5):
+        """이 포지션에 도달한 게임 헤더 몇 개"""
+        return self._connect().execute(
+            """
+            SELECT DISTINCT g.id, g.white, g.black, g.event, g.date, g.result
+            FROM positions p JOIN games g ON g.id = p.game_id
+            WHERE p.hash = ? LIMIT ?
+            """,
+            (_signed64(chess.polyglot.zobrist_hash(board)), limit),
+        ).fetchall()
+
+    def search_players(self, text, limit=5):
+        """선수/대회 이름으로 검색"""
+        pattern = f"%{text}%"
+        return self._connect().execute(
+            "SELECT id, white, black, event, date, result FROM games WHERE white LIKE ? OR black LIKE ? OR event LIKE ? LIMIT ?",
+            (pattern, pattern, pattern, limit),
+        ).fetchall()
+
+    def replay(self, game_id):
+        """저장된 게임을 chess.pgn.Game으로 복원"""
+        row = self._connect().execute(
+            "SELECT white, black, event, date, result, moves, start_fen FROM games WHERE id = ?", (game_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        white, black, event, date, result, blob, start_fen = row
+        game = chess.pgn.Game()
+        if start_fen:
+            game.setup(start_fen)  # SetUp/FEN 헤더도 함께 설정
+        game.headers.update({"White": white or "?", "Black": black or "?", "Event": event or "?", "Date": date or "????.??.??"})
+        game.headers["Result"] = {1: "1-0", 0: "1/2-1/2", -1: "0-1"}.get(result, "*")
+        node = game
+        for move in unpack_moves(blob):
+            node = node.add_variation(move)
+        return game
+
+
+_default_db = None
+_default_db_lock = threading.Lock()
+
+
+def _open_default_db():
+    for path in (DEFAULT_DB, os.path.join(CACHE_DIR, os.path.basename(DEFAULT_DB))):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            db = GameDatabase(path)
+            if db.count() == 0 and os.path.exists(DEFAULT_PGN):
+                db.ingest(DEFAULT_PGN, processes=1)  # 동봉된 PGN은 작아서 Streamlit 프로세스 안에서 워커 없이 파싱
+            return db
+        except (OSError, sqlite3.Error) as e:  # 읽기 전용 배포 등
+            print(f"⚠️ 게임 DB를 {path}에 만들 수 없음 ({e})")
+    raise RuntimeError("게임 DB를 만들 수 있는 경로가 없음 (GAME_DB 또는 CHESS_CACHE_DIR 확인)")
+
+
+def get_game_db():
+    """기본 DB (data/games.sqlite3, 쓸 수 없으면 CHESS_CACHE_DIR). 비어 있으면 동봉된 data/openings.pgn을 먼저 넣음"""
+    global _default_db
+    if _default_db is None:
+        with _default_db_lock:
+            if _default_db is None:
+                _default_db = _open_default_db()
+    return _default_db
+
+
+def format_stats(stats):
+    """position_stats 결과를 툴 답변용 한국어 문자열로"""
+    if not stats["games"]:
+        return "데이터베이스에 이 포지션에 도달한 게임이 없음."
+    total = stats["games"]
+    lines = [
+        f"이 포지션에 도달한 게임 {total}개: 백 승 {stats['white'] / total:.0%}, "
+        f"무승부 {stats['draw'] / total:.0%}, 흑 승 {stats['black'] / total:.0%}"
+    ]
+    for entry in stats["moves"]:
+        lines.append(
+            f"- {entry['move']}: {entry['games']}게임 (백 승 {entry['white']} / 무 {entry['draw']} / 흑 승 {entry['black']})"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import random
+    import sys
+    import tempfile
+
+    if len(sys.argv) > 2 and sys.argv[1] == "ingest":
+        db = GameDatabase()
+        for path in sys.argv[2:]:
+            start = time.perf_counter()
+            count = db.ingest(path)
+            elapsed = time.perf_counter() - start
+            print(f"📥 {path}: {count:,}게임, {elapsed:.1f}s ({count / elapsed if elapsed else 0:,.0f} games/s)")
+        sys.exit()
+
+    # 벤치마크: 오프닝 수순 + 랜덤 수로 만든 게임 PGN
+    games = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rng = random.Random(0)
+    with open(DEFAULT_PGN, "r", encoding="utf-8") as f:
+        lines = []
+        while (game := chess.pgn.read_game(f)) is not None:
+            lines.append(list(game.mainline_moves()))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pgn_path = os.path.join(tmp, "bench.pgn")
+        with open(pgn_path, "w", encoding="utf-8") as out:
+            for i in range(games):
+                game = chess.pgn.Game()
+                game.headers["White"], game.headers["Black"] = f"Player{rng.randrange(100)}", f"Player{rng.randrange(100)}"
+                board = chess.Board()
+                node = game
+                for move in rng.choice(lines)[: rng.randrange(4, 16)]:
+                    node = node.add_variation(move)
+                    board.push(move)
+                for _ in range(rng.randrange(40, 100)):
+                    if board.is_game_over():
+                        break
+                    move = rng.choice(list(board.legal_moves))
+                    node = node.add_variation(move)
+                    board.push(move)
+                game.headers["Result"] = rng.choice(["1-0", "0-1", "1/2-1/2"])
+                print(game, file=out, end="\n\n")
+        size = os.path.getsize(pgn_path)
+
+        db = GameDatabase(os.path.join(tmp, "bench.sqlite3"))
+        start = time.perf_counter()
+        count = db.ingest(pgn_path)
+        elapsed = time.perf_counter() - start
+        print(f"📥 인제스트: {count:,}게임 ({size / 1e6:.1f} MB PGN), {elapsed:.1f}s → {count / elapsed:,.0f} games/s")
+        db_size = sum(os.path.getsize(path) for path in (db.path, db.path + "-wal") if os.path.exists(path))
+        print(f"💾 DB 크기: {db_size / 1e6:.1f} MB")
+
+        boards = [chess.Board()]
+        for line in lines[:10]:
+            board = chess.Board()
+            for move in line[:6]:
+                board.push(move)
+            boards.append(board)
+        start = time.perf_counter()
+        for board in boards:
+            stats = db.position_stats(board)
+        query_ms = (time.perf_counter() - start) * 1000 / len(boards)
+        print(f"🔎 포지션 조회: {query_ms:.2f} ms/회 (시작 포지션 {db.position_stats(chess.Board())['games']:,}게임)")
+        print(format_stats(db.position_stats(boards[1])))
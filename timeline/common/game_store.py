@@ -0,0 +1,236 @@
+"""
+체스 게임 저장소 (재시작해도 이어서 둘 수 있도록 게임마다 수순 + 메타데이터를 저장)
+
+- st.session_state.board / chat_history에만 있던 게임을 sqlite 파일(data/game_store.sqlite3)에 보관
+- 수순은 game_db.py와 같은 16비트 인코딩(encode_move16)으로, 수를 둘 때마다 게임의 BLOB 뒤에 2바이트씩 덧붙임
+- snapshot_every ply마다 FEN 스냅샷을 같이 저장 → 임의의 ply 포지션을 "가장 가까운 스냅샷 + 남은 수 몇 개"만 재생해서 복원
+- 채팅 기록도 게임별로 저장해서 새로고침 후에 다시 보여줌
+- 게임 하나가 수백 바이트라서 수천 개의 진행 중/보관 게임도 파일 하나로 관리
+
+사용 예:
+    game_id, board = GAME_STORE.resume(st.query_params.get("game"), app="chess_manual")
+    board.push_uci("e2e4")
+    GAME_STORE.append(game_id, board.peek(), board)
+
+벤치마크:
+    python game_store.py [게임 수]
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import chess
+
+try:
+    from .game_db import decode_move16, encode_move16
+except ImportError:  # python game_store.py 로 직접 실행할 때
+    from game_db import decode_move16, encode_move16
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_STORE = os.getenv("GAME_STORE", os.path.join(DATA_DIR, "game_store.sqlite3"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id TEXT PRIMARY KEY,
+    app TEXT,
+    created REAL, updated REAL,
+    start_fen TEXT NOT NULL,
+    result TEXT,             -- "1-0", "0-1", "1/2-1/2" 또는 NULL(진행 중)
+    ply_count INTEGER NOT NULL DEFAULT 0,
+    moves BLOB NOT NULL,     -- 수당 16비트 (game_db.encode_move16), 리틀 엔디언 (|| 결과는 TEXT라서 BLOB으로 CAST)
+    meta TEXT                -- JSON
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    game_id TEXT NOT NULL,
+    ply INTEGER NOT NULL,
+    fen TEXT NOT NULL,
+    PRIMARY KEY (game_id, ply)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS messages (
+    game_id TEXT NOT NULL,
+    ts REAL,
+    role TEXT,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_game ON messages (game_id);
+CREATE INDEX IF NOT EXISTS games_updated ON games (updated);
+"""
+
+
+class GameStore:
+    def __init__(self, path=DEFAULT_STORE, snapshot_every=20):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self._local = threading.local()  # Streamlit 스레드마다 연결 하나 (파일은 처음 쓸 때 생성)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.executescript(_SCHEMA)
+        return conn
+
+    # --------------------------------------------------------
+    # 쓰기
+    # --------------------------------------------------------
+    def create(self, game_id=None, start_fen=chess.STARTING_FEN, app=None, **meta):
+        """새 게임을 만들고 game_id를 반환"""
+        game_id = game_id or uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO games (id, app, created, updated, start_fen, moves, meta) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (game_id, app, now, now, start_fen, b"", json.dumps(meta, ensure_ascii=False)),
+            )
+        return game_id
+
+    def append(self, game_id, move, board=None):
+        """수 하나를 덧붙이고 새 ply 수를 반환. board(수를 둔 뒤의 포지션)가 주어지면 스냅샷 간격마다 FEN도 저장"""
+        value = encode_move16(move)
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE games SET moves = CAST(moves || ? AS BLOB), ply_count = ply_count + 1, updated = ? WHERE id = ?",
+                (bytes((value & 0xFF, value >> 8)), time.time(), game_id),
+            )
+            row = conn.execute("SELECT ply_count FROM games WHERE id = ?", (game_id,)).fetchone()
+            if row is None:
+                raise KeyError(game_id)
+            ply = row[0]
+            if board is not None and ply % self.snapshot_every == 0:
+                conn.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)", (game_id, ply, board.fen()))
+        return ply
+
+    def finish(self, game_id, result):
+        with self._connect() as conn:
+            conn.execute("UPDATE games SET result = ?, updated = ? WHERE id = ?", (result, time.time(), game_id))
+
+    def add_message(self, game_id, role, text):
+        with self._connect() as conn:
+            conn.execute("INSERT INTO messages VALUES (?, ?, ?, ?)", (game_id, time.time(), role, str(text)))
+
+    # --------------------------------------------------------
+    # 읽기
+    # --------------------------------------------------------
+    def exists(self, game_id):
+        return bool(game_id) and self._connect().execute(
+            "SELECT 1 FROM games WHERE id = ?", (game_id,)
+        ).fetchone() is not None
+
+    def info(self, game_id):
+        row = self._connect().execute(
+            "SELECT app, created, updated, start_fen, result, ply_count, meta FROM games WHERE id = ?", (game_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        app, created, updated, start_fen, result, ply_count, meta = row
+        return {
+            "id": game_id, "app": app, "created": created, "updated": updated,
+            "start_fen": start_fen, "result": result, "ply_count": ply_count, **json.loads(meta or "{}"),
+        }
+
+    def moves(self, game_id, start=0, end=None):
+        """start ~ end ply 사이의 수 목록 (BLOB에서 필요한 부분만 읽음)"""
+        length = -1 if end is None else 2 * max(0, end - start)
+        row = self._connect().execute(
+            "SELECT substr(moves, ?, ?) FROM games WHERE id = ?", (2 * start + 1, length, game_id)
+        ).fetchone()
+        if row is None:
+            raise KeyError(game_id)
+        blob = row[0] or b""
+        return [decode_move16(blob[i] | blob[i + 1] << 8) for i in range(0, len(blob) - 1, 2)]
+
+    def load(self, game_id, ply=None, full_history=False):
+        """ply 시점(기본값: 마지막)의 보드. 가장 가까운 스냅샷에서 남은 수만 재생
+
+        스냅샷에서 시작하면 그 이전 수는 board.move_stack에 없음 (3회 반복 판정까지 필요하면 full_history=True)
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT start_fen, ply_count FROM games WHERE id = ?", (game_id,)).fetchone()
+        if row is None:
+            raise KeyError(game_id)
+        start_fen, ply_count = row
+        ply = ply_count if ply is None else max(0, min(ply, ply_count))
+
+        base_ply, fen = 0, start_fen
+        if not full_history:
+            snapshot = conn.execute(
+                "SELECT ply, fen FROM snapshots WHERE game_id = ? AND ply <= ? ORDER BY ply DESC LIMIT 1",
+                (game_id, ply),
+            ).fetchone()
+            if snapshot:
+                base_ply, fen = snapshot
+
+        board = chess.Board(fen)
+        for move in self.moves(game_id, base_ply, ply):
+            board.push(move)  # 저장할 때 이미 검증된 수라서 합법성 검사 없이 재생
+        return board
+
+    def messages(self, game_id):
+        """[(role, text)] 오래된 순서"""
+        return self._connect().execute(
+            "SELECT role, text FROM messages WHERE game_id = ? ORDER BY rowid", (game_id,)
+        ).fetchall()
+
+    def recent(self, limit=20, app=None):
+        """최근에 둔 게임 목록 [(id, app, ply_count, result, updated)]"""
+        query = "SELECT id, app, ply_count, result, updated FROM games"
+        params = ()
+        if app:
+            query += " WHERE app = ?"
+            params = (app,)
+        return self._connect().execute(query + " ORDER BY updated DESC LIMIT ?", params + (limit,)).fetchall()
+
+    def resume(self, game_id=None, **meta):
+        """저장된 게임이면 (game_id, 복원한 보드), 아니면 새 게임을 만들어서 (game_id, 시작 보드)
+
+        이어서 둘 게임은 처음부터 재생해서 move_stack 전체를 복원 (엔진의 반복 판정, 3회 반복 무승부 판정에 필요)
+        """
+        if self.exists(game_id):
+            return game_id, self.load(game_id, full_history=True)
+        game_id = self.create(game_id, **meta)
+        return game_id, chess.Board(self.info(game_id)["start_fen"])
+
+
+# ✅ 프로세스 단위 공유 저장소
+GAME_STORE = GameStore()
+
+
+if __name__ == "__main__":
+    import random
+    import sys
+    import tempfile
+
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = GameStore(os.path.join(tmp, "bench.sqlite3"))
+        ids, plies = [], 0
+        start = time.perf_counter()
+        for _ in range(games):
+            game_id = store.create(app="bench")
+            board = chess.Board()
+            for _ in range(rng.randrange(40, 120)):
+                if board.is_game_over():
+                    break
+                board.push(rng.choice(list(board.legal_moves)))
+                store.append(game_id, board.peek(), board)
+                plies += 1
+            ids.append((game_id, board.fen()))
+        elapsed = time.perf_counter() - start
+        store._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        print(f"💾 {games:,}게임 / {plies:,}수 저장: {plies / elapsed:,.0f} 수/s, "
+              f"파일 {os.path.getsize(store.path) / 1e6:.1f} MB ({os.path.getsize(store.path) / games:,.0f} bytes/게임)")
+
+        for full_history in (True, False):
+            start = time.perf_counter()
+            for game_id, fen in ids:
+                assert store.load(game_id, full_history=full_history).fen() == fen
+            label = "처음부터 재생" if full_history else f"스냅샷({store.snapshot_every} ply) + 재생"
+            print(f"🔁 마지막 포지션 복원 ({label}): {(time.perf_counter() - start) * 1000 / games:.2f} ms/게임")
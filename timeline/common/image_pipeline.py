@@ -0,0 +1,401 @@
+"""
+이미지 가져오기 → 축소 → base64 인라인 인코딩 파이프라인 (원본 내용 해시 캐시)
+
+- multimodal_chatbot이 image_url을 그대로 gpt-4-turbo에 넘겨서, 큰 이미지는 매번 최대 vision 토큰을 쓰고
+  같은 이미지를 다시 물어볼 때마다 OpenAI 쪽에서 원격 이미지를 다시 받아오던 것을 대체
+- URL은 한 번만 받아서(연결 풀을 쓰는 httpx.Client) 원본 바이트의 sha256을 키로 sqlite 캐시(data/image_cache.sqlite3)에 저장
+  - URL → 해시는 url_ttl 동안 재사용 (다시 받지 않음), 다른 URL이라도 내용이 같으면 인코딩 결과를 공유
+  - 받을 때 high 수준도 같이 저장해서, 나중에 다른 detail 수준을 요청하면 원본 대신 high 결과에서 줄임
+- detail 수준별로 긴 변/짧은 변 상한에 맞춰 축소한 뒤 JPEG(투명 배경은 흰색으로 합성)로 인코딩해서 data URL로 보냄
+  - JPEG은 Image.draft로 디코딩 단계에서 먼저 줄여서 큰 사진도 빠르게 처리
+- 한 메시지의 여러 이미지는 스레드 풀에서 동시에 처리
+- 응답 Content-Type이 image/*가 아니면 본문을 받지 않고 실패 처리 (URL 검증은 image_validation이 먼저 하고, 여기서는 본문만 지킴)
+  - 이미지지만 줄이지 못한 경우(너무 크거나 Pillow가 못 읽는 형식)는 content_type이 남아 있어서 원래 URL을 그대로 보낼 수 있음
+- 토큰 수는 OpenAI vision 계산 방식(low = 85, high = 85 + 512px 타일당 170)으로 원본 URL을 보낼 때와 비교
+
+detail 수준 (긴 변 상한, 짧은 변 상한, API detail):
+    low     512 / 512  / "low"   → 항상 85 토큰
+    medium  1024 / 512 / "high"  → 최대 타일 2개 (기본값)
+    high    2048 / 768 / "high"  → OpenAI가 서버에서 줄이는 크기와 같음 (토큰은 같고 전송량/원격 fetch만 절약)
+
+사용 예:
+    images = IMAGE_PIPELINE.prepare(urls, detail="medium")
+    content = [{"type": "text", "text": prompt}] + [image.content_part() for image in images if image.ok]
+    report = token_report(images)
+
+Pillow가 필요함 (pip install pillow). 벤치마크:
+    python image_pipeline.py
+"""
+
+import base64
+import hashlib
+import io
+import math
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_CACHE = os.getenv("IMAGE_CACHE", os.path.join(DATA_DIR, "image_cache.sqlite3"))
+
+DETAIL_LEVELS = {
+    "low": (512, 512, "low"),
+    "medium": (1024, 512, "high"),
+    "high": (2048, 768, "high"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    fetched REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS images (
+    hash TEXT NOT NULL,          -- 원본 바이트 sha256
+    level TEXT NOT NULL,         -- DETAIL_LEVELS 키
+    width INTEGER, height INTEGER,
+    orig_width INTEGER, orig_height INTEGER,
+    orig_bytes INTEGER,
+    data BLOB NOT NULL,          -- 축소된 JPEG
+    PRIMARY KEY (hash, level)
+);
+"""
+
+
+def _pil():
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise ImportError("image_pipeline은 Pillow가 필요합니다: pip install pillow") from e
+    return Image
+
+
+def vision_tokens(width, height, detail="high"):
+    """OpenAI vision 입력 토큰 수 (low는 크기와 상관없이 85, high는 2048 → 짧은 변 768로 줄인 뒤 512px 타일당 170)"""
+    if detail == "low":
+        return 85
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def target_size(width, height, level):
+    longest, shortest, _ = DETAIL_LEVELS[level]
+    scale = min(1.0, longest / max(width, height), shortest / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def downscale(raw, level="medium", quality=85):
+    """원본 바이트 → (JPEG 바이트, (너비, 높이), (원본 너비, 원본 높이))"""
+    Image = _pil()
+    try:
+        image = Image.open(io.BytesIO(raw))
+    except Image.UnidentifiedImageError as e:
+        raise ValueError("이미지로 읽을 수 없는 응답입니다") from e
+    original = image.size
+    size = target_size(*original, level)
+    if image.format == "JPEG":
+        image.draft("RGB", size)  # DCT 단계에서 1/2, 1/4, 1/8로 먼저 줄여서 디코딩
+    image.seek(0)  # 애니메이션 GIF/WebP는 첫 프레임
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+    if image.size != size:
+        image = image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=quality, optimize=True)
+    return out.getvalue(), size, original
+
+
+class PreparedImage:
+    """파이프라인 결과 하나 (실패하면 ok=False, error에 이유)"""
+
+    def __init__(self, url, level, data=None, size=None, original=None, orig_bytes=0, cache=None, error=None, content_type=None):
+        self.url = url
+        self.level = level
+        self.data = data
+        self.size = size
+        self.original = original
+        self.orig_bytes = orig_bytes
+        self.cache = cache  # "url"(받지 않음) / "content"(받았지만 인코딩 재사용) / None(새로 처리)
+        self.error = error
+        self.content_type = content_type  # 새로 받은 응답의 Content-Type (캐시에서 꺼냈으면 None)
+
+    @property
+    def is_image(self):
+        """처리에 성공했거나, 처리는 못 했어도 서버가 이미지라고 응답한 경우 (원래 URL을 보낼 수 있음)"""
+        return self.ok or (self.content_type or "").startswith("image/")
+
+    @property
+    def ok(self):
+        return self.data is not None
+
+    @property
+    def detail(self):
+        return DETAIL_LEVELS[self.level][2]
+
+    @property
+    def tokens(self):
+        return vision_tokens(*self.size, self.detail)
+
+    @property
+    def original_tokens(self):
+        """원본 URL을 그대로 보냈을 때 (gpt-4-turbo 기본 detail=auto → 큰 이미지는 high)"""
+        return vision_tokens(*self.original, "high")
+
+    def data_url(self):
+        return "data:image/jpeg;base64," + base64.b64encode(self.data).decode("ascii")
+
+    def content_part(self):
+        """chat.completions 메시지 content에 넣는 image_url 항목"""
+        return {"type": "image_url", "image_url": {"url": self.data_url(), "detail": self.detail}}
+
+    def __repr__(self):
+        if not self.ok:
+            return f"PreparedImage({self.url!r}, error={self.error!r})"
+        return f"PreparedImage({self.url!r}, {self.original} → {self.size}, {len(self.data):,} B, cache={self.cache})"
+
+
+class ImagePipeline:
+    def __init__(self, path=DEFAULT_CACHE, url_ttl=24 * 3600, timeout=10.0, max_bytes=20 * 1024 * 1024, max_workers=4, quality=85):
+        self.path = path
+        self.url_ttl = url_ttl
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.quality = quality
+        self._local = threading.local()  # 스레드마다 sqlite 연결 하나 (파일은 처음 쓸 때 생성)
+        self._lock = threading.Lock()
+        self._client = None
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-pipeline")
+        self.fetches = 0
+        self.fetched_bytes = 0
+        self.url_hits = 0
+        self.content_hits = 0
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.executescript(_SCHEMA)
+        return conn
+
+    def _get_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(follow_redirects=True, timeout=self.timeout)
+        return self._client
+
+    # --------------------------------------------------------
+    # 캐시
+    # --------------------------------------------------------
+    def _cached_image(self, conn, digest, level):
+        return conn.execute(
+            "SELECT data, width, height, orig_width, orig_height, orig_bytes FROM images WHERE hash = ? AND level = ?",
+            (digest, level),
+        ).fetchone()
+
+    def _url_hash(self, conn, url):
+        row = conn.execute("SELECT hash, fetched FROM urls WHERE url = ?", (url,)).fetchone()
+        if row and row[1] + self.url_ttl > time.time():
+            return row[0]
+        return None
+
+    # --------------------------------------------------------
+    # 처리
+    # --------------------------------------------------------
+    def _fetch(self, url, info):
+        """원본 바이트. info["content_type"]에 응답 Content-Type을 남기고, 이미지가 아니면 본문을 받지 않고 ValueError"""
+        with self._get_client().stream("GET", url) as response:
+            response.raise_for_status()
+            content_type = info["content_type"] = response.headers.get("Content-Type", "")
+            if not content_type.startswith("image/"):
+                raise ValueError(f"이미지가 아닌 응답입니다 (Content-Type: {content_type or '없음'})")
+            chunks, size = [], 0
+            for chunk in response.iter_bytes():
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise ValueError(f"이미지가 너무 큽니다 (> {self.max_bytes // (1024 * 1024)} MB)")
+                chunks.append(chunk)
+        with self._lock:
+            self.fetches += 1
+            self.fetched_bytes += size
+        return b"".join(chunks)
+
+    def _store(self, conn, digest, level, data, size, original, orig_bytes):
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO images (hash, level, width, height, orig_width, orig_height, orig_bytes, data)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (digest, level, *size, *original, orig_bytes, data),
+            )
+
+    def prepare_one(self, url, detail="medium"):
+        conn = self._connect()
+        digest = self._url_hash(conn, url)
+        if digest:
+            row = self._cached_image(conn, digest, detail)
+            source = None if row else self._cached_image(conn, digest, "high")
+            if source:  # 다른 수준만 캐시에 있으면 high 결과에서 줄임 (원본을 다시 받지 않음)
+                data, size, _ = downscale(source[0], detail, self.quality)
+                self._store(conn, digest, detail, data, size, source[3:5], source[5])
+                row = (data, *size, *source[3:6])
+            if row:
+                with self._lock:
+                    self.url_hits += 1
+                return PreparedImage(url, detail, row[0], row[1:3], row[3:5], row[5], cache="url")
+        info = {}
+        try:
+            raw = self._fetch(url, info)
+            digest = hashlib.sha256(raw).hexdigest()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO urls (url, hash, fetched) VALUES (?, ?, ?)", (url, digest, time.time()))
+            row = self._cached_image(conn, digest, detail)
+            if row:
+                with self._lock:
+                    self.content_hits += 1
+                return PreparedImage(url, detail, row[0], row[1:3], row[3:5], row[5], cache="content", content_type=info["content_type"])
+            data, size, original = downscale(raw, detail, self.quality)
+            if detail != "high" and not self._cached_image(conn, digest, "high"):
+                self._store(conn, digest, "high", *downscale(raw, "high", self.quality), len(raw))
+        except ImportError:
+            raise
+        except Exception as e:  # 네트워크 오류, 4xx/5xx, 이미지가 아닌 응답
+            return PreparedImage(url, detail, error=f"{type(e).__name__}: {e}", content_type=info.get("content_type"))
+        self._store(conn, digest, detail, data, size, original, len(raw))
+        return PreparedImage(url, detail, data, size, original, len(raw), content_type=info["content_type"])
+
+    def prepare(self, urls, detail="medium"):
+        """입력 순서대로 PreparedImage 목록 (여러 URL은 동시에 처리, 중복 URL은 한 번만)"""
+        if detail not in DETAIL_LEVELS:
+            raise ValueError(f"detail은 {', '.join(DETAIL_LEVELS)} 중 하나여야 합니다: {detail!r}")
+        unique = list(dict.fromkeys(urls))
+        results = dict(zip(unique, self._pool.map(lambda url: self.prepare_one(url, detail), unique)))
+        return [results[url] for url in urls]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "fetches": self.fetches,
+                "fetched_bytes": self.fetched_bytes,
+                "url_hits": self.url_hits,
+                "content_hits": self.content_hits,
+            }
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+def token_report(images):
+    """처리된 이미지들의 토큰/전송량 절약 요약 (실패한 이미지는 제외)"""
+    images = [image for image in images if image.ok]
+    original_tokens = sum(image.original_tokens for image in images)
+    tokens = sum(image.tokens for image in images)
+    original_bytes = sum(image.orig_bytes for image in images)
+    payload_bytes = sum(len(image.data) * 4 // 3 for image in images)  # base64
+    return {
+        "images": len(images),
+        "original_tokens": original_tokens,
+        "tokens": tokens,
+        "saved_tokens": original_tokens - tokens,
+        "saved_ratio": 1 - tokens / original_tokens if original_tokens else 0.0,
+        "original_bytes": original_bytes,
+        "payload_bytes": payload_bytes,
+        "cached": sum(1 for image in images if image.cache),
+    }
+
+
+# ✅ 프로세스 단위 공유 파이프라인 (연결 풀/스레드 풀/캐시를 세션과 메시지 사이에서 재사용)
+IMAGE_PIPELINE = ImagePipeline()
+
+
+if __name__ == "__main__":
+    import random
+    import tempfile
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    Image = _pil()
+
+    # 로컬 HTTP 대역: 큰 사진(JPEG) / 투명 PNG / 같은 내용의 다른 URL, 응답마다 0.2초 지연
+    def photo(width, height, seed):
+        rng = random.Random(seed)
+        image = Image.new("RGB", (width // 16, height // 16))
+        image.putdata([(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(image.width * image.height)])
+        out = io.BytesIO()
+        image.resize((width, height), Image.BICUBIC).save(out, "JPEG", quality=92)
+        return out.getvalue(), "image/jpeg"
+
+    def logo(width, height):
+        image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        image.paste((30, 120, 200, 255), (width // 4, height // 4, width * 3 // 4, height * 3 // 4))
+        out = io.BytesIO()
+        image.save(out, "PNG")
+        return out.getvalue(), "image/png"
+
+    ROUTES = {
+        "/photo.jpg": photo(4032, 3024, 1),
+        "/wide.jpg": photo(3000, 1000, 2),
+        "/logo.png": logo(1600, 1600),
+        "/photo-copy.jpg": None,  # /photo.jpg와 같은 바이트
+        "/page.html": (b"<html></html>", "text/html"),
+    }
+    ROUTES["/photo-copy.jpg"] = ROUTES["/photo.jpg"]
+
+    class StandIn(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(0.2)
+            body, content_type = ROUTES.get(self.path, (b"not found", "text/plain"))
+            self.send_response(200 if self.path in ROUTES else 404)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    urls = [base + path for path in ("/photo.jpg", "/wide.jpg", "/logo.png")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline = ImagePipeline(path=os.path.join(tmp, "image_cache.sqlite3"))
+        for level in DETAIL_LEVELS:
+            start = time.perf_counter()
+            images = pipeline.prepare(urls, detail=level)
+            elapsed = (time.perf_counter() - start) * 1000
+            report = token_report(images)
+            print(f"🖼️ detail={level}: {elapsed:.0f} ms, 토큰 {report['original_tokens']} → {report['tokens']} "
+                  f"({report['saved_ratio']:.0%} 절약), 원본 {report['original_bytes'] / 1024:,.0f} KB → base64 {report['payload_bytes'] / 1024:,.0f} KB, 캐시 {report['cached']}/{report['images']}")
+            for image in images:
+                print(f"   {image.url.replace(base, '')}: {image.original} → {image.size}, {image.original_tokens} → {image.tokens} 토큰")
+
+        start = time.perf_counter()
+        pipeline.prepare(urls, detail="medium")
+        print(f"💾 같은 URL 다시 질문: {(time.perf_counter() - start) * 1000:.1f} ms (받지 않음)")
+
+        start = time.perf_counter()
+        copy, broken = pipeline.prepare([base + "/photo-copy.jpg", base + "/page.html"], detail="medium")
+        print(f"🔁 다른 URL, 같은 내용: {(time.perf_counter() - start) * 1000:.0f} ms, cache={copy.cache} / 이미지 아님: {broken.error} (is_image={broken.is_image})")
+        print(f"📊 {pipeline.stats()}")
+        pipeline.close()
+    server.shutdown()
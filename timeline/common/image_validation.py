@@ -0,0 +1,243 @@
+"""
+이미지 URL 비동기 검증기 (공유 HTTP 연결 풀 + URL → Content-Type TTL 캐시)
+
+- multimodal_chatbot의 is_valid_image_url이 메시지마다 세션 없이 requests.head(timeout=5)를 보내서
+  모델 호출 전에 최대 5초를 기다리던 것을 대체
+- 백그라운드 스레드의 이벤트 루프 하나에서 httpx.AsyncClient 하나(연결 풀, keep-alive)를 계속 사용
+  (Streamlit 스크립트 스레드에는 이벤트 루프가 없고, asyncio.run은 실행마다 루프를 새로 만들어서 풀을 재사용할 수 없음)
+- submit(urls)는 바로 Future를 반환 → 검증이 도는 동안 메시지/요청을 준비하고 필요할 때 result()로 기다림
+- 여러 URL은 동시에 검증하고, 같은 URL을 동시에 물으면 요청 하나를 공유
+- HEAD를 거부하는 서버(405/501)는 GET 응답 헤더만 읽고 끊음
+- 결과는 TTL 캐시에 저장 (이미지 여부와 상관없이 Content-Type 저장, 실패는 짧은 TTL)
+
+사용 예:
+    future = IMAGE_VALIDATOR.submit(urls)      # 바로 반환
+    ...                                        # 메시지 준비
+    valid = future.result()                    # {url: True/False}
+
+로컬 HTTP 대역으로 동작 확인:
+    python image_validation.py
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+
+
+class ImageURLValidator:
+    def __init__(self, ttl=600, error_ttl=30, max_entries=2048, timeout=5.0, max_connections=20):
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._cache = OrderedDict()  # url → (만료 시각, Content-Type 또는 None)
+        self._inflight = {}  # url → asyncio.Task (루프 스레드에서만 접근)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._client = None
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+
+    # --------------------------------------------------------
+    # 이벤트 루프 / 클라이언트 (루프는 처음 쓸 때 백그라운드 스레드에서 시작)
+    # --------------------------------------------------------
+    def _ensure_loop(self):
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name="image-url-validator", daemon=True).start()
+                    self._loop = loop
+        return self._loop
+
+    def _get_client(self):
+        if self._client is None:  # 루프 스레드에서만 호출됨
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            )
+        return self._client
+
+    # --------------------------------------------------------
+    # 캐시
+    # --------------------------------------------------------
+    def _cached(self, url):
+        with self._lock:
+            entry = self._cache.get(url)
+            if entry and entry[0] > time.monotonic():
+                self._cache.move_to_end(url)
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def _store(self, url, content_type, ok):
+        with self._lock:
+            self._cache[url] = (time.monotonic() + (self.ttl if ok else self.error_ttl), content_type)
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    # --------------------------------------------------------
+    # 검증 (코루틴)
+    # --------------------------------------------------------
+    async def _fetch_content_type(self, url):
+        client = self._get_client()
+        with self._lock:
+            self.requests += 1
+        try:
+            response = await client.head(url)
+            if response.status_code in (405, 501):
+                async with client.stream("GET", url) as response:
+                    pass  # 헤더만 읽고 본문은 받지 않음
+            ok = response.status_code < 400
+            content_type = response.headers.get("Content-Type", "") if ok else None
+        except httpx.HTTPError:
+            ok, content_type = False, None
+        self._store(url, content_type, ok)
+        return content_type
+
+    async def content_type(self, url):
+        """URL의 Content-Type (요청 실패/오류 응답이면 None)"""
+        found, content_type = self._cached(url)
+        if found:
+            return content_type
+        task = self._inflight.get(url)
+        if task is None:
+            task = self._inflight[url] = asyncio.ensure_future(self._fetch_content_type(url))
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return await task
+
+    async def is_valid(self, url):
+        return (await self.content_type(url) or "").startswith("image/")
+
+    async def validate_many(self, urls):
+        """{url: 이미지 여부}, 모든 URL을 동시에 검증"""
+        urls = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*(self.is_valid(url) for url in urls))
+        return dict(zip(urls, results))
+
+    # --------------------------------------------------------
+    # 동기 코드(Streamlit 스크립트)에서 쓰는 입구
+    # --------------------------------------------------------
+    def submit(self, urls):
+        """검증을 백그라운드 루프에서 시작하고 concurrent.futures.Future({url: bool})를 바로 반환"""
+        return asyncio.run_coroutine_threadsafe(self.validate_many(urls), self._ensure_loop())
+
+    def validate(self, urls):
+        return self.submit(urls).result()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "requests": self.requests,
+                "cached_urls": len(self._cache),
+            }
+
+    def close(self):
+        if self._loop is not None:
+            if self._client is not None:
+                asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result()
+                self._client = None
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+
+
+# ✅ 프로세스 단위 공유 검증기 (연결 풀과 캐시를 세션/메시지 사이에서 재사용)
+IMAGE_VALIDATOR = ImageURLValidator()
+
+
+if __name__ == "__main__":
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    # 로컬 HTTP 대역: 응답마다 0.2초 지연 (원격 이미지 서버 왕복 흉내)
+    ROUTES = {
+        "/cat.png": (200, "image/png"),
+        "/dog.jpg": (200, "image/jpeg"),
+        "/page.html": (200, "text/html; charset=utf-8"),
+        "/missing.png": (404, "text/plain"),
+        "/nohead.webp": (200, "image/webp"),  # HEAD 거부
+    }
+    connections = set()
+
+    class StandIn(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def _respond(self, head):
+            connections.add(self.client_address)
+            time.sleep(0.2)
+            if self.path == "/redirect":
+                self.send_response(302)
+                self.send_header("Location", "/cat.png")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if head and self.path == "/nohead.webp":
+                status, content_type = 405, "text/plain"
+            else:
+                status, content_type = ROUTES.get(self.path, (404, "text/plain"))
+            body = b"x" * 1024
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not head:
+                self.wfile.write(body)
+
+        def do_HEAD(self):
+            self._respond(head=True)
+
+        def do_GET(self):
+            self._respond(head=False)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    urls = [base + path for path in ("/cat.png", "/dog.jpg", "/page.html", "/missing.png", "/nohead.webp", "/redirect")]
+
+    try:
+        import requests
+    except ImportError:
+        requests = None
+    if requests is not None:
+        start = time.perf_counter()
+        for url in urls:
+            response = requests.head(url, allow_redirects=True, timeout=5)
+            response.headers.get("Content-Type", "").startswith("image/")
+        print(f"🐢 requests.head 순서대로 {len(urls)}개: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    validator = ImageURLValidator()
+    start = time.perf_counter()
+    future = validator.submit(urls)
+    submitted_ms = (time.perf_counter() - start) * 1000
+    results = future.result()
+    print(f"⚡ 비동기 동시 검증 {len(urls)}개: {(time.perf_counter() - start) * 1000:.0f} ms (submit 반환 {submitted_ms:.2f} ms)")
+    for url, valid in results.items():
+        print(f"   {'✅' if valid else '❌'} {url.replace(base, '')}")
+
+    start = time.perf_counter()
+    validator.validate(urls)
+    print(f"💾 캐시 적중 {len(urls)}개: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    connections.clear()
+    validator._cache.clear()
+    for _ in range(3):
+        validator.validate([base + "/cat.png"])
+        validator._cache.clear()
+    print(f"🔌 캐시 없이 같은 서버에 3번 요청할 때 사용한 연결 수: {len(connections)}")
+    print(f"📊 {validator.stats()}")
+    validator.close()
+    server.shutdown()
@@ -0,0 +1,231 @@
+"""
+parse_task용 로컬 태스크(의도) 분류기 (번역 / 요약 / 분석 / 기타)
+
+- 1단계: 키워드 규칙 - 한 태스크의 키워드만 나타나면 바로 결정
+- 2단계: 문자 n-gram(1~3) 해싱 + 선형(softmax) 모델 - 로그에 쌓인 입력으로 학습
+  - 세 태스크 말고 "기타"(태스크가 아닌 입력: 인사, 잡담, 날씨 질문 등) 클래스를 같이 학습
+    → 닫힌 세 라벨 중 하나를 억지로 고르지 않고, "기타"로 판정되면 LLM 없이 바로 error_handler 경로로 보냄
+  - 키워드 근거 없이 모델만으로 판정할 때는 model_threshold(기본 0.95)를 넘어야 함 (is_confident)
+- 확신도가 threshold보다 낮을 때만 LLM으로 넘기고, LLM이 정한 라벨(태스크가 아니면 "기타")은 로그에 남겨 다음 학습에 사용
+
+사용 예:
+    classifier = load_default_classifier()
+    prediction = classifier.predict("이 문장 영어로 번역해줘")  # IntentPrediction("번역", 0.99, "rule")
+    if not classifier.is_confident(prediction):
+        label = ask_llm(...)
+        classifier.log(user_input, label if label in LABELS else NONE_LABEL)
+    elif prediction.label == NONE_LABEL:
+        ...  # 태스크가 아닌 입력 → 에러 처리
+
+정확도/지연 시간 측정 (data/intent_fixtures.jsonl):
+    python intent_classifier.py
+"""
+
+import json
+import math
+import os
+import random
+import threading
+import time
+import zlib
+from typing import NamedTuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_TRAIN = os.path.join(DATA_DIR, "intent_train.jsonl")
+DEFAULT_FIXTURES = os.path.join(DATA_DIR, "intent_fixtures.jsonl")
+
+LABELS = ("번역", "요약", "분석")
+NONE_LABEL = "기타"  # 어느 태스크도 아닌 입력 (reject 클래스)
+
+# ✅ 태스크별 키워드 (소문자 기준 부분 문자열 매칭)
+KEYWORD_RULES = {
+    "번역": ("번역", "영어로", "일본어로", "중국어로", "한국어로", "영문으로", "영작", "통역", "translat"),
+    "요약": ("요약", "간추려", "요점", "줄거리", "summar", "tl;dr"),
+    "분석": ("분석", "감정", "긍정", "부정", "기분", "sentiment", "analy"),
+}
+RULE_CONFIDENCE = 0.99
+
+
+class IntentPrediction(NamedTuple):
+    label: str
+    confidence: float
+    method: str  # "rule", "model", "llm"
+
+
+def _features(text, n_features, max_n=3):
+    """공백을 경계로 포함한 문자 1~3-gram을 해싱한 feature index 목록"""
+    text = f" {' '.join(text.lower().split())} "
+    features = set()
+    for n in range(1, max_n + 1):
+        for i in range(len(text) - n + 1):
+            features.add(zlib.crc32(text[i:i + n].encode("utf-8")) % n_features)
+    return features
+
+
+def _softmax(logits):
+    top = max(logits)
+    exps = [math.exp(value - top) for value in logits]
+    total = sum(exps)
+    return [value / total for value in exps]
+
+
+class NgramModel:
+    """문자 n-gram 해싱 feature 위의 다중 클래스 로지스틱 회귀 (SGD 학습)"""
+
+    def __init__(self, labels=LABELS + (NONE_LABEL,), n_features=2 ** 18):
+        self.labels = tuple(labels)
+        self.n_features = n_features
+        self.weights = {}  # feature index -> 라벨별 가중치 목록 (등장한 feature만 저장)
+        self.bias = [0.0] * len(self.labels)
+
+    def fit(self, examples, epochs=20, lr=0.5, l2=1e-4, seed=0):
+        data = [(_features(text, self.n_features), self.labels.index(label)) for text, label in examples if label in self.labels]
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            step = lr / (1 + epoch * 0.2)
+            for features, target in data:
+                probs = self._probs(features)
+                for k in range(len(self.labels)):
+                    grad = probs[k] - (k == target)
+                    self.bias[k] -= step * grad
+                    for f in features:
+                        row = self.weights.setdefault(f, [0.0] * len(self.labels))
+                        row[k] -= step * (grad + l2 * row[k])
+        return self
+
+    def _probs(self, features):
+        logits = list(self.bias)
+        for f in features:
+            row = self.weights.get(f)
+            if row:
+                for k, value in enumerate(row):
+                    logits[k] += value
+        return _softmax(logits)
+
+    def predict(self, text):
+        probs = self._probs(_features(text, self.n_features))
+        best = max(range(len(self.labels)), key=probs.__getitem__)
+        return self.labels[best], probs[best]
+
+
+def load_examples(path):
+    """{"text": ..., "label": ...} JSONL 파일을 (text, label) 목록으로 읽음. 파일이 없으면 빈 목록"""
+    examples = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    examples.append((record["text"], record["label"]))
+    except FileNotFoundError:
+        pass
+    return examples
+
+
+class IntentClassifier:
+    """키워드 규칙 → n-gram 모델 순서로 분류하고, LLM 결과는 로그에 쌓아서 재학습에 사용"""
+
+    def __init__(self, threshold=0.85, log_path="intent_log.jsonl", train_path=DEFAULT_TRAIN, model_threshold=0.95):
+        self.threshold = threshold
+        self.model_threshold = model_threshold
+        self.log_path = log_path
+        self.train_path = train_path
+        self._lock = threading.Lock()
+        self.model = None
+        self.retrain()
+
+    def retrain(self):
+        """시드 학습 데이터 + 로그에 쌓인 입력으로 모델을 다시 학습"""
+        examples = load_examples(self.train_path)
+        if self.log_path:
+            examples += load_examples(self.log_path)
+        self.model = NgramModel().fit(examples)
+        return len(examples)
+
+    def predict(self, text):
+        lowered = text.lower()
+        hits = [label for label, keywords in KEYWORD_RULES.items() if any(k in lowered for k in keywords)]
+        if len(hits) == 1:
+            return IntentPrediction(hits[0], RULE_CONFIDENCE, "rule")
+        label, confidence = self.model.predict(text)
+        return IntentPrediction(label, confidence, "model")
+
+    def is_confident(self, prediction):
+        """LLM 없이 이 판정을 써도 되는지 (키워드 근거 없이 모델만으로 판정한 경우는 model_threshold 이상)"""
+        if prediction.method == "model":
+            return prediction.confidence >= max(self.threshold, self.model_threshold)
+        return prediction.confidence >= self.threshold
+
+    def log(self, text, label, source="llm"):
+        """확정된 라벨을 로그에 추가 (다음 retrain 때 학습 데이터로 사용)"""
+        if not self.log_path or label not in LABELS + (NONE_LABEL,):
+            return
+        with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"text": text, "label": label, "source": source}, ensure_ascii=False) + "\n")
+
+
+_default_classifier = None
+
+
+def load_default_classifier(threshold=0.85, log_path="intent_log.jsonl"):
+    """기본 분류기를 한 번만 학습해서 재사용"""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = IntentClassifier(threshold=threshold, log_path=log_path)
+    return _default_classifier
+
+
+def evaluate(classifier, fixtures_path=DEFAULT_FIXTURES, repeat=100):
+    """라벨이 달린 fixture로 정확도, LLM fallback 비율, 입력당 지연 시간(µs)을 계산"""
+    fixtures = load_examples(fixtures_path)
+    correct = fallback = false_accept = 0
+    by_method = {}
+    for text, label in fixtures:
+        prediction = classifier.predict(text)
+        if not classifier.is_confident(prediction):
+            fallback += 1
+            method = "llm"
+        else:
+            method = prediction.method
+            correct += prediction.label == label
+            # 태스크가 아닌 입력을 LLM/에러 처리 없이 태스크로 실행해 버린 경우
+            false_accept += label == NONE_LABEL and prediction.label != NONE_LABEL
+        stats = by_method.setdefault(method, [0, 0])
+        stats[0] += 1
+        stats[1] += prediction.label == label
+
+    latencies = []
+    for _ in range(repeat):
+        for text, _ in fixtures:
+            start = time.perf_counter()
+            classifier.predict(text)
+            latencies.append((time.perf_counter() - start) * 1e6)
+    latencies.sort()
+
+    local = len(fixtures) - fallback
+    negatives = sum(1 for _, label in fixtures if label == NONE_LABEL)
+    return {
+        "fixtures": len(fixtures),
+        "negatives": negatives,
+        "false_accept_ratio": false_accept / negatives if negatives else 0.0,
+        "local_accuracy": correct / local if local else 0.0,  # LLM으로 넘기지 않은 입력 기준
+        "fallback_ratio": fallback / len(fixtures) if fixtures else 0.0,
+        "by_method": {m: {"count": c, "accuracy": ok / c} for m, (c, ok) in by_method.items()},
+        "p50_us": latencies[len(latencies) // 2] if latencies else 0.0,
+        "p95_us": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    classifier = IntentClassifier(log_path=None)
+    print(f"🧠 학습 시간: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    report = evaluate(classifier)
+    print(f"📋 fixture {report['fixtures']}개, LLM fallback {report['fallback_ratio']:.1%}")
+    print(f"✅ 로컬 판정 정확도: {report['local_accuracy']:.1%}")
+    print(f"🚫 태스크가 아닌 입력 {report['negatives']}개 중 태스크로 잘못 실행: {report['false_accept_ratio']:.1%}")
+    for method, stats in report["by_method"].items():  # llm 행의 정확도는 로컬 모델이 냈을 라벨 기준
+        print(f"   - {method}: {stats['count']}개, 정확도 {stats['accuracy']:.1%}")
+    print(f"⏱️ 지연 시간: p50 {report['p50_us']:.1f} µs, p95 {report['p95_us']:.1f} µs")
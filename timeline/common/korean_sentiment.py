@@ -0,0 +1,220 @@
+"""
+번역 없이 한국어를 바로 분석하는 사전 기반 감정 분석기
+
+- VADER는 한국어 점수가 거의 나오지 않아서 매번 영어로 번역(네트워크 요청)한 뒤 분석했음
+- 한국어 극성 사전(data/sentiment_lexicon_ko.tsv)을 Aho–Corasick 매처(emotion_matcher.py)로 찾고,
+  용언 활용형 펼치기 + 반복 문자 축약 정도의 가벼운 정규화만 수행 (형태소 분석기 없음)
+- VADER 규칙을 한국어에 맞게 적용: 강조어(너무/정말), 완화어(조금/좀), 부정(안/못/-지 않), 역접(-지만/-는데), 느낌표
+- polarity_scores()는 VADER와 같은 {"neg", "neu", "pos", "compound"} 형식, 라벨 기준(±0.05)도 동일
+
+사용 예:
+    korean_sia = KoreanSentimentAnalyzer.from_file()
+    if is_korean(text):
+        scores = korean_sia.polarity_scores(text)
+
+번역 + VADER 경로와 지연 시간/일치율 비교 (data/sentiment_fixtures_ko.jsonl):
+    python korean_sentiment.py
+"""
+
+import json
+import math
+import os
+import re
+import time
+import unicodedata
+
+try:
+    from .emotion_matcher import EmotionMatcher, _decompose
+except ImportError:  # python korean_sentiment.py 로 직접 실행할 때
+    from emotion_matcher import EmotionMatcher, _decompose
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_LEXICON = os.path.join(DATA_DIR, "sentiment_lexicon_ko.tsv")
+DEFAULT_FIXTURES = os.path.join(DATA_DIR, "sentiment_fixtures_ko.jsonl")
+
+# ✅ VADER 상수 (nltk.sentiment.vader.VaderConstants와 같은 값)
+B_INCR = 0.293
+B_DECR = -0.293
+N_SCALAR = -0.74
+ALPHA = 15
+
+BOOSTERS = ("너무", "정말", "진짜", "완전", "엄청", "매우", "아주", "되게", "넘", "참", "굉장히", "대단히", "몹시", "제일", "가장")
+DAMPENERS = ("조금", "좀", "약간", "살짝", "다소", "그럭저럭", "별로")
+
+_NEGATION_AFTER = re.compile(r"\s*지\s*(마|말)")  # "걱정하지 마" (안/못/-지 않은 매처에서 처리)
+_REPEAT = re.compile(r"(.)\1{2,}")  # ㅋㅋㅋㅋ → ㅋㅋ, 좋아아아 → 좋아아
+_CONTRAST = re.compile(r"지만|그런데|하지만|그러나|[가-힣]데(?=[\s,.!?]|$)")
+_HANGUL = re.compile(r"[가-힣ㄱ-ㅎㅏ-ㅣ]")
+_LETTER = re.compile(r"[^\W\d_]")
+_JONG_NIEUN = 4
+
+
+def is_korean(text, ratio=0.3):
+    """문자 중 한글 비율이 ratio 이상이면 한국어로 판단"""
+    letters = _LETTER.findall(text)
+    return bool(letters) and len(_HANGUL.findall(text)) / len(letters) >= ratio
+
+
+def normalize(text):
+    """NFC 정규화, 소문자, 세 번 이상 반복되는 문자를 두 번으로 축약"""
+    return _REPEAT.sub(r"\1\1", unicodedata.normalize("NFC", text).lower())
+
+
+def _contrast_position(text):
+    """마지막 역접 표현의 끝 위치 ('예쁜데'처럼 ㄴ 받침 + 데 인 경우만 역접으로 봄). 없으면 None"""
+    position = None
+    for match in _CONTRAST.finditer(text):
+        word = match.group()
+        if word.endswith("데") and len(word) == 2:
+            jamo = _decompose(word[0])
+            if not jamo or jamo[2] != _JONG_NIEUN:
+                continue
+        position = match.end()
+    return position
+
+
+class KoreanSentimentAnalyzer:
+    """한국어 극성 사전 + VADER식 규칙으로 compound 점수를 계산"""
+
+    def __init__(self, lexicon):
+        """lexicon: (어휘, 극성 점수) 목록"""
+        # EmotionMatcher는 양수 가중치만 저장하므로 부호를 범주(pos/neg)로 나눠서 넘김
+        self.matcher = EmotionMatcher(
+            (term, "pos" if valence > 0 else "neg", abs(valence)) for term, valence in lexicon if valence
+        )
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_LEXICON):
+        lexicon = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line.strip() or line.startswith("#"):
+                    continue
+                term, valence = line.split("\t")
+                lexicon.append((term, float(valence)))
+        return cls(lexicon)
+
+    def sentiments(self, text):
+        """(매칭된 어휘, 규칙을 적용한 극성 점수) 목록"""
+        text = normalize(text)
+        contrast = _contrast_position(text)
+        results = []
+        for start, end, category, weight, negated in self.matcher.matches(text):
+            valence = weight if category == "pos" else -weight
+            sign = 1 if valence > 0 else -1
+
+            previous = text[:start].split()
+            if previous and previous[-1] in BOOSTERS:
+                valence += sign * B_INCR
+            elif previous and previous[-1] in DAMPENERS:
+                valence += sign * B_DECR
+
+            if negated or _NEGATION_AFTER.match(text, end):
+                valence *= N_SCALAR
+
+            if contrast is not None:  # 역접 앞은 약하게, 뒤는 강하게 (VADER의 "but" 규칙)
+                valence *= 1.5 if start >= contrast else 0.5
+            results.append((text[start:end], valence))
+        return results
+
+    def polarity_scores(self, text):
+        sentiments = self.sentiments(text)
+        total = sum(valence for _, valence in sentiments)
+
+        if total:  # 느낌표 강조 (최대 4개)
+            total += math.copysign(min(text.count("!"), 4) * 0.292, total)
+        compound = total / math.sqrt(total * total + ALPHA)
+
+        pos_sum = sum(valence + 1 for _, valence in sentiments if valence > 0)
+        neg_sum = sum(valence - 1 for _, valence in sentiments if valence < 0)
+        neutral = max(len(text.split()) - len(sentiments), 0)
+        denominator = pos_sum + abs(neg_sum) + neutral or 1
+        return {
+            "neg": round(abs(neg_sum) / denominator, 3),
+            "neu": round(neutral / denominator, 3),
+            "pos": round(pos_sum / denominator, 3),
+            "compound": round(max(-1.0, min(1.0, compound)), 4),
+        }
+
+
+_default_analyzer = None
+
+
+def load_default_analyzer():
+    """기본 사전으로 만든 분석기를 한 번만 생성해서 재사용"""
+    global _default_analyzer
+    if _default_analyzer is None:
+        _default_analyzer = KoreanSentimentAnalyzer.from_file()
+    return _default_analyzer
+
+
+# ------------------------------------------------------------
+# 벤치마크: 번역 + VADER vs 한국어 사전 분석
+# ------------------------------------------------------------
+def _label(compound):
+    return "긍정" if compound > 0.05 else "부정" if compound < -0.05 else "중립"
+
+
+def benchmark(fixtures_path=DEFAULT_FIXTURES, translate=None):
+    """fixture(한국어 문장, 정답 라벨, 참조 영어 번역)로 두 경로의 지연 시간과 일치율을 비교
+
+    translate가 주어지면 실제 번역 시간을 재고 그 번역문을 VADER에 넣음. 없으면 참조 번역을 사용
+    """
+    try:
+        from .vader import get_analyzer
+    except ImportError:
+        from vader import get_analyzer
+
+    with open(fixtures_path, "r", encoding="utf-8") as f:
+        fixtures = [json.loads(line) for line in f if line.strip()]
+
+    korean = load_default_analyzer()
+    vader = get_analyzer()
+
+    start = time.perf_counter()
+    korean_labels = [_label(korean.polarity_scores(item["text"])["compound"]) for item in fixtures]
+    korean_ms = (time.perf_counter() - start) * 1000 / len(fixtures)
+
+    translate_ms = None
+    if translate:
+        start = time.perf_counter()
+        english = [translate(item["text"]) for item in fixtures]
+        translate_ms = (time.perf_counter() - start) * 1000 / len(fixtures)
+    else:
+        english = [item["text_en"] for item in fixtures]
+
+    start = time.perf_counter()
+    vader_labels = [_label(vader.polarity_scores(text)["compound"]) for text in english]
+    vader_ms = (time.perf_counter() - start) * 1000 / len(fixtures)
+
+    gold = [item["label"] for item in fixtures]
+    return {
+        "fixtures": len(fixtures),
+        "korean_ms": korean_ms,
+        "vader_ms": vader_ms,
+        "translate_ms": translate_ms,
+        "korean_accuracy": sum(a == b for a, b in zip(korean_labels, gold)) / len(gold),
+        "vader_accuracy": sum(a == b for a, b in zip(vader_labels, gold)) / len(gold),
+        "agreement": sum(a == b for a, b in zip(korean_labels, vader_labels)) / len(gold),
+        "disagreements": [(item["text"], k, v) for item, k, v in zip(fixtures, korean_labels, vader_labels) if k != v],
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    translate = None
+    if "--live" in sys.argv:  # 실제 GoogleTranslator 요청 시간까지 측정 (네트워크 필요)
+        from deep_translator import GoogleTranslator
+
+        translate = GoogleTranslator(source="auto", target="en").translate
+
+    report = benchmark(translate=translate)
+    print(f"📋 fixture {report['fixtures']}개")
+    print(f"🇰🇷 한국어 사전: {report['korean_ms'] * 1000:.1f} µs/문장, 정답 일치 {report['korean_accuracy']:.1%}")
+    translate_text = f"번역 {report['translate_ms']:.1f} ms + " if report["translate_ms"] is not None else "(참조 번역 사용, --live로 번역 시간 측정) "
+    print(f"🌐 번역 + VADER: {translate_text}VADER {report['vader_ms'] * 1000:.1f} µs/문장, 정답 일치 {report['vader_accuracy']:.1%}")
+    print(f"🤝 두 경로 라벨 일치율: {report['agreement']:.1%}")
+    for text, korean_label, vader_label in report["disagreements"]:
+        print(f"   - {text}: 한국어 {korean_label} / VADER {vader_label}")
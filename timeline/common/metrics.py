@@ -0,0 +1,207 @@
+"""
+툴(@tool) 호출 메트릭 레지스트리
+
+- 툴별 호출 수, 오류 수, 지연 시간 히스토그램, 입력/출력 크기(bytes) 히스토그램을 기록
+- Prometheus text format으로 주기적으로 파일에 쓰거나 로컬 포트(/metrics)로 제공
+- 에이전트 실행 시 callbacks로 MetricsCallbackHandler를 넘기면 모든 툴이 자동으로 집계됨
+
+사용 예:
+    metrics_handler = MetricsCallbackHandler()
+    start_exporter(path="tool_metrics.prom", port=9464)
+    agent.invoke(inputs, config={"callbacks": [metrics_handler]})
+"""
+
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    from langchain_core.callbacks import BaseCallbackHandler
+except ImportError:
+    BaseCallbackHandler = object
+
+# ✅ 기본 버킷 (지연 시간: 초, 크기: bytes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    """누적(cumulative) 버킷 형태로 내보내는 단순 히스토그램"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+
+class ToolStats:
+    """툴 하나에 대한 메트릭 묶음"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.input_bytes = Histogram(SIZE_BUCKETS)
+        self.output_bytes = Histogram(SIZE_BUCKETS)
+
+
+class MetricsRegistry:
+    """툴 이름별 ToolStats를 보관하는 스레드 안전 레지스트리"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tools = {}
+
+    def observe(self, tool, latency, input_size=0, output_size=0, error=False):
+        with self._lock:
+            stats = self._tools.setdefault(tool, ToolStats())
+            stats.calls += 1
+            if error:
+                stats.errors += 1
+            stats.latency.observe(latency)
+            stats.input_bytes.observe(input_size)
+            stats.output_bytes.observe(output_size)
+
+    def snapshot(self):
+        """툴별 요약 (호출 수, 오류 수, 평균/총 지연 시간)"""
+        with self._lock:
+            return {
+                tool: {
+                    "calls": s.calls,
+                    "errors": s.errors,
+                    "latency_sum": s.latency.sum,
+                    "latency_avg": s.latency.sum / s.calls if s.calls else 0.0,
+                }
+                for tool, s in self._tools.items()
+            }
+
+    def render(self):
+        """Prometheus text exposition format 문자열 생성"""
+        lines = [
+            "# HELP tool_calls_total Number of tool invocations.",
+            "# TYPE tool_calls_total counter",
+        ]
+        with self._lock:
+            tools = sorted(self._tools.items())
+            lines += [f'tool_calls_total{{tool="{t}"}} {s.calls}' for t, s in tools]
+            lines += [
+                "# HELP tool_errors_total Number of tool invocations that raised an error.",
+                "# TYPE tool_errors_total counter",
+            ]
+            lines += [f'tool_errors_total{{tool="{t}"}} {s.errors}' for t, s in tools]
+            for metric, help_text, attr in (
+                ("tool_latency_seconds", "Tool latency in seconds.", "latency"),
+                ("tool_input_bytes", "Tool input payload size in bytes.", "input_bytes"),
+                ("tool_output_bytes", "Tool output payload size in bytes.", "output_bytes"),
+            ):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for t, s in tools:
+                    hist = getattr(s, attr)
+                    for bound, total in hist.cumulative():
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f'{metric}_bucket{{tool="{t}",le="{le}"}} {total}')
+                    lines.append(f'{metric}_sum{{tool="{t}"}} {hist.sum}')
+                    lines.append(f'{metric}_count{{tool="{t}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """파일에 원자적으로 저장 (node_exporter textfile collector에서 읽을 수 있음)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+# ✅ 프로세스 전체에서 공유하는 기본 레지스트리 (Streamlit rerun 시에도 유지됨)
+REGISTRY = MetricsRegistry()
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """툴 시작/종료/오류 콜백을 받아 레지스트리에 기록"""
+
+    def __init__(self, registry=REGISTRY):
+        self.registry = registry
+        self._runs = {}  # run_id -> (tool 이름, 시작 시각, 입력 크기)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "unknown")
+        self._runs[run_id] = (name, time.perf_counter(), len(str(input_str).encode("utf-8")))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish(run_id, _payload_size(output), error=False)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, 0, error=True)
+
+    def _finish(self, run_id, output_size, error):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        name, start, input_size = run
+        self.registry.observe(name, time.perf_counter() - start, input_size, output_size, error)
+
+
+def _payload_size(output):
+    content = getattr(output, "content", output)  # ToolMessage인 경우 content만 측정
+    return len(str(content).encode("utf-8"))
+
+
+# ------------------------------------------------------------
+# 내보내기 (파일 / HTTP)
+# ------------------------------------------------------------
+_exporter_lock = threading.Lock()
+_exporters = {}
+
+
+def start_exporter(path=None, port=None, interval=15.0, registry=REGISTRY):
+    """메트릭 파일 저장 스레드와 HTTP 서버를 시작 (이미 시작되었으면 다시 시작하지 않음)"""
+    with _exporter_lock:
+        if path and ("file", path) not in _exporters:
+            def _write_loop():
+                while True:
+                    time.sleep(interval)
+                    registry.write(path)
+            thread = threading.Thread(target=_write_loop, name="metrics-file-writer", daemon=True)
+            thread.start()
+            _exporters[("file", path)] = thread
+
+        if port and ("http", int(port)) not in _exporters:
+            class _Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    body = registry.render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):  # 요청 로그 출력 생략
+                    pass
+
+            server = ThreadingHTTPServer(("127.0.0.1", int(port)), _Handler)
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+            _exporters[("http", int(port))] = server
+
+
+def start_exporter_from_env(registry=REGISTRY):
+    """TOOL_METRICS_FILE / TOOL_METRICS_PORT / TOOL_METRICS_INTERVAL 환경 변수로 exporter 시작"""
+    start_exporter(
+        path=os.getenv("TOOL_METRICS_FILE", "tool_metrics.prom"),
+        port=os.getenv("TOOL_METRICS_PORT"),
+        interval=float(os.getenv("TOOL_METRICS_INTERVAL", "15")),
+        registry=registry,
+    )
@@ -0,0 +1,196 @@
+"""
+한 번의 LLM 호출로 여러 후보 수를 받아 검증하는 AI 수 생성기
+
+- ai_move가 잘못된 수가 나올 때마다 llm(messages)를 최대 5번 순서대로 다시 호출하던 루프를 대체
+- LLM에게 JSON으로 순위가 매겨진 후보 수 N개를 요청 (OpenAI JSON 모드 사용)
+- 후보는 포지션별 합법 수 캐시(chess_cache.LEGAL_MOVES)로 검증해서 첫 번째 합법 수를 선택 → 대부분 한 번의 호출로 끝남
+- 후보가 모두 틀리면 틀린 수를 알려주고 한 번만 다시 요청, 그래도 없으면 fallback(기본값: 랜덤 합법 수)
+- book(opening_book.OpeningBook)이 주어지면 LLM보다 먼저 오프닝 북을 조회
+- 호출 수/선택된 후보 순위/지연 시간을 JSONL로 기록
+
+사용 예:
+    generator = MoveGenerator(llm)
+    choice = generator.choose(board)
+    board.push_uci(choice.move)
+
+로그 요약:
+    python move_generation.py move_log.jsonl
+"""
+
+import json
+import random
+import re
+import sys
+import threading
+import time
+from typing import NamedTuple, Optional
+
+try:
+    from .chess_cache import LEGAL_MOVES
+except ImportError:  # python move_generation.py 로 직접 실행할 때
+    from chess_cache import LEGAL_MOVES
+
+_UCI = re.compile(r"\b[a-h][1-8][a-h][1-8][qrbn]?\b")
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+class MoveChoice(NamedTuple):
+    move: str  # UCI
+    source: str  # "book", "llm" 또는 "fallback"
+    rank: Optional[int]  # 선택된 후보의 순위 (0 = LLM이 가장 좋다고 한 수)
+    llm_calls: int
+    candidates: tuple
+    rejected: tuple
+    latency_ms: float
+
+
+def random_fallback(board):
+    return random.choice(LEGAL_MOVES.uci(board))
+
+
+def parse_candidates(text):
+    """LLM 응답에서 후보 수 목록을 추출 (JSON이 아니면 UCI처럼 생긴 토큰을 순서대로 사용)"""
+    text = _FENCE.sub("", text.strip())
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return _UCI.findall(text)
+    if isinstance(data, dict):
+        data = data.get("candidates") or data.get("moves") or data.get("move") or []
+    if isinstance(data, str):
+        data = [data]
+    return [str(candidate).strip() for candidate in data if str(candidate).strip()]
+
+
+def to_uci(board, candidate):
+    """후보(UCI 또는 SAN)가 합법 수면 UCI로 변환, 아니면 None"""
+    entry = LEGAL_MOVES.get(board)
+    if candidate.lower() in entry.uci_set:
+        return candidate.lower()
+    if candidate in entry.san:
+        return entry.uci[entry.san.index(candidate)]
+    return None
+
+
+class MoveGenerator:
+    """후보 N개를 한 번에 요청하고 합법 수 집합으로 검증하는 수 생성기"""
+
+    def __init__(self, llm, num_candidates=3, max_llm_calls=2, fallback=random_fallback,
+                 json_mode=True, book=None, log_path="move_log.jsonl"):
+        if json_mode and hasattr(llm, "bind"):
+            llm = llm.bind(response_format={"type": "json_object"})
+        self.llm = llm
+        self.num_candidates = num_candidates
+        self.max_llm_calls = max_llm_calls
+        self.fallback = fallback
+        self.book = book
+        self.log_path = log_path
+        self._lock = threading.Lock()
+
+    def _messages(self, board):
+        from langchain_core.messages import SystemMessage, HumanMessage
+
+        color = "White" if board.turn else "Black"
+        entry = LEGAL_MOVES.get(board)
+        return [
+            SystemMessage(content=(
+                f"You are a chess AI playing as {color}. "
+                f'Respond with JSON only: {{"candidates": [...]}} listing your {self.num_candidates} best moves '
+                "in UCI format, best first. Every candidate must be one of the legal moves."
+            )),
+            HumanMessage(content=f"""
+### 체스 현재 상태
+- FEN: {board.fen()}
+- 가능한 수: {', '.join(entry.uci)}
+"""),
+        ]
+
+    def choose(self, board, game_id=None):
+        """game_id: 오프닝 북 적중률을 게임별로 집계할 때 사용"""
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        start = time.perf_counter()
+        book_move = self.book.probe(board, game_id=game_id) if self.book else None
+        if book_move is not None:
+            result = MoveChoice(book_move.uci(), "book", None, 0, (), (), (time.perf_counter() - start) * 1000)
+            self._log(board, result)
+            return result
+
+        messages = self._messages(board)
+        candidates, rejected = [], []
+        llm_calls = 0
+        choice = None
+
+        while llm_calls < self.max_llm_calls and choice is None:
+            llm_calls += 1
+            response = self.llm.invoke(messages).content
+            round_candidates = parse_candidates(response)
+            for candidate in round_candidates:
+                candidates.append(candidate)
+                move = to_uci(board, candidate)
+                if not move:
+                    rejected.append(candidate)
+                elif choice is None:
+                    choice = (move, len(candidates) - 1)
+            if choice is None:
+                messages = messages + [
+                    AIMessage(content=response),
+                    HumanMessage(content=f"{', '.join(round_candidates) or response!r} 은(는) 합법 수가 아닙니다. 가능한 수 목록에서만 다시 고르세요."),
+                ]
+
+        if choice is not None:
+            result = MoveChoice(choice[0], "llm", choice[1], llm_calls, tuple(candidates), tuple(rejected), 0.0)
+        else:
+            result = MoveChoice(self.fallback(board), "fallback", None, llm_calls, tuple(candidates), tuple(rejected), 0.0)
+        result = result._replace(latency_ms=(time.perf_counter() - start) * 1000)
+        self._log(board, result)
+        return result
+
+    def _log(self, board, choice):
+        if not self.log_path:
+            return
+        record = {
+            "ts": time.time(),
+            "fen": board.fen(),
+            "move": choice.move,
+            "source": choice.source,
+            "rank": choice.rank,
+            "llm_calls": choice.llm_calls,
+            "rejected": list(choice.rejected),
+            "latency_ms": round(choice.latency_ms, 1),
+        }
+        with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def summarize_log(path="move_log.jsonl"):
+    """수 생성 로그에서 LLM 호출 수 분포, fallback 비율, 지연 시간 분포를 계산"""
+    calls, sources, latencies = {}, {}, []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            calls[record["llm_calls"]] = calls.get(record["llm_calls"], 0) + 1
+            sources[record["source"]] = sources.get(record["source"], 0) + 1
+            latencies.append(record["latency_ms"])
+    total = len(latencies)
+    llm_moves = total - calls.get(0, 0)  # 오프닝 북에서 둔 수는 LLM을 호출하지 않음
+    return {
+        "moves": total,
+        "llm_calls": dict(sorted(calls.items())),
+        "single_call_ratio": calls.get(1, 0) / llm_moves if llm_moves else 0.0,
+        "sources": sources,
+        "latency_ms": {q: _percentile(latencies, q) for q in (0.5, 0.9, 0.99)},
+    }
+
+
+if __name__ == "__main__":
+    summary = summarize_log(sys.argv[1] if len(sys.argv) > 1 else "move_log.jsonl")
+    print(f"📊 전체 수: {summary['moves']}, LLM을 부른 수 중 한 번의 호출로 끝난 비율: {summary['single_call_ratio']:.1%}")
+    print(f"🔁 LLM 호출 수 분포: {summary['llm_calls']}")
+    print(f"🎯 수 출처: {summary['sources']}")
+    print("⏱️ 지연 시간: " + ", ".join(f"p{int(q * 100)} {ms:.0f} ms" for q, ms in summary["latency_ms"].items()))
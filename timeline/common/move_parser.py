@@ -0,0 +1,224 @@
+"""
+chess_agent의 agent_process 앞단에서 명확한 수/명령을 LLM 없이 처리하는 파서
+
+- "e4", "Nf3", "e2e4", "e2에서 e4로", "O-O"처럼 명확한 수 입력도 agent_decision → agent_final_response
+  두 번의 LLM 호출을 거치던 것을 대체 (board.parse_san / UCI로 바로 MoveExecutionTool 실행)
+- 칸 질문("e4에 뭐 있어?"), 합법 수/보드 상태 요청, FEN만 입력한 경우("fen: ..." 포함)도 정해진 도구로 바로 연결
+  ("왜 e4가 좋은 수야?", "<FEN> 포지션에서 뭐가 좋아?"처럼 칸이나 FEN이 들어간 일반 질문은 LLM 경로로 넘김)
+- 답변은 도구 결과를 템플릿에 넣어서 만들고 (존댓말/반말은 입력 어미로 판단), 해석이 애매하면 None → 기존 LLM 경로
+- 모든 턴을 JSONL로 기록해서 LLM 호출 없이 끝난 턴의 비율을 집계 (세션별 / 프로세스 전체)
+
+사용 예:
+    command = COMMAND_PARSER.parse(user_query, board, session=session_id)
+    if command:
+        result = run_tool(command.tool, command.args)
+        return command_reply(user_query, command, result)
+
+로그 요약:
+    python move_parser.py command_log.jsonl
+"""
+
+import json
+import re
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+import chess
+
+# ✅ agent_process 한 턴의 LLM 호출 수 (agent_decision 1 + agent_final_response 1)
+LLM_CALLS_PER_AGENT_TURN = 2
+
+_SAN = re.compile(r"^(?:[O0]-[O0](?:-[O0])?|[KQRBN]?[a-h]?[1-8]?x?[a-h][1-8](?:=?[QRBNqrbn])?)[+#]?[!?]*$")
+_UCI = re.compile(r"^[a-h][1-8][a-h][1-8][qrbn]?$")
+_FROM_TO = re.compile(r"(?<![a-z])([a-h][1-8])\s*(?:에서|->|→|-|to)\s*([a-h][1-8])(?![0-9])", re.IGNORECASE)
+_SQUARE = re.compile(r"(?<![a-z])([a-h][1-8])(?![0-9])", re.IGNORECASE)
+_FEN = re.compile(r"([pnbrqkPNBRQK1-8]+(?:/[pnbrqkPNBRQK1-8]+){7}\s+[wb]\s+(?:-|[KQkq]+)\s+(?:-|[a-h][36])(?:\s+\d+\s+\d+)?)")
+_FEN_PREFIX = re.compile(r"^fen\s*:\s*", re.IGNORECASE)
+# ✅ 칸에 있는 기물을 묻는 정해진 표현만 ("e4에 뭐 있어?", "e4 칸에는 무슨 기물이 있나요?", "what's on e4?")
+_PIECE_QUERY = re.compile(
+    r"^\s*([a-h][1-8])\s*(?:칸)?\s*(?:에는|에|엔)\s*(?:뭐가?|무엇이|무슨\s*기물이?|어떤\s*기물이?|기물이?)\s*(?:있|놓여)\S*\s*[?？]?\s*$"
+    r"|^\s*what(?:'s|\s+is)\s+on\s+([a-h][1-8])\s*\??\s*$",
+    re.IGNORECASE,
+)
+
+# ✅ 수 뒤에 붙는 동사는 정해진 어간 + 어미 조합과 정확히 같을 때만 떼어냄 ("e4 해석해줘", "e4 두고 싶은데"는 LLM으로)
+MOVE_STEMS = ("이동", "이동해", "수행", "수행해", "옮겨", "둬", "해")
+MOVE_ENDINGS = ("", "줘", "줘요", "요", "라", "주세요", "주십시오")
+MOVE_WORDS = frozenset(stem + ending for stem in MOVE_STEMS for ending in MOVE_ENDINGS) | {
+    "둘게", "둘게요", "둘래", "둘래요", "두세요", "두십시오", "줘", "줘요", "주세요", "play", "move",
+}
+LEGAL_CUES = ("합법 수", "합법수", "가능한 수", "둘 수 있는", "legal move")
+STATE_CUES = ("보드 상태", "현재 상태", "fen 알려", "fen 보여", "현재 fen", "board state")
+_POLITE = re.compile(r"(요|니다|세요|십시오)[.!?\s]*$")
+
+
+class ParsedCommand(NamedTuple):
+    tool: str
+    args: dict
+    reason: str
+
+
+def _strip_move_words(text):
+    """'e4 둬', 'Nf3로 이동해줘' → 'e4', 'Nf3'"""
+    words = text.split()
+    while len(words) > 1 and words[-1].strip(" .!").lower() in MOVE_WORDS:
+        words.pop()
+    token = " ".join(words).strip(" .!")
+    return re.sub(r"(으로|로|를|을)$", "", token) if " " not in token else token
+
+
+def _only_move_words(text):
+    """'로 이동해줘', '' → True / '로 두면 안 돼' → False"""
+    words = re.sub(r"^(으로|로|까지)", "", text.strip()).split()
+    return all(word.strip(" .!").lower() in MOVE_WORDS for word in words)
+
+
+def extract_fen(text):
+    """텍스트에 들어 있는 유효한 FEN 문자열, 없으면 None"""
+    match = _FEN.search(text)
+    if not match:
+        return None
+    try:
+        chess.Board(match.group(1))
+    except ValueError:
+        return None
+    return match.group(1)
+
+
+def parse_command(text, board):
+    """명확하게 해석되는 입력이면 ParsedCommand, 아니면 None"""
+    stripped = text.strip()
+    lowered = stripped.lower()
+
+    if _FEN.search(stripped):
+        # FEN만 있는 입력일 때만 보드를 바꿈 (FEN이 들어간 질문은 LLM → SearchChessKnowledgeTool)
+        fen = extract_fen(stripped)
+        bare = _FEN_PREFIX.sub("", stripped).strip()
+        return ParsedCommand("SetBoardStateTool", {"fen": fen}, "fen") if fen and bare == fen else None
+
+    if any(cue in lowered for cue in LEGAL_CUES):
+        return ParsedCommand("LegalMovesTool", {}, "legal_moves")
+    if any(cue in lowered for cue in STATE_CUES):
+        return ParsedCommand("BoardStateTool", {}, "board_state")
+
+    piece_query = _PIECE_QUERY.match(stripped)
+    if piece_query:
+        return ParsedCommand("PieceInfoTool", {"square": (piece_query.group(1) or piece_query.group(2)).lower()}, "square_query")
+    if stripped.endswith(("?", "？")):
+        return None  # "e4?", "e4 두면 좋을까?" 같은 질문은 수로 실행하지 않음
+
+    from_to = _FROM_TO.search(stripped)
+    if from_to and len(_SQUARE.findall(stripped)) == 2 and _only_move_words(stripped[from_to.end():]):
+        move = (from_to.group(1) + from_to.group(2)).lower()
+        piece = board.piece_at(chess.parse_square(from_to.group(1).lower()))
+        last_rank = chess.square_rank(chess.parse_square(from_to.group(2).lower())) in (0, 7)
+        if piece and piece.piece_type == chess.PAWN and last_rank:
+            move += "q"  # 승급 기물을 말하지 않으면 퀸
+        return ParsedCommand("MoveExecutionTool", {"move": move}, "from_to")
+
+    token = _strip_move_words(stripped)
+    if " " not in token and (_UCI.match(token.lower()) or _SAN.match(token)):
+        move = token.rstrip("?!")
+        move = move.replace("0", "O") if move[0] == "0" else move
+        return ParsedCommand("MoveExecutionTool", {"move": move.lower() if _UCI.match(move.lower()) else move}, "move")
+    return None
+
+
+def is_polite(text):
+    return bool(_POLITE.search(text.strip()))
+
+
+def command_reply(user_query, command, result):
+    """도구 결과를 템플릿 답변으로 (LLM 호출 없음)"""
+    polite = is_polite(user_query)
+    if command.tool == "MoveExecutionTool":
+        done = "성공적으로 수행" in result
+        if done:
+            return f"{command.args['move']} 이걸 수행했어{'요' if polite else ''}. {result}"
+        return f"{command.args['move']}은(는) 둘 수 없는 수{'예요' if polite else '야'}. {result}"
+    if command.tool == "SetBoardStateTool":
+        return f"보드를 바꿨어{'요' if polite else ''}. {result}"
+    return f"{result}{'입니다' if polite and not result.endswith('.') else ''}"
+
+
+class CommandParser:
+    """parse_command + 턴별 기록 (LLM 없이 끝난 턴 비율을 세션별과 프로세스 전체로 집계)"""
+
+    def __init__(self, log_path="command_log.jsonl"):
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.fast_turns = 0
+        self._sessions = {}  # session → [턴 수, LLM 없이 끝난 턴 수]
+
+    def parse(self, text, board, session=None):
+        start = time.perf_counter()
+        command = parse_command(text, board)
+        latency_us = (time.perf_counter() - start) * 1e6
+        with self._lock:
+            self.turns += 1
+            self.fast_turns += command is not None
+            if session is not None:
+                counts = self._sessions.setdefault(session, [0, 0])
+                counts[0] += 1
+                counts[1] += command is not None
+        self._log(text, command, latency_us)
+        return command
+
+    def stats(self, session=None):
+        """session이 주어지면 그 세션의 통계, 아니면 프로세스 전체 누적 통계"""
+        with self._lock:
+            turns, fast_turns = self._sessions.get(session, (0, 0)) if session is not None else (self.turns, self.fast_turns)
+        return {
+            "turns": turns,
+            "fast_turns": fast_turns,
+            "fast_ratio": fast_turns / turns if turns else 0.0,
+            "avoided_llm_calls": fast_turns * LLM_CALLS_PER_AGENT_TURN,
+        }
+
+    def _log(self, text, command, latency_us):
+        if not self.log_path:
+            return
+        record = {
+            "ts": time.time(),
+            "route": "fast" if command else "llm",
+            "tool": command.tool if command else None,
+            "reason": command.reason if command else None,
+            "chars": len(text),
+            "latency_us": round(latency_us, 1),
+        }
+        with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+# ✅ 프로세스 단위 공유 파서 (프로세스 누적 통계 + 세션별 통계)
+COMMAND_PARSER = CommandParser()
+
+
+def summarize_log(path="command_log.jsonl"):
+    """파서 로그에서 LLM 없이 처리한 턴 비율과 절약한 LLM 호출 수를 계산"""
+    total = fast = 0
+    tools = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            total += 1
+            if record["route"] == "fast":
+                fast += 1
+                tools[record["tool"]] = tools.get(record["tool"], 0) + 1
+    return {
+        "turns": total,
+        "fast_turns": fast,
+        "fast_ratio": fast / total if total else 0.0,
+        "avoided_llm_calls": fast * LLM_CALLS_PER_AGENT_TURN,
+        "tools": tools,
+    }
+
+
+if __name__ == "__main__":
+    summary = summarize_log(sys.argv[1] if len(sys.argv) > 1 else "command_log.jsonl")
+    print(f"📊 전체 턴: {summary['turns']}, LLM 없이 처리: {summary['fast_turns']} ({summary['fast_ratio']:.1%})")
+    print(f"💰 절약한 LLM 호출: {summary['avoided_llm_calls']}회")
+    print(f"🔧 도구별: {summary['tools']}")
@@ -0,0 +1,204 @@
+"""
+PGN으로 만드는 오프닝 북 (초반 수는 LLM/엔진 호출 없이 바로 둠)
+
+- 초반 포지션은 모든 게임에서 같은데도 ai_move가 매번 LLM 왕복(또는 엔진 탐색)을 하던 것을 대체
+- PGN 기보의 앞부분(기본 20수)에서 (포지션 Zobrist 해시, 수) → 가중치를 모아서
+  Polyglot 형식의 정렬된 바이너리 파일(16바이트 엔트리: key u64, move u16, weight u16, learn u32)로 저장
+- 읽을 때는 chess.polyglot 리더가 파일을 mmap해서 이진 탐색 (파일 전체를 메모리에 올리지 않음)
+- 가중치: 그 수를 둔 쪽 기준 승 3 / 무 2 / 패 1 을 모두 더한 값 (둔 적 있는 수는 모두 후보로 남김)
+- 기본 북(data/opening_book.bin)은 data/openings.pgn이 바뀌면 처음 조회할 때 다시 빌드
+  data/에 쓸 수 없는 배포 환경이면 CHESS_CACHE_DIR(기본값 임시 폴더/chess-chatbot)에 빌드하고,
+  그것도 안 되면 북 없이 진행 (probe는 None을 반환하고 LLM/엔진이 수를 고름)
+- 게임별 조회 수/적중 수를 집계해서 적중률을 보고
+
+사용 예:
+    move = OPENING_BOOK.probe(board, game_id=st.session_state.game_id)
+    if move is None:
+        ...  # LLM/엔진으로 수 선택
+
+빌드/조회:
+    python opening_book.py games1.pgn games2.pgn -o my_book.bin
+    python opening_book.py   # 기본 북을 다시 빌드하고 조회 시간/적중률 측정
+"""
+
+import os
+import random
+import struct
+import tempfile
+import threading
+
+import chess
+import chess.pgn
+import chess.polyglot
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_PGN = os.path.join(DATA_DIR, "openings.pgn")
+DEFAULT_BOOK = os.getenv("OPENING_BOOK", os.path.join(DATA_DIR, "opening_book.bin"))
+CACHE_DIR = os.getenv("CHESS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "chess-chatbot"))
+
+_ENTRY = struct.Struct(">QHHI")
+_RESULT_WEIGHTS = {"1-0": (3, 1), "0-1": (1, 3), "1/2-1/2": (2, 2)}  # (백이 둔 수, 흑이 둔 수)
+
+
+def encode_move(board, move):
+    """Polyglot 수 인코딩 (캐슬링은 킹이 자기 룩 칸으로 가는 수로 표현)"""
+    to_square = move.to_square
+    if board.is_castling(move):
+        to_square = chess.square(7 if board.is_kingside_castling(move) else 0, chess.square_rank(move.from_square))
+    promotion = move.promotion - 1 if move.promotion else 0  # 나이트 1 ~ 퀸 4
+    return (
+        chess.square_file(to_square)
+        | chess.square_rank(to_square) << 3
+        | chess.square_file(move.from_square) << 6
+        | chess.square_rank(move.from_square) << 9
+        | promotion << 12
+    )
+
+
+def build_book(pgn_paths, out_path=DEFAULT_BOOK, max_plies=40):
+    """PGN 파일들로 Polyglot 북을 만들고 (게임 수, 엔트리 수)를 반환"""
+    weights = {}
+    games = 0
+    for path in pgn_paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            while True:
+                game = chess.pgn.read_game(f)
+                if game is None:
+                    break
+                white_weight, black_weight = _RESULT_WEIGHTS.get(game.headers.get("Result"), (1, 1))
+                board = game.board()
+                for ply, move in enumerate(game.mainline_moves()):
+                    if ply >= max_plies:
+                        break
+                    key = (chess.polyglot.zobrist_hash(board), encode_move(board, move))
+                    weights[key] = weights.get(key, 0) + (white_weight if board.turn == chess.WHITE else black_weight)
+                    board.push(move)
+                games += 1
+
+    scale = max(1, max(weights.values(), default=0) / 0xFFFF)  # u16 범위를 넘으면 비율을 유지하며 줄임
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        for (key, raw_move), weight in sorted(weights.items()):
+            f.write(_ENTRY.pack(key, raw_move, max(1, int(weight / scale)), 0))
+    os.replace(tmp_path, out_path)
+    return games, len(weights)
+
+
+def _stale(path, source):
+    return not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(source)
+
+
+class OpeningBook:
+    """Polyglot 북 조회 + 게임별 적중률 집계"""
+
+    def __init__(self, path=DEFAULT_BOOK, source_pgn=None, weighted=True):
+        """source_pgn이 주어지면 북이 없거나 PGN보다 오래됐을 때 자동으로 빌드. weighted=False면 항상 가중치가 가장 큰 수"""
+        self.path = path
+        self.source_pgn = source_pgn
+        self.weighted = weighted
+        self._reader = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._games = {}
+
+    def _open(self):
+        """북 reader (열 수 없으면 None)"""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    try:
+                        self._reader = chess.polyglot.open_reader(self._ensure_built())
+                    except OSError as e:  # 읽기 전용 배포 등: 북 없이 진행 (ai_move까지 예외를 올리지 않음)
+                        print(f"⚠️ 오프닝 북을 열 수 없어서 북 없이 진행합니다 ({e})")
+                    self._loaded = True
+        return self._reader
+
+    def _ensure_built(self):
+        """읽을 북 파일 경로. PGN이 더 새로우면 다시 빌드하고, path에 쓸 수 없으면 CACHE_DIR에 빌드"""
+        if not self.source_pgn or not _stale(self.path, self.source_pgn):
+            return self.path
+        try:
+            build_book([self.source_pgn], self.path)
+            return self.path
+        except OSError:
+            cache_path = os.path.join(CACHE_DIR, os.path.basename(self.path))
+            if _stale(cache_path, self.source_pgn):
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                build_book([self.source_pgn], cache_path)
+            return cache_path
+
+    def moves(self, board):
+        """(수, 가중치) 목록, 가중치가 큰 순서"""
+        reader = self._open()
+        if reader is None:
+            return []
+        entries = sorted(reader.find_all(board), key=lambda entry: entry.weight, reverse=True)
+        return [(entry.move, entry.weight) for entry in entries]
+
+    def probe(self, board, game_id=None):
+        """북에 있는 수(chess.Move) 또는 None. game_id가 주어지면 그 게임의 적중률에 반영"""
+        candidates = self.moves(board)
+        move = None
+        if candidates:
+            if self.weighted:
+                move = random.choices([m for m, _ in candidates], weights=[w for _, w in candidates])[0]
+            else:
+                move = candidates[0][0]
+        if game_id is not None:
+            with self._lock:
+                stats = self._games.setdefault(game_id, {"probes": 0, "hits": 0, "last_book_ply": None})
+                stats["probes"] += 1
+                if move is not None:
+                    stats["hits"] += 1
+                    stats["last_book_ply"] = board.ply() + 1
+        return move
+
+    def game_stats(self, game_id):
+        with self._lock:
+            stats = dict(self._games.get(game_id, {"probes": 0, "hits": 0, "last_book_ply": None}))
+        stats["hit_rate"] = stats["hits"] / stats["probes"] if stats["probes"] else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            if self._reader is not None:
+                self._reader.close()
+            self._reader, self._loaded = None, False
+
+
+# ✅ 동봉된 PGN(data/openings.pgn)으로 만든 기본 북 (프로세스 단위 공유)
+OPENING_BOOK = OpeningBook(source_pgn=DEFAULT_PGN)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="PGN → Polyglot 오프닝 북 빌드")
+    parser.add_argument("pgn", nargs="*", default=[DEFAULT_PGN])
+    parser.add_argument("-o", "--output", default=DEFAULT_BOOK)
+    parser.add_argument("--max-plies", type=int, default=40)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    games, entries = build_book(args.pgn, args.output, args.max_plies)
+    print(f"📚 게임 {games}개 → 엔트리 {entries}개 ({os.path.getsize(args.output):,} bytes), {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # 양쪽 모두 북을 따라 두다가 북이 끝나면 랜덤으로 두는 게임 100판
+    book = OpeningBook(args.output)
+    rng = random.Random(0)
+    probe_time, probes = 0.0, 0
+    for game_id in range(100):
+        board = chess.Board()
+        for _ in range(30):
+            start = time.perf_counter()
+            move = book.probe(board, game_id=game_id)
+            probe_time += time.perf_counter() - start
+            probes += 1
+            board.push(move or rng.choice(list(board.legal_moves)))
+            if board.is_game_over():
+                break
+    rates = [book.game_stats(game_id) for game_id in range(100)]
+    print(f"🔎 조회 {probe_time / probes * 1e6:.0f} µs/회")
+    print(f"🎯 게임당 북 적중: 평균 {sum(s['hits'] for s in rates) / len(rates):.1f}수 / 30수, "
+          f"북을 벗어난 평균 수순 {sum(s['last_book_ply'] or 0 for s in rates) / len(rates):.1f}ply")
@@ -0,0 +1,371 @@
+"""
+컴파일된 LangGraph 워크플로우와 LLM 클라이언트의 프로세스 단위 레지스트리
+
+- Streamlit은 상호작용마다 스크립트 전체를 다시 실행해서, 모듈 최상단의 StateGraph(...) + graph.compile()과
+  ChatOpenAI(...) 생성이 매번 반복됨 (chess-game-chatbot은 chess_ai_node 호출마다 ChatOpenAI를 새로 만듦)
+- get_graph: 이름별로 한 번만 빌드/컴파일해서 재사용
+  - 스크립트가 다시 실행될 때마다 노드 함수는 새로 정의되고(board_placeholder 같은 실행별 객체를 참조),
+    여러 세션이 동시에 실행되므로, 컴파일된 그래프에는 "현재 실행의 노드 함수"를 호출하는 프록시를 넣음
+  - 현재 실행의 노드 함수는 contextvars로 보관 (세션 스레드마다 분리, LangGraph 작업 스레드로도 전달됨)
+  - 노드/엣지 구성을 바꿨으면 서버를 다시 시작하거나 clear()를 호출 (노드 함수 내용만 바뀐 건 바로 반영됨)
+- get_llm: 클래스 + 생성 인자(api_key 포함)가 같으면 같은 클라이언트를 재사용
+- http_client / get_openai_client: API 키(+ base_url)별로 오래 유지하는 httpx.Client 연결 풀 하나를 공유
+  - multimodal_chatbot은 메시지마다 openai.OpenAI(...)를 새로 만들어서 keep-alive 연결과 TLS 세션을 매번 버렸음
+  - get_llm도 http_client를 받는 클래스(ChatOpenAI)면 같은 키의 풀을 넣어서, 모델이 달라도 연결을 공유
+  - httpx.Client / openai.OpenAI는 스레드 안전 → 여러 세션이 동시에 요청해도 풀에서 연결을 나눠 씀
+  - 풀마다 요청 수와 새로 연 TCP 연결/TLS 핸드셰이크 수를 집계 (httpcore trace 확장)
+- 빌드 횟수/재사용 횟수/빌드 시간을 집계
+
+사용 예:
+    def build_graph(node):
+        graph = StateGraph(State)
+        graph.add_node("ai_move", node("ai_move"))
+        ...
+        return graph
+
+    app = get_graph("My_chess_page", build_graph, nodes={"ai_move": ai_move, ...})
+    llm = get_llm(ChatOpenAI, model="gpt-4o-mini", temperature=0.5)
+    client = get_openai_client(openai_api_key)
+
+벤치마크:
+    python registry.py
+"""
+
+import contextvars
+import hashlib
+import threading
+import time
+
+import httpx
+
+_lock = threading.Lock()
+_graphs = {}
+_llms = {}
+_http_clients = {}
+_openai_clients = {}
+_stats = {}
+_current_nodes = contextvars.ContextVar("registry_current_nodes", default={})
+
+
+def _record(key, build_ms=None):
+    entry = _stats.setdefault(key, {"builds": 0, "hits": 0, "build_ms": 0.0})
+    if build_ms is None:
+        entry["hits"] += 1
+    else:
+        entry["builds"] += 1
+        entry["build_ms"] += build_ms
+
+
+def _proxy(graph_name, node_name):
+    def node(state):
+        return _current_nodes.get()[graph_name][node_name](state)
+
+    node.__name__ = node_name
+    return node
+
+
+def get_graph(name, build, nodes=None):
+    """name별로 build(node)가 돌려준 StateGraph를 한 번만 compile해서 반환
+
+    nodes: 이번 실행의 {노드 이름: 함수}. build 안에서 node("이름")으로 넣은 노드는 호출될 때 이 함수를 실행
+    """
+    if nodes is not None:
+        _current_nodes.set({**_current_nodes.get(), name: nodes})
+    compiled = _graphs.get(name)
+    if compiled is None:
+        with _lock:
+            compiled = _graphs.get(name)
+            if compiled is None:
+                start = time.perf_counter()
+                compiled = _graphs[name] = build(lambda node_name: _proxy(name, node_name)).compile()
+                _record(f"graph:{name}", (time.perf_counter() - start) * 1000)
+                return compiled
+    with _lock:
+        _record(f"graph:{name}")
+    return compiled
+
+
+def get_llm(cls=None, **kwargs):
+    """같은 클래스 + 같은 인자면 이미 만든 클라이언트를 반환 (기본 클래스: langchain_openai.ChatOpenAI)
+
+    동기/비동기 클라이언트를 따로 받는 클래스(langchain_openai.ChatOpenAI)면 API 키별 공유 연결 풀(http_client())을 넣어서 생성
+    (langchain.chat_models.ChatOpenAI는 http_client 하나를 AsyncOpenAI에도 넘겨서 httpx.Client를 넣으면 TypeError)
+    """
+    if cls is None:
+        from langchain_openai import ChatOpenAI as cls
+    key = (cls, tuple(sorted((name, repr(value)) for name, value in kwargs.items())))
+    llm = _llms.get(key)
+    if llm is None:
+        fields = getattr(cls, "model_fields", None) or getattr(cls, "__fields__", None) or {}
+        if "http_client" in fields and "http_async_client" in fields and "http_client" not in kwargs:
+            api_key = kwargs.get("api_key") or kwargs.get("openai_api_key")
+            base_url = kwargs.get("base_url") or kwargs.get("openai_api_base")
+            if api_key:
+                kwargs = {**kwargs, "http_client": http_client(api_key, base_url)}
+        with _lock:
+            llm = _llms.get(key)
+            if llm is None:
+                start = time.perf_counter()
+                llm = _llms[key] = cls(**kwargs)
+                _record(f"llm:{cls.__name__}:{kwargs.get('model') or kwargs.get('model_name')}", (time.perf_counter() - start) * 1000)
+                return llm
+    with _lock:
+        _record(f"llm:{cls.__name__}:{kwargs.get('model') or kwargs.get('model_name')}")
+    return llm
+
+
+# --------------------------------------------------------
+# API 키별 HTTP 연결 풀
+# --------------------------------------------------------
+def _key_digest(api_key):
+    """클라이언트 캐시 키 (키 자체는 남기지 않음). 짧게 자르면 다른 사용자의 키와 겹쳐 클라이언트를 나눠 쓸 수 있으므로 전체 해시"""
+    return hashlib.sha256(str(api_key).encode()).hexdigest()
+
+
+def _key_id(api_key):
+    """통계 이름에만 쓰는 짧은 키 식별자"""
+    return _key_digest(api_key)[:8]
+
+
+class _PoolStats:
+    """요청 수와 새 연결 수 (재사용 비율 = 1 - 새 연결 / 요청)"""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+        self._lock = threading.Lock()
+
+    def _trace(self, event, info):
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections += 1
+        elif event == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    def on_request(self, request):
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "tls_handshakes": self.tls_handshakes,
+                "reuse_rate": 1 - self.connections / self.requests if self.requests else 0.0,
+            }
+
+
+def http_client(api_key=None, base_url=None, max_connections=20, keepalive_expiry=300.0, timeout=60.0):
+    """API 키(+ base_url)별로 하나씩 만드는 오래 유지되는 httpx.Client (연결 풀 공유)"""
+    key = (_key_digest(api_key), base_url)
+    client = _http_clients.get(key)
+    if client is None:
+        with _lock:
+            client = _http_clients.get(key)
+            if client is None:
+                pool = _PoolStats()
+                client = httpx.Client(
+                    timeout=timeout,
+                    limits=httpx.Limits(
+                        max_connections=max_connections,
+                        max_keepalive_connections=max_connections,
+                        keepalive_expiry=keepalive_expiry,
+                    ),
+                    event_hooks={"request": [pool.on_request]},
+                )
+                client.pool_stats = pool
+                _http_clients[key] = client
+    return client
+
+
+def get_openai_client(api_key, base_url=None, **kwargs):
+    """API 키(+ base_url + 옵션)별로 하나씩 만드는 openai.OpenAI (http_client()의 연결 풀 사용)"""
+    key = (_key_digest(api_key), base_url, tuple(sorted((name, repr(value)) for name, value in kwargs.items())))
+    client = _openai_clients.get(key)
+    if client is None:
+        import openai
+
+        shared = http_client(api_key, base_url)
+        with _lock:
+            client = _openai_clients.get(key)
+            if client is None:
+                start = time.perf_counter()
+                client = _openai_clients[key] = openai.OpenAI(api_key=api_key, base_url=base_url, http_client=shared, **kwargs)
+                _record(f"openai:{_key_id(api_key)}", (time.perf_counter() - start) * 1000)
+                return client
+    with _lock:
+        _record(f"openai:{_key_id(api_key)}")
+    return client
+
+
+def stats():
+    with _lock:
+        result = {key: dict(entry) for key, entry in _stats.items()}
+        for (key_digest, base_url), client in _http_clients.items():
+            result[f"http:{key_digest[:8]}" + (f"@{base_url}" if base_url else "")] = client.pool_stats.snapshot()
+        return result
+
+
+def clear():
+    with _lock:
+        _graphs.clear()
+        _llms.clear()
+        _openai_clients.clear()
+        for client in _http_clients.values():
+            client.close()
+        _http_clients.clear()
+        _stats.clear()
+
+
+if __name__ == "__main__":
+    from typing import TypedDict
+
+    from langgraph.graph import StateGraph, START, END
+
+    class State(TypedDict):
+        fen: str
+        current_node: str
+
+    # chess_manual / My_chess_page와 같은 모양의 4노드 그래프
+    def build_graph(node):
+        graph = StateGraph(State)
+        for name in ("user_move", "ai_move", "check_status", "game_over"):
+            graph.add_node(name, node(name))
+        graph.add_edge(START, "user_move")
+        graph.add_edge("user_move", "check_status")
+        graph.add_edge("ai_move", "check_status")
+        graph.add_conditional_edges(
+            "check_status",
+            lambda state: state["current_node"],
+            {"ai_move": "ai_move", "user_move": "user_move", "game_over": "game_over"},
+        )
+        graph.add_edge("game_over", END)
+        return graph
+
+    def make_nodes(run):
+        # 실행마다 새로 정의되는 노드 함수 (Streamlit 재실행과 같은 상황)
+        return {
+            "user_move": lambda state: {"current_node": "ai_move"},
+            "ai_move": lambda state: {"current_node": "game_over", "fen": f"run {run}"},
+            "check_status": lambda state: state,
+            "game_over": lambda state: state,
+        }
+
+    reruns = 200
+    start = time.perf_counter()
+    for run in range(reruns):
+        nodes = make_nodes(run)
+        app = build_graph(lambda name: nodes[name]).compile()
+        app.invoke({"fen": "", "current_node": "user_move"})
+    uncached_ms = (time.perf_counter() - start) * 1000 / reruns
+
+    start = time.perf_counter()
+    for run in range(reruns):
+        app = get_graph("bench", build_graph, nodes=make_nodes(run))
+        result = app.invoke({"fen": "", "current_node": "user_move"})
+        assert result["fen"] == f"run {run}"  # 캐시된 그래프도 이번 실행의 노드 함수를 호출
+    cached_ms = (time.perf_counter() - start) * 1000 / reruns
+
+    start = time.perf_counter()
+    for run in range(reruns):
+        get_graph("bench", build_graph, nodes=make_nodes(run))
+    lookup_us = (time.perf_counter() - start) * 1e6 / reruns
+
+    graph_stats = stats()["graph:bench"]
+    print(f"🏗️ 그래프 빌드 + compile: {graph_stats['build_ms']:.1f} ms (1회)")
+    print(f"🔁 재실행당 (빌드 + 실행): 매번 compile {uncached_ms:.2f} ms → 레지스트리 {cached_ms:.2f} ms")
+    print(f"🔎 레지스트리 조회 + 노드 함수 등록: {lookup_us:.1f} µs/재실행")
+
+    try:
+        from langchain_openai import ChatOpenAI
+    except ImportError:
+        print("⚠️ langchain_openai가 없어서 ChatOpenAI 생성 시간은 건너뜀")
+    else:
+        start = time.perf_counter()
+        for _ in range(20):
+            ChatOpenAI(model="gpt-4o-mini", api_key="sk-bench")
+        new_ms = (time.perf_counter() - start) * 1000 / 20
+        start = time.perf_counter()
+        for _ in range(20):
+            get_llm(ChatOpenAI, model="gpt-4o-mini", api_key="sk-bench")
+        print(f"🤖 ChatOpenAI: 매번 생성 {new_ms:.2f} ms → 레지스트리 {(time.perf_counter() - start) * 1000 / 20:.3f} ms")
+
+    # --------------------------------------------------------
+    # API 키별 연결 풀: 로컬 chat.completions 대역 서버로 요청마다 새 클라이언트 vs 공유 풀 비교
+    # --------------------------------------------------------
+    import json
+    from concurrent.futures import ThreadPoolExecutor
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    COMPLETION = json.dumps({
+        "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": "gpt-4-turbo",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": "stub"}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }).encode()
+
+    class StandIn(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+        disable_nagle_algorithm = True  # 헤더/본문을 따로 쓸 때 delayed ACK로 40 ms씩 밀리지 않도록
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(COMPLETION)))
+            self.end_headers()
+            self.wfile.write(COMPLETION)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    body = {"model": "gpt-4-turbo", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 5}
+    requests_count = 200
+
+    start = time.perf_counter()
+    for _ in range(requests_count):
+        with httpx.Client(timeout=60.0) as client:  # 메시지마다 openai.OpenAI(...)를 만들 때와 같은 상황
+            client.post(base_url + "/chat/completions", json=body).raise_for_status()
+    fresh_ms = (time.perf_counter() - start) * 1000 / requests_count
+
+    shared = http_client("sk-bench", base_url)
+    start = time.perf_counter()
+    for _ in range(requests_count):
+        shared.post(base_url + "/chat/completions", json=body).raise_for_status()
+    pooled_ms = (time.perf_counter() - start) * 1000 / requests_count
+    print(f"🌐 요청당 지연 (로컬 대역, {requests_count}회): 매번 새 클라이언트(SSL 컨텍스트 생성 + 새 연결) {fresh_ms:.2f} ms → 공유 풀 {pooled_ms:.2f} ms ({fresh_ms / pooled_ms:.1f}배)")
+
+    def burst(_):
+        client = http_client("sk-bench", base_url)  # 세션 스레드마다 같은 풀을 받음
+        for _ in range(25):
+            client.post(base_url + "/chat/completions", json=body).raise_for_status()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(burst, range(8)))
+    print(f"🧵 8개 스레드 동시 요청 200회: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    try:
+        import openai
+    except ImportError:
+        print("⚠️ openai 패키지가 없어서 SDK 클라이언트 비교는 건너뜀 (httpx 연결 풀만 측정)")
+    else:
+        start = time.perf_counter()
+        for _ in range(50):
+            openai.OpenAI(api_key="sk-bench", base_url=base_url).chat.completions.create(**body)
+        new_ms = (time.perf_counter() - start) * 1000 / 50
+        start = time.perf_counter()
+        for _ in range(50):
+            get_openai_client("sk-bench", base_url=base_url).chat.completions.create(**body)
+        print(f"🤖 openai.OpenAI: 메시지마다 생성 {new_ms:.2f} ms → 레지스트리 {(time.perf_counter() - start) * 1000 / 50:.2f} ms")
+
+    pool = stats()[f"http:{_key_id('sk-bench')}@{base_url}"]
+    print(f"🔌 공유 풀: 요청 {pool['requests']}회 / 새 연결 {pool['connections']}개 (재사용 {pool['reuse_rate']:.1%})")
+    clear()
+    server.shutdown()
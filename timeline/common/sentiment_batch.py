@@ -0,0 +1,203 @@
+"""
+대화 로그 전체를 VADER로 감정 분석하는 배치 모드 (프로세스 풀 병렬 처리)
+
+- 입력: 대화 저장소 JSON ({thread_id: [{"user": ..., "agent": ...}, ...]}), JSONL, 또는 문장 iterable
+- 워커 프로세스마다 initializer에서 동봉된 VADER 어휘 사전(common/vader.py)을 한 번만 로드
+- 한국어 문장은 번역 없이 한국어 감정 사전(common/korean_sentiment.py)으로 분석
+- 청크 단위로 제출하고 동시에 처리 중인 청크 수를 제한해서, 수백만 턴도 메모리를 일정하게 유지
+- 결과는 Parquet(열 기반) 파일에 청크가 끝날 때마다 이어서 기록
+
+사용 예:
+    python sentiment_batch.py conversations.json -o sentiment.parquet --processes 4
+    python sentiment_batch.py turns.jsonl -o sentiment.parquet --translate   # 모든 문장을 영어로 번역 후 VADER로 분석
+
+    for scores in score_texts(["so sad", "I love it"]):
+        print(scores)  # (neg, neu, pos, compound)
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# ✅ 기존 analyze_sentiment와 같은 기준
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+
+def sentiment_label(compound):
+    if compound > POSITIVE_THRESHOLD:
+        return "긍정적 😀"
+    if compound < NEGATIVE_THRESHOLD:
+        return "부정적 😞"
+    return "중립적 😐"
+
+
+# ------------------------------------------------------------
+# 워커 프로세스
+# ------------------------------------------------------------
+_worker_sia = None
+_worker_korean_sia = None
+_worker_is_korean = None
+
+
+def _init_worker():
+    """워커마다 한 번만 어휘 사전을 읽어서 분석기를 만듦"""
+    global _worker_sia, _worker_korean_sia, _worker_is_korean
+    from common.vader import get_analyzer
+    from common.korean_sentiment import is_korean, load_default_analyzer
+
+    _worker_sia = get_analyzer()
+    _worker_korean_sia = load_default_analyzer()
+    _worker_is_korean = is_korean
+
+
+def _score_chunk(texts):
+    scores = []
+    for text in texts:
+        analyzer = _worker_korean_sia if _worker_is_korean(text) else _worker_sia
+        s = analyzer.polarity_scores(text)
+        scores.append((s["neg"], s["neu"], s["pos"], s["compound"]))
+    return scores
+
+
+# ------------------------------------------------------------
+# 입력 읽기
+# ------------------------------------------------------------
+def iter_conversation_turns(path):
+    """대화 저장소에서 {"thread_id", "turn", "role", "text"} 레코드를 순서대로 생성
+
+    - .json: save_memory_to_json()이 만드는 {thread_id: [{"user": ..., "agent": ...}]} 형식
+    - .jsonl: 한 줄에 {"thread_id", "user", "agent"} 하나 (대용량 로그는 이 형식으로 스트리밍)
+    """
+    if path.endswith(".jsonl"):
+        turns = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                thread_id = str(record.get("thread_id", ""))
+                turn = turns[thread_id] = turns.get(thread_id, -1) + 1
+                yield from _turn_records(thread_id, turn, record)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for thread_id, conversations in data.items():
+        for turn, record in enumerate(conversations):
+            yield from _turn_records(thread_id, turn, record)
+
+
+def _turn_records(thread_id, turn, record):
+    for role in ("user", "agent"):
+        text = record.get(role)
+        if text:
+            yield {"thread_id": thread_id, "turn": turn, "role": role, "text": text}
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ------------------------------------------------------------
+# 병렬 분석
+# ------------------------------------------------------------
+def _score_chunks(chunks, processes=None, max_in_flight=None, text_of=lambda item: item):
+    """(청크, 점수 목록)을 입력 순서대로 생성. 처리 중인 청크 수를 제한해서 입력을 천천히 소비함"""
+    processes = processes or os.cpu_count() or 1
+    max_in_flight = max_in_flight or processes * 2
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, executor.submit(_score_chunk, [text_of(item) for item in chunk])))
+            if len(pending) >= max_in_flight:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+
+
+def score_texts(texts, processes=None, chunk_size=2000):
+    """문장 iterable을 프로세스 풀로 분석해서 (neg, neu, pos, compound)를 순서대로 생성"""
+    for _, scores in _score_chunks(_chunked(texts, chunk_size), processes):
+        yield from scores
+
+
+def score_to_parquet(records, out_path, processes=None, chunk_size=2000, translate=False):
+    """레코드({"text", ...})를 분석해서 Parquet 파일로 스트리밍 저장. 처리한 레코드 수를 반환"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet 출력에는 pyarrow가 필요합니다: pip install pyarrow") from e
+
+    schema = pa.schema([
+        ("thread_id", pa.string()),
+        ("turn", pa.int64()),
+        ("role", pa.string()),
+        ("text", pa.string()),
+        ("text_en", pa.string()),
+        ("neg", pa.float64()),
+        ("neu", pa.float64()),
+        ("pos", pa.float64()),
+        ("compound", pa.float64()),
+        ("label", pa.string()),
+    ])
+
+    chunks = _chunked(records, chunk_size)
+    if translate:  # 한국어 사전 대신 영어로 번역해서 VADER로 분석 (번역 캐시/배치 번역 사용)
+        from common.translation import get_translation_service
+
+        service = get_translation_service()
+        chunks = (
+            [dict(record, text_en=text_en) for record, text_en in zip(chunk, service.translate_batch([r["text"] for r in chunk]))]
+            for chunk in chunks
+        )
+
+    total = 0
+    with pq.ParquetWriter(out_path, schema, compression="zstd") as writer:
+        for chunk, scores in _score_chunks(chunks, processes, text_of=lambda r: r.get("text_en") or r["text"]):
+            columns = {name: [] for name in schema.names}
+            for record, (neg, neu, pos, compound) in zip(chunk, scores):
+                columns["thread_id"].append(record.get("thread_id"))
+                columns["turn"].append(record.get("turn"))
+                columns["role"].append(record.get("role"))
+                columns["text"].append(record["text"])
+                columns["text_en"].append(record.get("text_en"))
+                columns["neg"].append(neg)
+                columns["neu"].append(neu)
+                columns["pos"].append(pos)
+                columns["compound"].append(compound)
+                columns["label"].append(sentiment_label(compound))
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            total += len(chunk)
+    return total
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+    parser = argparse.ArgumentParser(description="대화 로그 배치 감정 분석 (VADER + 프로세스 풀 → Parquet)")
+    parser.add_argument("source", help="대화 저장소 .json 또는 .jsonl 파일")
+    parser.add_argument("-o", "--output", default="sentiment.parquet")
+    parser.add_argument("--processes", type=int, default=None, help="워커 프로세스 수 (기본값: CPU 수)")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--translate", action="store_true", help="한국어 사전 대신 영어로 번역 후 VADER로 분석 (translation_cache.sqlite3 사용)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = score_to_parquet(iter_conversation_turns(args.source), args.output, args.processes, args.chunk_size, args.translate)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {count:,}개 턴 분석 완료 → {args.output} ({elapsed:.1f}s, {count / elapsed if elapsed else 0:,.0f} turns/s)")
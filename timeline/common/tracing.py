@@ -0,0 +1,208 @@
+"""
+LangGraph StateGraph 앱을 위한 노드 단위 트레이싱
+
+- 노드 시작/종료, LLM/툴 하위 구간(span), 토큰 사용량을 기록
+- 턴(invoke) 단위 샘플링으로 평소에는 거의 비용이 들지 않음
+- Chrome trace(JSON, chrome://tracing / Perfetto) 또는 folded stack(flamegraph.pl, speedscope)으로 내보내기
+
+사용 예:
+    tracer = Tracer(sample_rate=0.2)
+    graph.add_node("parse_task", tracer.wrap_node("parse_task", parse_task))
+    app = graph.compile()
+    with tracer.turn():  # 턴 전체(모든 노드 + LLM/툴)를 한 번에 샘플링
+        app.invoke(state, config={"callbacks": [tracer.callback_handler()]})
+    tracer.export_chrome_trace("trace.json")
+"""
+
+import atexit
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+try:
+    from langchain_core.callbacks import BaseCallbackHandler
+except ImportError:  # langchain이 없으면 노드 span만 기록
+    BaseCallbackHandler = object
+
+# ✅ 현재 열려 있는 span 경로 (LangGraph가 노드를 다른 스레드에서 실행해도 contextvars는 전달됨)
+_current_stack = contextvars.ContextVar("trace_stack", default=())
+# ✅ 현재 턴이 샘플링 되었는지 여부 (None: 아직 결정되지 않음)
+_current_sampled = contextvars.ContextVar("trace_sampled", default=None)
+
+
+class Tracer:
+    """span을 메모리 버퍼에 모았다가 파일로 내보내는 트레이서"""
+
+    def __init__(self, sample_rate=1.0, max_events=100_000, enabled=True):
+        self.sample_rate = sample_rate
+        self.enabled = enabled
+        # (name, cat, start_ns, dur_ns, tid, stack, args)
+        self.events = deque(maxlen=max_events)
+        self._origin_ns = time.perf_counter_ns()
+        self._pid = os.getpid()
+
+    # ------------------------------------------------------------
+    # span 기록
+    # ------------------------------------------------------------
+    def _should_record(self):
+        if not self.enabled:
+            return False
+        sampled = _current_sampled.get()
+        if sampled is None:
+            # 가장 바깥 span에서 한 번만 샘플링 여부를 결정
+            sampled = random.random() < self.sample_rate
+        return sampled
+
+    @contextmanager
+    def turn(self):
+        """턴(invoke) 하나의 샘플링 여부를 여기서 한 번만 결정 (노드마다 따로 정하면 trace가 중간중간 빠짐)"""
+        token = _current_sampled.set(self.enabled and random.random() < self.sample_rate)
+        try:
+            yield
+        finally:
+            _current_sampled.reset(token)
+
+    @contextmanager
+    def span(self, name, cat="node", **args):
+        """with 블록 구간을 하나의 span으로 기록"""
+        root = _current_sampled.get() is None
+        sampled = self._should_record()
+        sampled_token = _current_sampled.set(sampled) if root else None
+        if not sampled:
+            try:
+                yield args
+            finally:
+                if sampled_token is not None:
+                    _current_sampled.reset(sampled_token)
+            return
+
+        stack = _current_stack.get() + (name,)
+        stack_token = _current_stack.set(stack)
+        start = time.perf_counter_ns()
+        try:
+            yield args  # 블록 안에서 args에 값을 추가하면 함께 기록됨
+        finally:
+            self.record(name, cat, start, time.perf_counter_ns() - start, stack, args)
+            _current_stack.reset(stack_token)
+            if sampled_token is not None:
+                _current_sampled.reset(sampled_token)
+
+    def record(self, name, cat, start_ns, dur_ns, stack, args=None):
+        """이미 측정이 끝난 구간을 직접 추가"""
+        self.events.append((name, cat, start_ns, dur_ns, threading.get_ident(), stack, args or {}))
+
+    def wrap_node(self, name, fn):
+        """LangGraph 노드 함수를 감싸서 노드 실행 구간을 기록"""
+        @functools.wraps(fn)
+        def wrapper(state, *args, **kwargs):
+            with self.span(name, cat="node"):
+                return fn(state, *args, **kwargs)
+        return wrapper
+
+    def callback_handler(self):
+        """LLM/툴 호출을 하위 span으로 기록하는 LangChain 콜백 핸들러"""
+        return TracingCallbackHandler(self)
+
+    # ------------------------------------------------------------
+    # 내보내기
+    # ------------------------------------------------------------
+    def export_chrome_trace(self, path):
+        """Chrome trace event 형식(JSON)으로 저장 - chrome://tracing, ui.perfetto.dev에서 열기"""
+        trace_events = [
+            {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": (start - self._origin_ns) / 1000,
+                "dur": dur / 1000,
+                "pid": self._pid,
+                "tid": tid,
+                "args": args,
+            }
+            for name, cat, start, dur, tid, _, args in list(self.events)
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        return path
+
+    def export_folded(self, path):
+        """folded stack 형식으로 저장 (값: 자기 자신에게 쓴 시간, 마이크로초)"""
+        total = Counter()
+        children = Counter()
+        for _, _, _, dur, _, stack, _ in list(self.events):
+            total[stack] += dur
+            if len(stack) > 1:
+                children[stack[:-1]] += dur
+
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, dur in total.items():
+                self_us = max(dur - children[stack], 0) // 1000
+                if self_us:
+                    f.write(f"{';'.join(stack)} {self_us}\n")
+        return path
+
+    def export_on_exit(self, directory=".", prefix="trace"):
+        """프로그램이 종료될 때 Chrome trace와 folded 파일을 자동으로 저장"""
+        def _export():
+            if not self.events:
+                return
+            os.makedirs(directory, exist_ok=True)
+            self.export_chrome_trace(os.path.join(directory, f"{prefix}.json"))
+            self.export_folded(os.path.join(directory, f"{prefix}.folded"))
+        atexit.register(_export)
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """LLM, 툴 실행을 Tracer의 하위 span으로 기록 (토큰 사용량 포함)"""
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self._runs = {}  # run_id -> (name, cat, start_ns, stack)
+
+    def _start(self, run_id, parent_run_id, name, cat):
+        if not self.tracer._should_record():
+            return
+        parent = self._runs.get(parent_run_id)
+        stack = (parent[3] if parent else _current_stack.get()) + (name,)
+        self._runs[run_id] = (name, cat, time.perf_counter_ns(), stack)
+
+    def _end(self, run_id, args=None):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        name, cat, start, stack = run
+        self.tracer.record(name, cat, start, time.perf_counter_ns() - start, stack, args)
+
+    # LLM 구간
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, _run_name(serialized, kwargs, "llm"), "llm")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, _run_name(serialized, kwargs, "llm"), "llm")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        self._end(run_id, {k: usage[k] for k in ("prompt_tokens", "completion_tokens", "total_tokens") if k in usage})
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, {"error": repr(error)})
+
+    # 툴 구간
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, _run_name(serialized, kwargs, "tool"), "tool")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, {"error": repr(error)})
+
+
+def _run_name(serialized, kwargs, default):
+    return kwargs.get("name") or (serialized or {}).get("name") or default
@@ -0,0 +1,196 @@
+"""
+번역 서비스 (영구 캐시 + 배치 번역 + 번역기 재사용)
+
+- 매번 GoogleTranslator(source='auto', target=...)를 새로 만들던 것을 (source, target)별로 하나만 만들어 재사용
+- sqlite 캐시: 키는 sha256(source + 원문) + target 언어, 프로세스를 다시 시작해도 유지됨
+- translate_batch: 캐시에 없는 문장들을 "[번호] 문장" 줄로 이어 붙여 한 번의 요청으로 번역 (최대 길이 단위로 나눔)
+  - 응답에서 번호 표시가 1..N 순서대로 모두 남아 있을 때만 받아들이고, 아니면 문장별로 다시 요청
+    (줄 수만 비교하면 합쳐지거나 나뉜 줄이 엉뚱한 문장의 번역으로 영구 캐시될 수 있음)
+  - 빈 결과(None/"")는 캐시하지 않고 원문을 그대로 반환
+- translator_factory를 바꾸면 네트워크 없이 로컬 대역으로 테스트 가능 (timeline/2025-02-19/test_translation.py)
+
+사용 예:
+    translator = get_translation_service()
+    translator.translate("오늘 너무 힘들다", target="en")
+    translator.translate_batch(["좋아", "싫어"], target="en")
+
+로컬 대역으로 요청 수/캐시 동작 테스트:
+    python -m pytest timeline/2025-02-19/test_translation.py
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# ✅ deep_translator GoogleTranslator의 한 번 요청 최대 길이(5000자)보다 여유 있게
+MAX_BATCH_CHARS = 4500
+_SEPARATOR = "\n"
+_MARKER = re.compile(r"^\s*\[(\d+)\]\s?", re.MULTILINE)  # 배치 안에서 문장 경계를 표시하는 "[번호] "
+
+
+def _google_translator(source, target):
+    from deep_translator import GoogleTranslator  # 실제로 번역할 때만 import
+
+    return GoogleTranslator(source=source, target=target)
+
+
+def text_key(text, source="auto"):
+    return hashlib.sha256(f"{source}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """(원문 해시, target 언어) → 번역문을 저장하는 sqlite 캐시"""
+
+    def __init__(self, path="translation_cache.sqlite3"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " key TEXT NOT NULL, target TEXT NOT NULL, translated TEXT NOT NULL, created REAL NOT NULL,"
+            " PRIMARY KEY (key, target))"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys, target):
+        if not keys:
+            return {}
+        found = {}
+        keys = list(keys)
+        with self._lock:
+            for i in range(0, len(keys), 500):  # sqlite 변수 개수 제한
+                chunk = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, translated FROM translations WHERE target = ? AND key IN ({','.join('?' * len(chunk))})",
+                    [target, *chunk],
+                )
+                found.update(rows)
+        return found
+
+    def put_many(self, items, target):
+        """items: (key, 번역문) 목록"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (key, target, translated, created) VALUES (?, ?, ?, ?)",
+                [(key, target, translated, now) for key, translated in items],
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+
+class TranslationService:
+    """캐시를 먼저 확인하고, 없는 문장만 묶어서 번역기에 요청"""
+
+    def __init__(self, cache_path="translation_cache.sqlite3", translator_factory=_google_translator, max_batch_chars=MAX_BATCH_CHARS):
+        self.cache = TranslationCache(cache_path)
+        self.translator_factory = translator_factory
+        self.max_batch_chars = max_batch_chars
+        self._translators = {}  # (source, target) -> 번역기 객체 (재사용)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "requests": 0, "fallbacks": 0, "failures": 0}
+
+    def _translator(self, source, target):
+        with self._lock:
+            translator = self._translators.get((source, target))
+            if translator is None:
+                translator = self._translators[(source, target)] = self.translator_factory(source, target)
+            return translator
+
+    def translate(self, text, target="en", source="auto"):
+        return self.translate_batch([text], target=target, source=source)[0]
+
+    def translate_batch(self, texts, target="en", source="auto"):
+        """입력 순서대로 번역문 목록을 반환 (중복 문장은 한 번만 번역)"""
+        stripped = [(text or "").strip() for text in texts]
+        keys = {text: text_key(text, source) for text in set(stripped) if text}
+        cached = self.cache.get_many(keys.values(), target)
+
+        results = {text: cached[key] for text, key in keys.items() if key in cached}
+        missing = [text for text in keys if text not in results]
+        self._count(hits=len(results), misses=len(missing))
+
+        if missing:
+            translated = self._translate_missing(missing, source, target)
+            results.update(translated)
+            self.cache.put_many([(keys[text], value) for text, value in translated.items()], target)
+        return [results.get(text, text) for text in stripped]  # 번역에 실패한 문장은 원문
+
+    def _count(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                self.stats[name] += value
+
+    def _request(self, translator, text):
+        self._count(requests=1)
+        return translator.translate(text)
+
+    @staticmethod
+    def _split_marked(response, count):
+        """"[1] ...\n[2] ..." 응답을 문장 목록으로 나눔. 번호가 1..count 순서대로 정확히 남아 있지 않으면 None"""
+        markers = list(_MARKER.finditer(response or ""))
+        if [int(m.group(1)) for m in markers] != list(range(1, count + 1)) or markers[0].start() != 0:
+            return None
+        ends = [m.start() for m in markers[1:]] + [len(response)]
+        parts = [" ".join(response[m.end():end].split()) for m, end in zip(markers, ends)]  # 나뉜 줄은 다시 한 줄로
+        return parts if all(parts) else None
+
+    def _translate_missing(self, texts, source, target):
+        translator = self._translator(source, target)
+        translated = {}
+        # 줄바꿈이 들어 있는 문장은 이어 붙이면 경계를 알 수 없으므로 따로 번역
+        single = [text for text in texts if _SEPARATOR in text or len(text) > self.max_batch_chars]
+        joinable = [text for text in texts if _SEPARATOR not in text and len(text) <= self.max_batch_chars]
+
+        for chunk in self._chunks(joinable):
+            if len(chunk) == 1:
+                single.append(chunk[0])
+                continue
+            marked = _SEPARATOR.join(f"[{i}] {text}" for i, text in enumerate(chunk, 1))
+            parts = self._split_marked(self._request(translator, marked), len(chunk))
+            if parts:
+                translated.update(zip(chunk, parts))
+            else:  # 번호 표시가 빠지거나 섞였으면 경계를 믿을 수 없으므로 문장별로 다시 요청
+                self._count(fallbacks=1)
+                single.extend(chunk)
+
+        for text in single:
+            value = (self._request(translator, text) or "").strip()
+            if value:  # 빈 결과는 캐시하지 않음 (다음에 다시 시도)
+                translated[text] = value
+            else:
+                self._count(failures=1)
+        return translated
+
+    def _chunks(self, texts):
+        chunk, size = [], 0
+        for text in texts:
+            cost = len(text) + 8  # 줄바꿈 + "[번호] "
+            if chunk and size + cost > self.max_batch_chars:
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(text)
+            size += cost
+        if chunk:
+            yield chunk
+
+
+# ✅ 프로세스 전체에서 캐시 파일별로 하나의 서비스만 사용
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_translation_service(cache_path=None):
+    """TRANSLATION_CACHE 환경 변수(기본값 translation_cache.sqlite3)의 캐시를 쓰는 공용 서비스"""
+    cache_path = cache_path or os.getenv("TRANSLATION_CACHE", "translation_cache.sqlite3")
+    with _services_lock:
+        if cache_path not in _services:
+            _services[cache_path] = TranslationService(cache_path)
+        return _services[cache_path]
+
@@ -0,0 +1,223 @@
+"""
+thread_id별 토큰/비용 사용량 집계
+
+- LLM 호출마다 prompt/completion 토큰과 예상 비용을 thread_id에 누적
+- 툴 내부에서 호출된 LLM(예: search_summary_tool)은 해당 툴 이름으로, 그 외는 "agent"로 구분
+- 전체 누적값과 최근 N일 일별 값을 JSON 파일로 저장하고 Streamlit 사이드바에 표시
+
+사용 예:
+    ledger = get_ledger("token_usage.json")
+    usage_handler = UsageCallbackHandler(ledger, thread_id)
+    agent.invoke(inputs, config={"callbacks": [usage_handler]})
+    ledger.flush()
+"""
+
+import datetime
+import json
+import os
+import threading
+
+try:
+    from langchain_core.callbacks import BaseCallbackHandler
+except ImportError:
+    BaseCallbackHandler = object
+
+# ✅ 모델별 가격 (USD / 1M tokens: 입력, 출력)
+PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4": (30.00, 60.00),
+}
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """모델 이름으로 가격표를 찾아 예상 비용(USD)을 계산 (날짜가 붙은 모델명도 처리)"""
+    for name in sorted(PRICES, key=len, reverse=True):  # 긴 이름부터 비교 (gpt-4o-mini → gpt-4o)
+        if model and model.startswith(name):
+            input_price, output_price = PRICES[name]
+            return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+    return 0.0
+
+
+def _empty_bucket():
+    return {"prompt_tokens": 0, "completion_tokens": 0, "calls": 0, "cost_usd": 0.0}
+
+
+def _add(bucket, prompt_tokens, completion_tokens, cost):
+    bucket["prompt_tokens"] += prompt_tokens
+    bucket["completion_tokens"] += completion_tokens
+    bucket["calls"] += 1
+    bucket["cost_usd"] += cost
+
+
+class UsageLedger:
+    """thread_id → {total, tools, daily} 사용량을 보관하고 JSON 파일로 저장"""
+
+    def __init__(self, path="token_usage.json", window_days=7):
+        self.path = path
+        self.window_days = window_days
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def record(self, thread_id, tool, model, prompt_tokens, completion_tokens):
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        today = datetime.date.today()
+        with self._lock:
+            thread = self.data.setdefault(thread_id, {"total": _empty_bucket(), "tools": {}, "daily": {}})
+            _add(thread["total"], prompt_tokens, completion_tokens, cost)
+            _add(thread["tools"].setdefault(tool, _empty_bucket()), prompt_tokens, completion_tokens, cost)
+            _add(thread["daily"].setdefault(today.isoformat(), _empty_bucket()), prompt_tokens, completion_tokens, cost)
+
+            # 최근 window_days 일만 유지 (rolling)
+            oldest = (today - datetime.timedelta(days=self.window_days - 1)).isoformat()
+            for day in [d for d in thread["daily"] if d < oldest]:
+                del thread["daily"][day]
+            self._dirty = True
+
+    def thread_usage(self, thread_id):
+        with self._lock:
+            return json.loads(json.dumps(self.data.get(thread_id, {})))  # 복사본 반환
+
+    def top_threads(self, n=5):
+        """비용이 큰 thread_id 순으로 (thread_id, total) 반환"""
+        with self._lock:
+            items = [(tid, dict(v["total"])) for tid, v in self.data.items()]
+        return sorted(items, key=lambda item: item[1]["cost_usd"], reverse=True)[:n]
+
+    def flush(self):
+        """변경된 내용이 있으면 파일에 원자적으로 저장"""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+
+# ✅ 프로세스 전체에서 파일 경로별로 하나의 ledger만 사용 (Streamlit rerun, 여러 세션 공유)
+_ledgers = {}
+_ledgers_lock = threading.Lock()
+
+
+def get_ledger(path="token_usage.json"):
+    with _ledgers_lock:
+        if path not in _ledgers:
+            _ledgers[path] = UsageLedger(path)
+        return _ledgers[path]
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """LLM 호출 토큰 사용량을 thread_id와 호출한 툴 이름으로 기록하는 콜백 핸들러"""
+
+    def __init__(self, ledger, thread_id):
+        self.ledger = ledger
+        self.thread_id = thread_id
+        self._parents = {}  # run_id -> parent_run_id
+        self._tools = {}  # 실행 중인 툴의 run_id -> 툴 이름
+
+    def _start(self, run_id, parent_run_id):
+        self._parents[run_id] = parent_run_id
+
+    def _end(self, run_id):
+        self._parents.pop(run_id, None)
+        self._tools.pop(run_id, None)
+
+    def _owner_tool(self, run_id):
+        """부모 run을 따라 올라가며 가장 가까운 툴 이름을 찾음"""
+        while run_id is not None:
+            if run_id in self._tools:
+                return self._tools[run_id]
+            run_id = self._parents.get(run_id)
+        return "agent"
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id)
+        self._tools[run_id] = kwargs.get("name") or (serialized or {}).get("name", "unknown")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        completion_tokens = usage.get("completion_tokens")
+        message = getattr(response.generations[0][0], "message", None) if response.generations else None
+
+        if prompt_tokens is None:  # 스트리밍 등으로 llm_output이 없으면 message의 usage_metadata 사용
+            metadata = getattr(message, "usage_metadata", None) or {}
+            prompt_tokens = metadata.get("input_tokens", 0)
+            completion_tokens = metadata.get("output_tokens", 0)
+
+        model = llm_output.get("model_name") or (getattr(message, "response_metadata", None) or {}).get("model_name", "")
+        self.ledger.record(
+            self.thread_id,
+            self._owner_tool(self._parents.get(run_id)),
+            model,
+            prompt_tokens or 0,
+            completion_tokens or 0,
+        )
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+
+def show_usage_sidebar(ledger, thread_id):
+    """Streamlit 사이드바에 현재 thread와 툴별 사용량, 비용 상위 thread를 표시"""
+    import streamlit as st
+
+    usage = ledger.thread_usage(thread_id)
+    with st.sidebar:
+        st.markdown("### 📊 토큰 사용량")
+        if not usage:
+            st.caption("아직 기록된 사용량이 없습니다.")
+            return
+
+        total = usage["total"]
+        col1, col2 = st.columns(2)
+        col1.metric("입력 토큰", f"{total['prompt_tokens']:,}")
+        col2.metric("출력 토큰", f"{total['completion_tokens']:,}")
+        st.caption(f"LLM 호출 {total['calls']}회 · 예상 비용 ${total['cost_usd']:.4f}")
+
+        st.markdown("**툴별 사용량**")
+        st.table([
+            {"tool": tool, "tokens": b["prompt_tokens"] + b["completion_tokens"], "calls": b["calls"], "cost($)": round(b["cost_usd"], 5)}
+            for tool, b in sorted(usage["tools"].items(), key=lambda item: item[1]["cost_usd"], reverse=True)
+        ])
+
+        st.markdown("**최근 일별 토큰**")
+        st.bar_chart({day: b["prompt_tokens"] + b["completion_tokens"] for day, b in sorted(usage["daily"].items())})
+
+        with st.expander("비용 상위 Thread"):
+            for tid, t in ledger.top_threads():
+                st.write(f"{tid}: {t['prompt_tokens'] + t['completion_tokens']:,} tokens (${t['cost_usd']:.4f})")
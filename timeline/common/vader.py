@@ -0,0 +1,131 @@
+"""
+오프라인 VADER 감정 분석기 (어휘 사전 동봉 + 지연 로딩)
+
+- import 시점의 nltk.download('vader_lexicon') 네트워크 요청을 없앰 (인터넷이 없는 환경에서도 동작)
+- 어휘 사전은 data/vader_lexicon.txt (vaderSentiment, MIT 라이선스)를 사용
+- 첫 감정 분석 호출 때 nltk와 어휘 사전을 로드하고, 파싱한 dict는 pickle로 저장해서 다음 실행부터 재사용
+
+사용 예:
+    sia = LazySentimentAnalyzer()  # 이 시점에는 아무것도 로드하지 않음
+    sia.polarity_scores("I love it")  # 첫 호출 때 로드
+
+import/첫 호출 시간 측정:
+    python vader.py
+"""
+
+import os
+import pickle
+import threading
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+LEXICON_PATH = os.path.join(DATA_DIR, "vader_lexicon.txt")
+# ✅ 파싱된 어휘 사전 캐시 (원본 파일의 크기/수정 시각이 바뀌면 다시 생성)
+CACHE_PATH = os.getenv("VADER_LEXICON_CACHE", os.path.join(DATA_DIR, "vader_lexicon.pickle"))
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def parse_lexicon(path=LEXICON_PATH):
+    """'단어<TAB>평균 점수<TAB>표준편차<TAB>원점수' 형식의 파일을 {단어: 점수} dict로 변환"""
+    lexicon = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) >= 2:
+                lexicon[parts[0]] = float(parts[1])
+    return lexicon
+
+
+def load_lexicon(path=LEXICON_PATH, cache_path=CACHE_PATH):
+    """pickle 캐시가 유효하면 그대로 읽고, 아니면 원본을 파싱해서 캐시를 새로 저장"""
+    signature = _signature(path)
+    if cache_path:
+        try:
+            with open(cache_path, "rb") as f:
+                cached_signature, lexicon = pickle.load(f)
+            if cached_signature == signature:
+                return lexicon
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            pass
+
+    lexicon = parse_lexicon(path)
+    if cache_path:
+        try:  # 읽기 전용 환경에서는 캐시 없이 사용
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump((signature, lexicon), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+    return lexicon
+
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+
+def get_analyzer():
+    """동봉된 어휘 사전으로 만든 nltk SentimentIntensityAnalyzer (프로세스당 한 번만 생성)"""
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                import nltk.data
+                from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+                class BundledSentimentAnalyzer(SentimentIntensityAnalyzer):
+                    """동봉된 파일을 공개 생성자로 넘기고, 사전 파싱만 pickle 캐시(load_lexicon)로 대체"""
+
+                    def make_lex_dict(self):
+                        return load_lexicon()
+
+                # 기본 생성자는 nltk_data에서 사전을 찾으므로, data/ 폴더를 nltk 검색 경로에 추가하고 동봉된 파일 이름을 넘김
+                if DATA_DIR not in nltk.data.path:
+                    nltk.data.path.append(DATA_DIR)
+                analyzer = BundledSentimentAnalyzer(lexicon_file=os.path.basename(LEXICON_PATH))
+                _analyzer = analyzer
+    return _analyzer
+
+
+class LazySentimentAnalyzer:
+    """SentimentIntensityAnalyzer 자리에 그대로 쓰는 지연 로딩 래퍼"""
+
+    def polarity_scores(self, text):
+        return get_analyzer().polarity_scores(text)
+
+
+if __name__ == "__main__":
+    import subprocess
+    import sys
+
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    def _run(code):
+        out = subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+
+    timing = (
+        "import time; t0 = time.perf_counter(); {setup}; t1 = time.perf_counter(); "
+        "sia.polarity_scores('I love it'); t2 = time.perf_counter(); "
+        "print(f'import {{(t1 - t0) * 1000:.1f}} ms, 첫 호출 {{(t2 - t1) * 1000:.1f}} ms')"
+    )
+    lexicon_timing = (
+        "import time; t0 = time.perf_counter(); from vader import load_lexicon; n = len(load_lexicon()); "
+        "print(f'어휘 {n}개, {(time.perf_counter() - t0) * 1000:.1f} ms')"
+    )
+    if os.path.exists(CACHE_PATH):
+        os.remove(CACHE_PATH)
+    print(f"📖 어휘 사전 로드 (txt 파싱): {_run(lexicon_timing)}")
+    print(f"📖 어휘 사전 로드 (pickle):   {_run(lexicon_timing)}")
+    os.remove(CACHE_PATH)
+    lazy = "from vader import LazySentimentAnalyzer; sia = LazySentimentAnalyzer()"
+    print(f"🐢 캐시 없음 (txt 파싱): {_run(timing.format(setup=lazy))}")
+    print(f"🚀 pickle 캐시:         {_run(timing.format(setup=lazy))}")
+    try:
+        eager = "from nltk.sentiment import SentimentIntensityAnalyzer; sia = SentimentIntensityAnalyzer()"
+        print(f"📦 기존 nltk_data 방식: {_run(timing.format(setup=eager))}")
+    except subprocess.CalledProcessError:
+        print("📦 기존 nltk_data 방식: vader_lexicon이 설치되어 있지 않음 (nltk.download 필요)")